@@ -63,6 +63,8 @@ def setup(args=None, _manifest=0):
 
             'tdi/c/lib/content.c',
             'tdi/c/lib/copy.c',
+            'tdi/c/lib/dump.c',
+            'tdi/c/lib/escape.c',
             'tdi/c/lib/finalize.c',
             'tdi/c/lib/globals.c',
             'tdi/c/lib/iterate.c',
@@ -89,6 +91,7 @@ def setup(args=None, _manifest=0):
             'tdi/c/model_adapters.c',
             'tdi/c/node.c',
             'tdi/c/raw_node.c',
+            'tdi/c/render_buffer.c',
             'tdi/c/render_iterator.c',
             'tdi/c/repeat_iterator.c',
             'tdi/c/repr_iterator.c',
@@ -107,6 +110,8 @@ def setup(args=None, _manifest=0):
             'tdi/c/lib/include/tdi.h',
             'tdi/c/lib/include/tdi_content.h',
             'tdi/c/lib/include/tdi_copy.h',
+            'tdi/c/lib/include/tdi_dump.h',
+            'tdi/c/lib/include/tdi_escape.h',
             'tdi/c/lib/include/tdi_exceptions.h',
             'tdi/c/lib/include/tdi_finalize.h',
             'tdi/c/lib/include/tdi_globals.h',
@@ -138,6 +143,7 @@ def setup(args=None, _manifest=0):
             'tdi/c/include/obj_model_adapters.h',
             'tdi/c/include/obj_node.h',
             'tdi/c/include/obj_raw_node.h',
+            'tdi/c/include/obj_render_buffer.h',
             'tdi/c/include/obj_render_iter.h',
             'tdi/c/include/obj_repeat_iter.h',
             'tdi/c/include/obj_repr_iter.h',
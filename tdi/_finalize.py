@@ -206,11 +206,15 @@ def _finish_level(stack, encoder, decoder):
     udict['encoder'] = encoder
     udict['decoder'] = decoder
     udict['modelscope'] = scope
+    udict.pop('static', None)
+    udict.pop('starttag', None)
     if 'attr_' in udict:
         udict['attr'] = dict((
             decoder.normalize(key), (key, value)
         ) for key, value in udict['attr_'])
         del udict['attr_']
+    if not udict['noelement'] and not udict.get('is_root'):
+        _nodetree.starttag(udict)
 
     # Fast exit: Optimize for text-only content
     if len(nodes) == 0:
@@ -314,23 +318,12 @@ def _optimize_separators(separated):
         elif udict['noelement']:
             udict['complete'] = udict['content']
         else:
+            starttag = _nodetree.starttag(udict)
             left = "%s%s%s" % (
-                udict['encoder'].starttag(
-                    udict['tagname'],
-                    udict['attr'].itervalues(),
-                    udict['closed'],
-                ),
-                udict['content'][0],
-                udict['endtag'],
+                starttag, udict['content'][0], udict['endtag'],
             )
             right = "%s%s%s" % (
-                udict['encoder'].starttag(
-                    udict['tagname'],
-                    udict['attr'].itervalues(),
-                    udict['closed'],
-                ),
-                udict['content'][1],
-                udict['endtag'],
+                starttag, udict['content'][1], udict['endtag'],
             )
             if left == right:
                 right = left
@@ -52,8 +52,9 @@ __author__ = r"Andr\xe9 Malo".encode('ascii').decode('unicode_escape')
 __docformat__ = "restructuredtext en"
 
 import itertools as _it
+import operator as _op
 
-from ._exceptions import NodeNotFoundError, NodeTreeError
+from ._exceptions import ModelMissingError, NodeNotFoundError, NodeTreeError
 
 TEXT_NODE, PROC_NODE, SEP_NODE, CB_NODE, DONE_NODE = xrange(5)
 
@@ -134,7 +135,8 @@ def overlay(udict, oindex, template, root):
     return result
 
 
-def _repeat(node, user_node, model, callback, itemlist, fixed, separate):
+def _repeat(node, user_node, model, callback, itemlist, fixed, separate,
+            batch=None, mapping=None):
     """
     Repeat a node
 
@@ -160,6 +162,15 @@ def _repeat(node, user_node, model, callback, itemlist, fixed, separate):
       `separate` : ``callable``
         Alternative separator callback or ``None``
 
+      `batch` : ``int``
+        Batch size. If ``None``, the callback is called per node. Otherwise
+        it's called per batch with a list of ``(node, item)`` pairs.
+
+      `mapping` : ``dict``
+        Content mapping (``{'name': field or callable}``). If not ``None``,
+        the nodes are rendered directly from the items (see
+        `_repeat_map`).
+
     :Return: The repeated nodes (``[(kind, node), ...]``)
     :Rtype: iterable
     """
@@ -171,7 +182,7 @@ def _repeat(node, user_node, model, callback, itemlist, fixed, separate):
     except KeyError:
         pass
     udict['repeated'] = None
-    sep = udict['sep']
+    sep, sepcall = udict['sep'], None
     if sep is not None:
         if separate is None and udict['name'] is not None:
             sepcall = model.modelmethod(
@@ -181,15 +192,30 @@ def _repeat(node, user_node, model, callback, itemlist, fixed, separate):
         else:
             sepcall = separate
 
-    deep = copydeep
-    repeated_node = deep(node, model, (0, item, fixed), user_node)
+    if batch is not None:
+        for repeated in _repeat_batch(
+            node, user_node, model, callback,
+            _it.chain(((idx, item),), itemlist), fixed, sep, sepcall, batch
+        ):
+            yield repeated
+        return
+    elif mapping is not None:
+        for repeated in _repeat_map(
+            node, user_node, model, _it.chain(((idx, item),), itemlist),
+            mapping, sep, sepcall
+        ):
+            yield repeated
+        return
+
+    deep, lazy = copydeep, copylazy
+    repeated_node = lazy(node, model, (0, item, fixed), user_node)
     repeated_node._udict['callback'] = callback
     repeated_node._udict['complete'] = (item,) + fixed
     yield (CB, repeated_node)
 
     if sep is None:
         for idx, item in itemlist:
-            repeated_node = deep(node, model, (idx, item, fixed), user_node)
+            repeated_node = lazy(node, model, (idx, item, fixed), user_node)
             repeated_node._udict['callback'] = callback
             repeated_node._udict['complete'] = (item,) + fixed
             yield (CB, repeated_node)
@@ -198,7 +224,7 @@ def _repeat(node, user_node, model, callback, itemlist, fixed, separate):
             sep_node = (TEXT_NODE, sep._udict['complete'])
             for idx, item in itemlist:
                 yield sep_node
-                repeated_node = deep(
+                repeated_node = lazy(
                     node, model, (idx, item, fixed), user_node
                 )
                 repeated_node._udict['callback'] = callback
@@ -210,10 +236,10 @@ def _repeat(node, user_node, model, callback, itemlist, fixed, separate):
                 repeated_sep = deep(
                     sep, model, (idx - 1, (last_item, item), fixed), user_node
                 )
-                repeated_sep._udict['callback'] = sepcall
-                repeated_sep._udict['complete'] = fixed
+                sepdict = repeated_sep._unshare()
+                sepdict['callback'], sepdict['complete'] = sepcall, fixed
                 yield (CB, repeated_sep)
-                repeated_node = deep(
+                repeated_node = lazy(
                     node, model, (idx, item, fixed), user_node
                 )
                 repeated_node._udict['callback'] = callback
@@ -222,6 +248,279 @@ def _repeat(node, user_node, model, callback, itemlist, fixed, separate):
                 last_item = item
 
 
+def _repeat_batch(node, user_node, model, callback, itemlist, fixed, sep,
+                  sepcall, batch):
+    """
+    Repeat a node batchwise
+
+    The nodes of a batch are created at once and passed to a single
+    callback call. If the callback returns a true value, the nodes are
+    marked as done.
+
+    :Parameters:
+      `node` : `nodetree.Node`
+        The node to repeat (it will be copied, but not touched)
+
+      `user_node` : ``type``
+        User node type
+
+      `model` : `ModelAdapterInterface`
+        The model object
+
+      `callback` : ``callable``
+        The batch callback function
+
+      `itemlist` : iterable
+        The enumerated items to iterate over (``(idx, item)``)
+
+      `fixed` : ``tuple``
+        Fixed parameters for the callback function
+
+      `sep` : `nodetree.Node`
+        Separator node or ``None``
+
+      `sepcall` : ``callable``
+        Separator callback or ``None``
+
+      `batch` : ``int``
+        Batch size
+
+    :Return: The repeated nodes (``[(kind, node), ...]``)
+    :Rtype: iterable
+    """
+    CB, deep, lazy, islice = CB_NODE, copydeep, copylazy, _it.islice
+    if sep is not None and sepcall is None \
+            and sep._udict['complete'][0] is not None:
+        sep_node = (TEXT_NODE, sep._udict['complete'])
+    else:
+        sep_node = None
+
+    last_item = None
+    while 1:
+        items = list(islice(itemlist, batch))
+        if not items:
+            break
+        nodes = [
+            lazy(node, model, (idx, item, fixed), user_node)
+            for idx, item in items
+        ]
+        done = callback(zip(nodes, [item for _, item in items]), *fixed)
+
+        for (idx, item), repeated_node in zip(items, nodes):
+            if sep is not None and idx > 0:
+                if sep_node is not None:
+                    yield sep_node
+                else:
+                    repeated_sep = deep(
+                        sep, model, (idx - 1, (last_item, item), fixed),
+                        user_node
+                    )
+                    sepdict = repeated_sep._unshare()
+                    sepdict['callback'], sepdict['complete'] = sepcall, fixed
+                    yield (CB, repeated_sep)
+            udict = repeated_node._udict
+            if 'callback' in udict:  # replaced by the callback
+                yield (CB, repeated_node)
+            elif done:
+                yield (DONE_NODE, repeated_node)
+            else:
+                udict['callback'] = None
+                yield (CB, repeated_node)
+            last_item = item
+
+
+def _repeat_map(node, user_node, model, itemlist, mapping, sep, sepcall):
+    """
+    Repeat a node by filling its subnodes directly from the items
+
+    The markup of the node is compiled once into static chunks and content
+    slots (see `_rowtemplate`). No nodes are created for the items and the
+    model is not asked for them.
+
+    :Parameters:
+      `node` : `nodetree.Node`
+        The node to repeat (it will not be touched)
+
+      `user_node` : ``type``
+        User node type
+
+      `model` : `ModelAdapterInterface`
+        The model object
+
+      `itemlist` : iterable
+        The enumerated items to iterate over (``(idx, item)``)
+
+      `mapping` : ``dict``
+        Content mapping (``{'name': field or callable}``)
+
+      `sep` : `nodetree.Node`
+        Separator node or ``None``
+
+      `sepcall` : ``callable``
+        Separator callback or ``None``
+
+    :Return: The repeated nodes (``[(kind, node), ...]``)
+    :Rtype: iterable
+    """
+    TEXT, deep = TEXT_NODE, copydeep
+    parts, slots = _rowtemplate(node._udict, mapping, False)
+    if model.emit_escaped:
+        eparts = _rowtemplate(node._udict, mapping, True)[0]
+    else:
+        eparts = None
+    encoder = node._udict['encoder']
+    content, escape = encoder.content, encoder.escape
+    basestring_, isinstance_, str_ = basestring, isinstance, str
+    if sep is not None and sepcall is None \
+            and sep._udict['complete'][0] is not None:
+        sep_node = (TEXT, sep._udict['complete'])
+    else:
+        sep_node = None
+
+    last_item = None
+    for idx, item in itemlist:
+        if sep is not None and idx > 0:
+            if sep_node is not None:
+                yield sep_node
+            else:
+                repeated_sep = deep(
+                    sep, model, (idx - 1, (last_item, item), ()), user_node
+                )
+                sepdict = repeated_sep._unshare()
+                sepdict['callback'], sepdict['complete'] = sepcall, ()
+                yield (CB_NODE, repeated_sep)
+
+        row = parts[:]
+        if eparts is None:
+            for pos, getter in slots:
+                value = getter(item)
+                if not isinstance_(value, basestring_):
+                    value = str_(value)
+                row[pos] = content(value)
+            row = ''.join(row)
+            yield (TEXT, (row, row))
+        else:
+            erow = eparts[:]
+            for pos, getter in slots:
+                value = getter(item)
+                if not isinstance_(value, basestring_):
+                    value = str_(value)
+                row[pos] = value = content(value)
+                erow[pos] = escape(value)
+            yield (TEXT, (''.join(row), ''.join(erow)))
+        last_item = item
+
+
+def _rowtemplate(udict, mapping, escaped):
+    """
+    Compile the markup of a node into static chunks and content slots
+
+    The contents of the direct subnodes named in `mapping` are left open
+    (as slots). The rest of the markup is fixed.
+
+    :Parameters:
+      `udict` : ``dict``
+        The node's udict
+
+      `mapping` : ``dict``
+        Content mapping (``{'name': field or callable}``). Fields are looked
+        up in the items, callables are called with the item.
+
+      `escaped` : ``bool``
+        Compile escaped content?
+
+    :Return: The chunks (slots are ``None``) and the slots
+             (``([chunk, ...], [(position, getter), ...])``)
+    :Rtype: ``tuple``
+
+    :Exceptions:
+      - `NodeNotFoundError` : A mapped node was not found
+    """
+    parts, slots = [], []
+    found = _rowparts(udict, mapping, escaped, parts, slots)
+    for name in sorted(mapping):
+        if name not in found:
+            raise NodeNotFoundError(name)
+
+    getters, merged, slots = dict(slots), [], []
+    for pos, part in enumerate(parts):
+        if part is None:
+            slots.append((len(merged), getters[pos]))
+            merged.append(None)
+        elif merged and merged[-1] is not None:
+            merged[-1] += part
+        else:
+            merged.append(part)
+    return merged, slots
+
+
+def _rowparts(udict, mapping, escaped, parts, slots):
+    """
+    Append the chunks and content slots of a node
+
+    :Parameters:
+      `udict` : ``dict``
+        The node's udict
+
+      `mapping` : ``dict``
+        Content mapping for the direct subnodes (or ``None``)
+
+      `escaped` : ``bool``
+        Compile escaped content?
+
+      `parts` : ``list``
+        Chunk list to append to
+
+      `slots` : ``list``
+        Slot list to append to
+
+    :Return: The names of the mapped subnodes found
+    :Rtype: ``set``
+    """
+    push, found = parts.append, set()
+    element = not udict['noelement'] and not udict['masked']
+    if element:
+        push(starttag(udict))
+
+    content = udict['content']
+    if content[0] is not None:
+        if not escaped:
+            push(content[0])
+        elif content[1] is None:
+            push(udict['encoder'].escape(content[0]))
+        else:
+            push(content[1])
+    else:
+        for kind, node in udict['nodes']:
+            if kind == TEXT_NODE:
+                push(node[escaped])
+                continue
+            subdict = node._udict
+            if subdict['removed']:
+                continue
+            elif mapping and subdict['name'] in mapping:
+                found.add(subdict['name'])
+                getter = mapping[subdict['name']]
+                if not callable(getter):
+                    getter = _op.itemgetter(getter)
+                subelement = \
+                    not subdict['noelement'] and not subdict['masked']
+                if subelement:
+                    push(starttag(subdict))
+                slots.append((len(parts), getter))
+                push(None)
+                if subelement:
+                    push(subdict['endtag'])
+            elif node._usernode:
+                _rowparts(subdict, None, escaped, parts, slots)
+            else:
+                push(compile_static(subdict)[escaped])
+
+    if element:
+        push(udict['endtag'])
+    return found
+
+
 def copydeep(node, model, ctx, user_node):
     """
     Deep-copy a node
@@ -246,17 +545,112 @@ def copydeep(node, model, ctx, user_node):
     """
     nodecopy = user_node(node, model, ctx)
     udict = nodecopy._udict
-    if udict['content'][0] is None:
+    if not nodecopy._shared and udict['content'][0] is None:
         TEXT, deep = TEXT_NODE, copydeep
         udict['nodes'] = [(
             kind,
             (kind != TEXT and snode._usernode)
             and deep(snode, model, ctx, user_node) or snode
         ) for kind, snode in udict['nodes']]
+        udict.pop('proto', None)
+
+    return nodecopy
+
+
+def copylazy(node, model, ctx, user_node):
+    """
+    Copy a node, but defer the copies of its user subnodes
+
+    The subnodes of the copy are the same as the ones of the source node.
+    The source's subnode list is kept as prototype list (``udict['proto']``).
+    User subnodes still found there are copied (lazily again) only when
+    they are actually visited (see `_lazynodes`). This keeps the memory
+    flat when repeating large trees.
+
+    :Parameters:
+      `node` : `nodetree.Node` or `nodetree.TemplateNode`
+        The node to copy
+
+      `model` : `ModelAdapterInterface`
+        The model object
+
+      `ctx` : any
+        The desired node context
+
+      `user_node` : ``type``
+        user node class
+
+    :Return: The copied node
+    :Rtype: `nodetree.Node`
+    """
+    nodecopy = user_node(node, model, ctx)
+    if not nodecopy._shared:
+        udict = nodecopy._udict
+        if udict['content'][0] is None:
+            udict['proto'] = node._udict['nodes']
+        else:
+            udict.pop('proto', None)
 
     return nodecopy
 
 
+def isproto(udict, idx, node):
+    """
+    Check if the subnode at position `idx` is an uncopied prototype node
+
+    :Parameters:
+      `udict` : ``dict``
+        The parent's udict
+
+      `idx` : ``int``
+        The position of the subnode
+
+      `node` : `nodetree.Node` or `nodetree.TemplateNode`
+        The subnode
+
+    :Return: Is it a prototype (which needs to be copied before use)?
+    :Rtype: ``bool``
+    """
+    proto = udict.get('proto')
+    return bool(
+        proto is not None and node._usernode
+        and idx < len(proto) and proto[idx][1] is node
+    )
+
+
+def _lazynodes(udict, model, ctx, user_node):
+    """
+    Determine the subnodes of a node, copying pending prototype nodes
+
+    :Parameters:
+      `udict` : ``dict``
+        The node's udict
+
+      `model` : `ModelAdapterInterface`
+        The model object
+
+      `ctx` : any
+        The desired node context
+
+      `user_node` : ``type``
+        user node class
+
+    :Return: The subnode list (``[(kind, node), ...]``)
+    :Rtype: ``list``
+    """
+    nodes, proto = udict['nodes'], udict.get('proto')
+    if proto is None:
+        return nodes
+
+    TEXT, lazy, length = TEXT_NODE, copylazy, len(proto)
+    return [(
+        kind,
+        (kind != TEXT and snode._usernode
+         and idx < length and proto[idx][1] is snode)
+        and lazy(snode, model, ctx, user_node) or snode
+    ) for idx, (kind, snode) in enumerate(nodes)]
+
+
 def represent(udict, verbose):
     """
     Create a string representation of the tree
@@ -332,6 +726,137 @@ def represent(udict, verbose):
     yield "\\"
 
 
+def dump(udict):
+    """
+    Create a marshallable representation of a finalized (sub)tree
+
+    The result consists of nested lists and tuples of strings, booleans and
+    ``None``. Text items are ``(clean, with_escapes)`` pairs, node items are
+    ``(tagname, attr, closed, endtag, flags, name, overlay, scope,
+    items)`` tuples. Separator nodes follow their content node and carry
+    a ``:`` flag. The tree can be rebuilt from it via `load`.
+
+    :Parameters:
+      `udict` : ``dict``
+        Startnode's dict
+
+    :Return: The item list
+    :Rtype: ``list``
+    """
+    result = []
+    if udict['content'][0] is not None:
+        if udict['content'] != ('', ''):
+            result.append(tuple(udict['content']))
+        return result
+
+    for kind, node in udict['nodes']:
+        if kind == TEXT_NODE:
+            result.append(tuple(node))
+            continue
+
+        result.extend(dump_node(node._udict))
+    return result
+
+
+def dump_node(udict):
+    """
+    Create a marshallable representation of a single finalized node
+
+    :Parameters:
+      `udict` : ``dict``
+        The node's dict
+
+    :Return: The item list (see `dump`) containing the node and its
+             separator node (if any)
+    :Rtype: ``list``
+    """
+    result = [_dumpnode(udict, '')]
+    if udict['sep'] is not None:
+        result.append(_dumpnode(udict['sep']._udict, ':'))
+    return result
+
+
+def _dumpnode(udict, flags):
+    """
+    Create a marshallable representation of a single node
+
+    :Parameters:
+      `udict` : ``dict``
+        The node's dict
+
+      `flags` : ``str``
+        Initial node flags
+
+    :Return: The node item
+    :Rtype: ``tuple``
+    """
+    if udict['noelement']:
+        flags += '-'
+    if udict['noauto']:
+        flags += '*'
+
+    ohidden, otarget, osource, oname = udict['overlay']
+    if oname is None:
+        overlay = None
+    else:
+        overlay = ''.join((
+            ohidden and '-' or '', otarget and '>' or '',
+            osource and '<' or '',
+        )), oname
+
+    shidden, sabsolute, sname = udict['scope']
+    if not shidden and not sabsolute and not sname:
+        scope = None
+    else:
+        scope = ''.join((
+            shidden and '-' or '', sabsolute and '=' or '',
+        )), sname or ''
+
+    return (
+        udict['tagname'], tuple(udict['attr'].itervalues()),
+        bool(udict['closed']), udict['endtag'] or '', flags, udict['name'],
+        overlay, scope, dump(udict),
+    )
+
+
+def load(node, items):
+    """
+    Rebuild a (sub)tree from its `dump` representation
+
+    The tree is built via the tree building interface, so `node` can be
+    any (not finalized) `tdi.nodetree.TemplateNode` implementation.
+
+    :Parameters:
+      `node` : `tdi.nodetree.TemplateNode`
+        The node to append the items to
+
+      `items` : ``list``
+        The item list as returned by `dump`
+
+    :Return: The nodes appended to `node` directly
+    :Rtype: ``list``
+    """
+    result = []
+    for item in items:
+        if len(item) == 2:
+            node.append_escape(*item)
+            continue
+
+        tagname, attr, closed, endtag, flags, name, overlay, scope, subitems \
+            = item
+        special = dict(attribute=(flags, name))
+        if overlay is not None:
+            special['overlay'] = overlay
+        if scope is not None:
+            special['scope'] = scope
+        subnode = node.append_node(tagname, attr, special, closed)
+        load(subnode, subitems)
+        if not closed:
+            subnode.endtag = endtag
+        result.append(subnode)
+    return result
+
+
 def iterate(node, nodelist, itemlist, separate, user_node):
     """
     Actually iterate a node
@@ -357,7 +882,7 @@ def iterate(node, nodelist, itemlist, separate, user_node):
     """
     item, DONE = itemlist.next(), DONE_NODE
     udict, model, push = node._udict, node._model, nodelist.append
-    deep = copydeep
+    deep, lazy = copydeep, copylazy
     sep = udict['sep']
     if sep is not None:
         if separate is None and udict['name'] is not None:
@@ -368,32 +893,32 @@ def iterate(node, nodelist, itemlist, separate, user_node):
         else:
             sepcall = separate
 
-    repeated_node = deep(node, model, None, user_node)
+    repeated_node = lazy(node, model, None, user_node)
     push((DONE, repeated_node))
     yield repeated_node, item
 
     if sep is None:
         for item in itemlist:
-            repeated_node = deep(node, model, None, user_node)
+            repeated_node = lazy(node, model, None, user_node)
             push((DONE, repeated_node))
             yield repeated_node, item
     else:
         if sepcall is None and sep._udict['complete'][0] is not None:
             sep_node = (TEXT_NODE, sep._udict['complete'])
             for item in itemlist:
-                repeated_node = deep(node, model, None, user_node)
+                repeated_node = lazy(node, model, None, user_node)
                 push(sep_node)
                 push((DONE, repeated_node))
                 yield repeated_node, item
         else:
             fixed, CB, last_item = (), CB_NODE, item
             for idx, item in enumerate(itemlist):
-                repeated_node = deep(node, model, None, user_node)
+                repeated_node = lazy(node, model, None, user_node)
                 repeated_sep = deep(
                     sep, model, (idx, (last_item, item), fixed), user_node
                 )
-                repeated_sep._udict['callback'] = sepcall
-                repeated_sep._udict['complete'] = fixed
+                sepdict = repeated_sep._unshare()
+                sepdict['callback'], sepdict['complete'] = sepcall, fixed
                 last_item = item
                 push((CB, repeated_sep))
                 push((DONE, repeated_node))
@@ -413,9 +938,9 @@ def findnode(current, nodestring):
         ``a.b.c`` (this would find the ``c`` node.) The notation does not
         describe a strict node chain, though. Between to parts of a node chain
         may be gaps in the tree. The algorithm looks out for the first
-        matching node. It does no backtracking and so does not cover all
-        branches (yet?), but that works fine for realistic cases :). A
-        non-working example would be (searching for a.b.c)::
+        matching node. If the chain cannot be completed from there, it
+        backtracks and tries the other matching nodes (breadth-first). So
+        the following example works as well (searching for a.b.c)::
 
           *
           +- a
@@ -430,36 +955,22 @@ def findnode(current, nodestring):
     :Exceptions:
       - `NodeNotFoundError` : Node not found
     """
-    # pylint: disable = too-many-branches
-
     if nodestring is None:
         return current
-    names = nodestring.split('.')
+    start, names = current, nodestring.split('.')
     names.reverse()
-    while names:  # pylint: disable = too-many-nested-blocks
+    while names:
         name = names.pop()
 
         # if name occurs within current children, resolve the node and
         # continue with next name
-        idx = current._udict['namedict'].get(name)
-        if idx is None:
-            for idx, (kind, node) in enumerate(current._udict['nodes']):
-                if kind != PROC_NODE:
-                    continue
-                if node._udict['name'] == name:
-                    break
-            else:
-                idx = None
-        if idx is not None:
-            # resolve nameless pass-through
-            while idx < 0:
-                current = current._udict['nodes'][-1 - idx][1]
-                idx = current._udict['namedict'][name]
-            current = current._udict['nodes'][idx][1]
+        node = _resolve(current, name)
+        if node is not None:
+            current = node
             continue
 
         # The name was not found directly. Walk the tree now (breadth-first)
-        # and look it up. If that doesn't work: die.
+        # and look it up. If that doesn't work: backtrack.
         next_ = []
         if current._udict['nodes']:
             next_.append(current._udict['nodes'])
@@ -474,21 +985,9 @@ def findnode(current, nodestring):
                 # if name occurs within current children, resolve the node and
                 # continue with next name (we need to break out of two loops
                 # before and jump after the while/else block)
-                idx = current._udict['namedict'].get(name)
-                if idx is None:
-                    for idx, (kind, node) in \
-                            enumerate(current._udict['nodes']):
-                        if kind != PROC_NODE:
-                            continue
-                        if node._udict['name'] == name:
-                            break
-                    else:
-                        idx = None
-                if idx is not None:
-                    while idx < 0:
-                        current = current._udict['nodes'][-1 - idx][1]
-                        idx = current._udict['namedict'][name]
-                    current = current._udict['nodes'][idx][1]
+                node = _resolve(current, name)
+                if node is not None:
+                    current = node
                     break
                 if current._udict['nodes']:
                     next_.append(current._udict['nodes'])
@@ -496,17 +995,212 @@ def findnode(current, nodestring):
                 continue
             break
         else:
-            # re-add the unresolved name (prepare to die)
+            # re-add the unresolved name (prepare to backtrack)
             names.append(name)
             break
         # continue # with next name
 
     if names:
-        raise NodeNotFoundError(nodestring)
+        current = _backtrack(start, nodestring.split('.'))
+        if current is None:
+            raise NodeNotFoundError(nodestring)
     return current
 
 
-def render(startnode, model, user_node):
+def _resolve(current, name):
+    """
+    Find a node by name within the children of a node
+
+    Children of nameless child nodes are found as well.
+
+    :Parameters:
+      `current` : `nodetree.TemplateNode`
+        The parent node
+
+      `name` : ``str``
+        The name to look for
+
+    :Return: The found node or ``None``
+    :Rtype: `nodetree.TemplateNode`
+    """
+    idx = current._udict['namedict'].get(name)
+    if idx is None:
+        for kind, node in current._udict['nodes']:
+            if kind == PROC_NODE and node._udict['name'] == name:
+                return node
+        return None
+
+    # resolve nameless pass-through
+    while idx < 0:
+        current = current._udict['nodes'][-1 - idx][1]
+        idx = current._udict['namedict'][name]
+    return current._udict['nodes'][idx][1]
+
+
+def _candidates(current, name):
+    """
+    Find all nodes by name below a node
+
+    The nodes are generated in the order `findnode` would pick them, i.e.
+    a matching child first, the others breadth-first.
+
+    :Parameters:
+      `current` : `nodetree.TemplateNode`
+        The node to start with
+
+      `name` : ``str``
+        The name to look for
+
+    :Return: Iterator over the found nodes
+    :Rtype: iterable
+    """
+    seen, next_ = set(), [current]
+    while next_:
+        process, next_ = next_, []
+        for current in process:
+            nodes = [
+                node for kind, node in current._udict['nodes']
+                if kind == PROC_NODE
+            ]
+            for node in _it.chain(
+                    (_resolve(current, name),),
+                    (node for node in nodes if node._udict['name'] == name)):
+                if node is not None and id(node) not in seen:
+                    seen.add(id(node))
+                    yield node
+            next_.extend(nodes)
+
+
+def _backtrack(current, names):
+    """
+    Find a node by loose name, trying all branches
+
+    The branches are searched depth-first without recursion. Nodes, which
+    failed to resolve the remaining names once, are not tried again.
+
+    :Parameters:
+      `current` : `nodetree.TemplateNode`
+        The node to start with
+
+      `names` : ``list``
+        The remaining names of the node address
+
+    :Return: The found node or ``None``
+    :Rtype: `nodetree.TemplateNode`
+    """
+    if not names:
+        return current
+    last, failed = len(names) - 1, set()
+    stack = [(current, 0, _candidates(current, names[0]))]
+    while stack:
+        current, idx, candidates = stack[-1]
+        for node in candidates:
+            if idx == last:
+                return node
+            if (id(node), idx + 1) not in failed:
+                stack.append(
+                    (node, idx + 1, _candidates(node, names[idx + 1]))
+                )
+                break
+        else:
+            failed.add((id(current), idx))
+            stack.pop()
+    return None
+
+
+def starttag(udict):
+    """
+    Determine the encoded starttag of a node
+
+    The starttag is preencoded when the tree is finalized and kept in the
+    node until its attributes are modified.
+
+    :Parameters:
+      `udict` : ``dict``
+        Node udict
+
+    :Return: The encoded starttag
+    :Rtype: ``str``
+    """
+    result = udict.get('starttag')
+    if result is None:
+        result = udict['starttag'] = udict['encoder'].starttag(
+            udict['tagname'], udict['attr'].itervalues(), udict['closed']
+        )
+    return result
+
+
+def compile_static(udict):
+    """
+    Compile the complete markup of an unmodified template node
+
+    Template nodes are not changed after finalization. So, if the model is
+    not asked anymore (because a parent node is done), the markup of the
+    whole subtree is fixed and can be emitted as one chunk. The result is
+    computed once and kept in the template node.
+
+    :Parameters:
+      `udict` : ``dict``
+        Template node udict
+
+    :Return: The rendered subtree (``(clean, with_escapes)``)
+    :Rtype: ``tuple``
+    """
+    result = udict.get('static')
+    if result is None:
+        content, encoder = udict['content'], udict['encoder']
+        if content[0] is not None:
+            clean, escaped = [content[0]], [content[1]]
+            if escaped[0] is None:
+                escaped[0] = encoder.escape(content[0])
+        else:
+            clean, escaped = [], []
+            for kind, node in udict['nodes']:
+                if kind != TEXT_NODE:
+                    node = compile_static(node._udict)
+                clean.append(node[0])
+                escaped.append(node[1])
+
+        if not udict['noelement']:
+            stag = starttag(udict)
+            clean.insert(0, stag)
+            escaped.insert(0, stag)
+            clean.append(udict['endtag'])
+            escaped.append(udict['endtag'])
+
+        clean, escaped = ''.join(clean), ''.join(escaped)
+        if clean == escaped:
+            escaped = clean
+        result = udict['static'] = (clean, escaped)
+
+    return result
+
+
+def freeze(udict):
+    """
+    Precompile the static markup of all template nodes below a node
+
+    Afterwards rendering does not modify the tree anymore (see
+    `compile_static`).
+
+    :Parameters:
+      `udict` : ``dict``
+        Startnode's dict
+    """
+    stack = [udict]
+    while stack:
+        udict = stack.pop()
+        for kind, node in udict['nodes']:
+            if kind == TEXT_NODE:
+                continue
+            compile_static(node._udict)
+            stack.append(node._udict)
+            if node._udict['sep'] is not None:
+                stack.append(node._udict['sep']._udict)
+
+
+def render(startnode, model, user_node, cache=None, owner=None,
+           events=False):
     """
     Render beginning with startnode
 
@@ -520,123 +1214,247 @@ def render(startnode, model, user_node):
       `user_node` : ``type``
         User node type
 
+      `cache` : `tdi.render_cache.RenderCache`
+        Fragment cache. If ``None``, no fragments are cached.
+
+      `owner` : any
+        Owner of the cached fragments (usually the rendered tree)
+
+      `events` : ``bool``
+        Emit build events instead of chunks? (see
+        `nodetree.Root.render_events`)
+
     :Return: Iterable over rendered chunks
     :Rtype: iterable
     """
-    # pylint: disable = too-many-locals, too-many-branches, too-many-statements
-
     udict, escaped = startnode._udict, bool(model.emit_escaped)
     if udict.get('is_root') and udict['content'][0] is not None:
-        yield udict['content'][escaped]
+        return iter((udict['content'][escaped or events],))
+
+    if udict.get('is_root'):
+        TEXT = TEXT_NODE
+        rootnodes = [
+            (kind, kind != TEXT and user_node(node, model) or node)
+            for kind, node in udict['nodes']
+        ]
     else:
-        _iter, exhausted = iter, StopIteration
-        CB, DONE, TEXT = CB_NODE, DONE_NODE, TEXT_NODE,
-        repeat, modelmethod = _repeat, model.modelmethod
-        if udict.get('is_root'):
-            rootnodes = [
-                (kind, kind != TEXT and user_node(node, model) or node)
-                for kind, node in udict['nodes']
-            ]
-        else:
-            rootnodes = [(PROC_NODE, user_node(startnode, model))]
-        #        done, nodes, endtag
-        stack = [(False, _iter(rootnodes).next, None)]
-        push, pop = stack.append, stack.pop
-
-        depth_done = False
-        while stack:
-            try:
-                kind, tnode = stack[-1][1]()
-            except exhausted:
-                depth_done, _, endtag = pop()
-                if endtag:
-                    yield endtag
-                continue
+        rootnodes = [(PROC_NODE, user_node(startnode, model))]
+    if cache is not None:
+        cache = cache, owner
+    return _render(rootnodes, model, user_node, escaped, cache, None, events)
 
-            if kind == TEXT:
-                yield tnode[escaped]
-                continue
 
-            udict = tnode._udict
-            if udict['removed']:
+def _fragment(tnode, model, user_node, escaped, fragments):
+    """
+    Render a node using the fragment cache
+
+    The model is asked for a cache key via the ``cache_<name>`` method. If
+    a key is returned, the rendered node is taken from the cache or, if it's
+    not found there, rendered and stored.
+
+    :Parameters:
+      `tnode` : `nodetree.Node`
+        The node to render
+
+      `model` : `ModelAdapterInterface`
+        The model object
+
+      `user_node` : ``type``
+        User node type
+
+      `escaped` : ``bool``
+        Emit escaped content?
+
+      `fragments` : ``tuple``
+        Fragment cache and owner
+
+    :Return: The rendered node or ``None`` if it's not cached
+    :Rtype: ``str``
+    """
+    udict = tnode._udict
+    try:
+        method = model.modelmethod(
+            'cache', udict['name'], udict['modelscope'], udict['noauto'],
+        )
+    except ModelMissingError:
+        return None
+    if method is None:
+        return None
+    key = method(tnode)
+    if key is None:
+        return None
+
+    cache, owner = fragments
+    key = udict['modelscope'], udict['name'], escaped, key
+    result = cache.get(owner, key)
+    if result is None:
+        result = ''.join(list(_render(
+            [(PROC_NODE, tnode)], model, user_node, escaped, fragments, tnode
+        )))
+        cache.set(owner, key, result)
+    return result
+
+
+def _render(rootnodes, model, user_node, escaped, fragments, uncached,
+            events=False):
+    """
+    Render the nodes
+
+    :Parameters:
+      `rootnodes` : ``list``
+        The nodes to begin with (``[(kind, node), ...]``)
+
+      `model` : `ModelAdapterInterface`
+        The model object
+
+      `user_node` : ``type``
+        User node type
+
+      `escaped` : ``bool``
+        Emit escaped content?
+
+      `fragments` : ``tuple``
+        Fragment cache and owner (or ``None``)
+
+      `uncached` : `nodetree.Node`
+        Node not to look up in the fragment cache (or ``None``)
+
+      `events` : ``bool``
+        Emit build events instead of chunks?
+
+    :Return: Iterable over rendered chunks
+    :Rtype: iterable
+    """
+    # pylint: disable = too-many-locals, too-many-branches, too-many-statements
+
+    _iter, exhausted = iter, StopIteration
+    CB, DONE, TEXT = CB_NODE, DONE_NODE, TEXT_NODE,
+    PROC, fragment = PROC_NODE, _fragment
+    repeat, modelmethod = _repeat, model.modelmethod
+    lazynodes = _lazynodes
+    #        done, nodes, endtag
+    stack = [(False, _iter(rootnodes).next, None)]
+    push, pop = stack.append, stack.pop
+
+    depth_done = False
+    while stack:
+        try:
+            kind, tnode = stack[-1][1]()
+        except exhausted:
+            depth_done, _, endtag = pop()
+            if endtag:
+                yield endtag
+            continue
+
+        if kind == TEXT:
+            yield events and tnode or tnode[escaped]
+            continue
+
+        udict = tnode._udict
+        if udict['removed']:
+            continue
+
+        if fragments is not None and kind == PROC and not depth_done \
+                and tnode is not uncached and 'callback' not in udict:
+            chunk = fragment(tnode, model, user_node, escaped, fragments)
+            if chunk is not None:
+                yield chunk
                 continue
 
-            if kind == DONE and 'callback' not in udict:
-                done = True
-            else:
-                next_node = False
-                while 1:
-                    user_control = False
-                    if kind == CB or 'callback' in udict:
-                        callback = udict.pop('callback')
-                        if callback is None:
-                            done = False
-                        else:
-                            done = callback(tnode, *udict['complete'])
-                            user_control = True
-                    elif depth_done:
-                        done = True
+        if kind == DONE and 'callback' not in udict:
+            done = True
+        else:
+            next_node = False
+            while 1:
+                user_control = False
+                if kind == CB or 'callback' in udict:
+                    callback = udict.pop('callback')
+                    if callback is None:
+                        done = False
                     else:
-                        method = modelmethod(
-                            'render', udict['name'], udict['modelscope'],
-                            udict['noauto'],
-                        )
-                        if method is None:
-                            done = False
-                        else:
-                            done = method(tnode)
-                            user_control = True
-
-                    # might have been changed in the meantime.
-                    udict = tnode._udict
-                    if udict['removed']:
-                        next_node = True
-                        break
-
-                    elif udict['repeated'] is not None:
-                        push((depth_done, _iter(repeat(
-                            tnode, user_node, model, *udict['repeated']
-                        )).next, None))
-                        depth_done = False
-                        next_node = True  # Ignore original node.
-                        break
-
-                    elif user_control and 'callback' in udict:
-                        continue
+                        done = callback(tnode, *udict['complete'])
+                        user_control = True
+                elif depth_done:
+                    done = True
+                else:
+                    method = modelmethod(
+                        'render', udict['name'], udict['modelscope'],
+                        udict['noauto'],
+                    )
+                    if method is None:
+                        done = False
+                    else:
+                        done = method(tnode)
+                        user_control = True
+
+                # might have been changed in the meantime.
+                udict = tnode._udict
+                if udict['removed']:
+                    next_node = True
+                    break
 
+                elif udict['repeated'] is not None:
+                    push((depth_done, _iter(repeat(
+                        tnode, user_node, model, *udict['repeated']
+                    )).next, None))
+                    depth_done = False
+                    next_node = True  # Ignore original node.
                     break
 
-                if next_node:
+                elif user_control and 'callback' in udict:
                     continue
 
-            if not udict['noelement'] and not udict['masked']:
-                yield udict['encoder'].starttag(
-                    udict['tagname'], udict['attr'].itervalues(),
-                    udict['closed']
+                break
+
+            if next_node:
+                continue
+
+        if not udict['noelement'] and not udict['masked']:
+            if events:
+                yield (
+                    udict['tagname'], tuple(udict['attr'].itervalues()),
+                    udict['closed'], udict.get('starttag') or starttag(udict),
                 )
+                endtag = (udict['endtag'],)
+            else:
+                yield udict.get('starttag') or starttag(udict)
                 endtag = udict['endtag']
+        else:
+            endtag = None
+
+        content = udict['content']
+        if content[0] is not None:
+            if escaped or events:
+                cont = content[1]
+                if cont is None:
+                    cont = udict['encoder'].escape(content[0])
+                yield cont
             else:
-                endtag = None
-
-            content = udict['content']
-            if content[0] is not None:
-                if escaped:
-                    cont = content[1]
-                    if cont is None:
-                        cont = udict['encoder'].escape(content[0])
-                    yield cont
-                else:
-                    yield content[0]
-                if endtag:
-                    yield endtag
-                continue
+                yield content[0]
+            if endtag:
+                yield endtag
+            continue
 
-            ctx = tnode.ctx
+        ctx = tnode.ctx
+        if done or depth_done:
+            # Nobody's asked below this point. Untouched template
+            # nodes are emitted as precompiled static markup.
+            nodes = [(
+                subkind == TEXT and (subkind, subnode)
+                or subnode._usernode
+                and (subkind, user_node(subnode, model, ctx, True))
+                or (TEXT, compile_static(subnode._udict))
+            ) for subkind, subnode in lazynodes(
+                udict, model, ctx, user_node
+            )]
+        else:
             nodes = [(
                 subkind,
                 subkind != TEXT
                 and user_node(subnode, model, ctx, subnode._usernode)
                 or subnode
-            ) for subkind, subnode in udict['nodes']]
-            push((depth_done, _iter(nodes).next, endtag))
-            depth_done = done or depth_done
+            ) for subkind, subnode in lazynodes(
+                udict, model, ctx, user_node
+            )]
+        push((depth_done, _iter(nodes).next, endtag))
+        depth_done = done or depth_done
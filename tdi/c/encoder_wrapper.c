@@ -181,8 +181,13 @@ error:
 }
 
 
+/*
+ * Create the attribute list of a node
+ *
+ * The list contains (key, value) tuples.
+ */
 PyObject *
-tdi_encoder_starttag_wrapper(tdi_node_t *node)
+tdi_encoder_attrlist(tdi_node_t *node)
 {
     PyObject *attr, *attrlist, *tup;
     tdi_attr_t *item;
@@ -219,6 +224,18 @@ tdi_encoder_starttag_wrapper(tdi_node_t *node)
     }
     Py_DECREF(attr);
 
+    return attrlist;
+}
+
+
+PyObject *
+tdi_encoder_starttag_wrapper(tdi_node_t *node)
+{
+    PyObject *attrlist, *tup;
+
+    if (!(attrlist = tdi_encoder_attrlist(node)))
+        return NULL;
+
     tup = PyObject_CallFunction(node->encoder->starttag_method, "(OOO)",
         node->tagname,
         attrlist,
@@ -227,3 +244,20 @@ tdi_encoder_starttag_wrapper(tdi_node_t *node)
 
     return tup;
 }
+
+
+/*
+ * Determine the encoded starttag of a node
+ *
+ * The starttag is preencoded when the tree is finalized and kept in the
+ * node until its attributes are modified.
+ */
+PyObject *
+tdi_encoder_starttag(tdi_node_t *node)
+{
+    if (!node->starttag && !(node->starttag = ENCODE_STARTTAG(node)))
+        return NULL;
+
+    Py_INCREF(node->starttag);
+    return node->starttag;
+}
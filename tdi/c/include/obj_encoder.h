@@ -86,7 +86,13 @@ extern PyTypeObject TDI_EncoderWrapperType;
 tdi_encoder_t *
 tdi_encoder_wrapper_new(PyObject *encoder);
 
+PyObject *
+tdi_encoder_attrlist(tdi_node_t *node);
+
 PyObject *
 tdi_encoder_starttag_wrapper(tdi_node_t *node);
 
+PyObject *
+tdi_encoder_starttag(tdi_node_t *node);
+
 #endif
@@ -40,9 +40,11 @@ typedef enum {
  * Not all fields are always filled, but the common structure makes it
  * *very* easy to copy data between the types.
  *
- * RootType only knows about nodes, namedict, content and overlay.
- * TemplateNodeType misses callback, model and ctx.
- * NodeType misses overlay and doesn't care about the finalized flag.
+ * RootType only knows about nodes, namedict, content, overlay and
+ * startnodes.
+ * TemplateNodeType misses callback, model, ctx and protos.
+ * NodeType misses overlay and compiled and doesn't care about the finalized
+ * flag.
  */
 struct tdi_node_t {
     PyObject_HEAD
@@ -55,6 +57,7 @@ struct tdi_node_t {
     PyObject      *tagname;       /* tagname of the node */
     PyObject      *attr;          /* attribute dict of the node */
     PyObject      *endtag;        /* endtag string of the node */
+    PyObject      *starttag;      /* preencoded starttag (or NULL) */
     PyObject      *name;          /* name of the node (or NULL) */
     PyObject      *ctx;           /* node context (or NULL) */
     PyObject      *overlays;      /* Overlay mapping (for root nodes)
@@ -66,6 +69,11 @@ struct tdi_node_t {
     PyObject      *complete;      /* pre-rendered separator node content
                                    * (or NULL)
                                    */
+    PyObject      *compiled;      /* compiled static subtree (or NULL) */
+    PyObject      *protos;        /* prototype subnode list of lazily
+                                   * copied user nodes (or NULL)
+                                   */
+    PyObject      *startnodes;    /* startnode memo dict (or NULL) */
     tdi_overlay_t *overlay;       /* Overlay info (or NULL) */
     tdi_scope_t   *scope;         /* Scope info (or NULL) */
     tdi_encoder_t *encoder;       /* output encoder */
@@ -86,6 +94,7 @@ struct tdi_node_t {
 #define NODE_ROOT      (1 << 7)  /* is root node? */
 #define NODE_NOAUTO    (1 << 8)  /* Don't call render method automatically? */
 #define NODE_NEWATTR   (1 << 9)  /* Attributes are new? (need to be decoded) */
+#define NODE_SHARED    (1 << 10) /* attr and nodes shared with template node? */
 
 
 extern PyTypeObject TDI_NodeType;
@@ -27,6 +27,14 @@ extern PyTypeObject TDI_RenderIteratorType;
  * Create new render iterator object
  */
 PyObject *
-tdi_render_iterator_new(tdi_node_t *startnode, tdi_adapter_t *model);
+tdi_render_iterator_new(tdi_node_t *startnode, tdi_adapter_t *model,
+                        PyObject *fragments, PyObject *owner, int events);
+
+
+/*
+ * Create new render iterator object for a fragment
+ */
+PyObject *
+tdi_render_fragment_new(tdi_render_t *parent, tdi_node_t *node);
 
 #endif
@@ -29,7 +29,8 @@ extern PyTypeObject TDI_RepeatIteratorType;
 PyObject *
 tdi_repeat_iterator_new(tdi_node_t *node, PyObject *callback,
                         PyObject *itemlist, PyObject *fixed,
-                        PyObject *separate);
+                        PyObject *separate, Py_ssize_t batch,
+                        PyObject *mapping);
 
 
 #endif
@@ -83,7 +83,7 @@ tdi_node_copy(tdi_node_t *node, tdi_adapter_t *model, PyObject *ctx,
         goto done;
     }
 
-    self->flags = node->flags | NODE_USER;
+    self->flags = (node->flags | NODE_USER) & ~NODE_SHARED;
 
     self->model = model;
     self->kind = node->kind;
@@ -103,6 +103,9 @@ tdi_node_copy(tdi_node_t *node, tdi_adapter_t *model, PyObject *ctx,
     Py_INCREF(node->endtag);
     self->endtag = node->endtag;
 
+    Py_XINCREF(node->starttag);
+    self->starttag = node->starttag;
+
     Py_XINCREF(node->name);
     self->name = node->name;
 
@@ -130,6 +133,19 @@ tdi_node_copy(tdi_node_t *node, tdi_adapter_t *model, PyObject *ctx,
     if (PyErr_Occurred())
         goto error_overlay;
 
+    if (!(node->flags & NODE_USER) || (node->flags & NODE_SHARED)) {
+        /*
+         * Template nodes don't change anymore, so attributes and subnodes
+         * are shared until the node is modified (see tdi_node_unshare).
+         */
+        self->flags |= NODE_SHARED;
+        Py_INCREF(node->attr);
+        self->attr = node->attr;
+        Py_INCREF(node->nodes);
+        self->nodes = node->nodes;
+        goto done;
+    }
+
     if (!(self->attr = PyDict_Copy(node->attr)))
         goto error_attr;
 
@@ -159,6 +175,80 @@ error_nodes:
 }
 
 
+/*
+ * Make sure, the node's attr and nodes are not shared anymore
+ *
+ * This needs to be called before attr or nodes are modified.
+ */
+int
+tdi_node_unshare(tdi_node_t *node)
+{
+    PyObject *attr, *nodes;
+
+    if (!(node->flags & NODE_SHARED))
+        return 0;
+
+    if (!(attr = PyDict_Copy(node->attr)))
+        return -1;
+    if (!(nodes = PyList_GetSlice(node->nodes, 0,
+                                  PyList_GET_SIZE(node->nodes)))) {
+        Py_DECREF(attr);
+        return -1;
+    }
+
+    Py_DECREF(node->attr);
+    node->attr = attr;
+    Py_DECREF(node->nodes);
+    node->nodes = nodes;
+    node->flags &= ~NODE_SHARED;
+
+    return 0;
+}
+
+
+/*
+ * Copy a node, but defer the copies of its user subnodes
+ *
+ * The subnodes of the copy are the same as the subnodes of the source
+ * node. The source's subnode list is kept as prototype list in
+ * copy->protos. User subnodes still found there are copied (by
+ * tdi_node_lazycopy again) only when they are actually visited (see
+ * tdi_node_is_proto). This keeps the memory flat when repeating large
+ * trees.
+ */
+PyObject *
+tdi_node_lazycopy(tdi_node_t *node, tdi_adapter_t *model, PyObject *ctx)
+{
+    tdi_node_t *self;
+
+    if (!(self = (tdi_node_t *)tdi_node_copy(node, model, ctx, 0, NULL)))
+        return NULL;
+
+    if (!self->content && (node->flags & NODE_USER)
+        && !(self->flags & NODE_SHARED)) {
+        Py_INCREF(node->nodes);
+        self->protos = node->nodes;
+    }
+
+    return (PyObject *)self;
+}
+
+
+/*
+ * Check if subnode at position idx is an uncopied prototype node
+ */
+int
+tdi_node_is_proto(tdi_node_t *node, Py_ssize_t idx, tdi_node_t *subnode)
+{
+    return (   (node->flags & NODE_USER)
+            && node->protos
+            && idx < PyList_GET_SIZE(node->protos)
+            && PyList_GET_ITEM(node->protos, idx) == (PyObject *)subnode
+            && subnode->kind != TEXT_NODE
+            && (subnode->flags & NODE_USER));
+}
+
+
 /*
  * Deep-copy TDI_NodeType (but shallow-copy TemplateNodeType subnodes)
  */
@@ -172,6 +262,7 @@ tdi_node_deepcopy(tdi_node_t *self, tdi_adapter_t *model, PyObject *ctx,
 
     if (!(node = (tdi_node_t *)tdi_node_copy(self, model, ctx, 0, node)))
         return NULL;
+    Py_CLEAR(node->protos);
 
     if (!node->content) {
         length = PyList_GET_SIZE(node->nodes);
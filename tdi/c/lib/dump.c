@@ -0,0 +1,275 @@
+/*
+ * Copyright 2006 - 2016
+ * Andr\xe9 Malo or his licensors, as applicable
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include "cext.h"
+#include "tdi_content.h"
+#include "tdi_dump.h"
+#include "tdi_globals.h"
+#include "tdi_overlay.h"
+#include "tdi_scope.h"
+
+#include "obj_attr.h"
+#include "obj_node.h"
+
+
+/*
+ * Dump text content as (clean, with_escapes) tuple
+ */
+static PyObject *
+dump_content(tdi_content_t *content)
+{
+    return Py_BuildValue("(OO)", content->clean, content->with_escapes);
+}
+
+
+/*
+ * Dump attributes as ((key, value), ...) tuple (in dict order)
+ */
+static PyObject *
+dump_attr(tdi_node_t *node)
+{
+    PyObject *result, *key, *value, *item;
+    Py_ssize_t pos = 0, j = 0;
+
+    if (!node->attr)
+        return PyTuple_New(0);
+
+    if (!(result = PyTuple_New(PyDict_Size(node->attr))))
+        return NULL;
+    while (PyDict_Next(node->attr, &pos, &key, &value)) {
+        if (!(item = Py_BuildValue("(OO)", ((tdi_attr_t *)value)->key,
+                                           ((tdi_attr_t *)value)->value))) {
+            Py_DECREF(result);
+            return NULL;
+        }
+        PyTuple_SET_ITEM(result, j++, item);
+    }
+
+    return result;
+}
+
+
+/*
+ * Dump overlay info as (flags, name) tuple or None
+ */
+static PyObject *
+dump_overlay(tdi_overlay_t *overlay)
+{
+    char flags[3], *target = flags;
+
+    if (!overlay || !overlay->name)
+        Py_RETURN_NONE;
+
+    if (overlay->is_hidden)
+        *target++ = '-';
+    if (overlay->is_target)
+        *target++ = '>';
+    if (overlay->is_source)
+        *target++ = '<';
+
+    return Py_BuildValue("(s#O)", flags, (int)(target - flags),
+                         overlay->name);
+}
+
+
+/*
+ * Dump scope info as (flags, name) tuple or None
+ */
+static PyObject *
+dump_scope(tdi_scope_t *scope)
+{
+    char flags[2], *target = flags;
+
+    if (!scope)
+        Py_RETURN_NONE;
+
+    if (scope->is_hidden)
+        *target++ = '-';
+    if (scope->is_absolute)
+        *target++ = '=';
+
+    return Py_BuildValue("(s#O)", flags, (int)(target - flags),
+                         scope->name ? scope->name : tdi_g_empty);
+}
+
+
+static PyObject *
+dump_nodes(tdi_node_t *node);
+
+/*
+ * Dump a single node
+ */
+static PyObject *
+dump_node(tdi_node_t *node, int sep)
+{
+    PyObject *result, *attr, *overlay, *scope, *items;
+    char flags[3], *target = flags;
+
+    if (sep)
+        *target++ = ':';
+    if (node->flags & NODE_NOELEMENT)
+        *target++ = '-';
+    if (node->flags & NODE_NOAUTO)
+        *target++ = '*';
+
+    if (!(attr = dump_attr(node)))
+        goto error;
+    if (!(overlay = dump_overlay(node->overlay)))
+        goto error_attr;
+    if (!(scope = dump_scope(node->scope)))
+        goto error_overlay;
+    if (!(items = dump_nodes(node)))
+        goto error_scope;
+
+    result = Py_BuildValue("(OOOOs#OOOO)",
+        node->tagname,
+        attr,
+        (node->flags & NODE_CLOSED) ? Py_True : Py_False,
+        node->endtag ? node->endtag : tdi_g_empty,
+        flags, (int)(target - flags),
+        node->name ? node->name : Py_None,
+        overlay,
+        scope,
+        items
+    );
+    Py_DECREF(items);
+    Py_DECREF(scope);
+    Py_DECREF(overlay);
+    Py_DECREF(attr);
+    return result;
+
+error_scope:
+    Py_DECREF(scope);
+error_overlay:
+    Py_DECREF(overlay);
+error_attr:
+    Py_DECREF(attr);
+error:
+    return NULL;
+}
+
+
+/*
+ * Dump the subnodes of a node (or its text content)
+ */
+static PyObject *
+dump_nodes(tdi_node_t *node)
+{
+    PyObject *result, *item;
+    tdi_node_t *subnode;
+    Py_ssize_t j, length;
+    int res;
+
+    if (!(result = PyList_New(0)))
+        return NULL;
+
+    if (node->content) {
+        if (PyString_GET_SIZE(node->content->clean) == 0
+            && PyString_GET_SIZE(node->content->with_escapes) == 0)
+            return result;
+        if (!(item = dump_content(node->content)))
+            goto error;
+        res = PyList_Append(result, item);
+        Py_DECREF(item);
+        if (res == -1)
+            goto error;
+        return result;
+    }
+
+    if (Py_EnterRecursiveCall(" while dumping the tree"))
+        goto error;
+
+    length = PyList_GET_SIZE(node->nodes);
+    for (j = 0; j < length; ++j) {
+        subnode = (tdi_node_t *)PyList_GET_ITEM(node->nodes, j);
+        if (subnode->kind == TEXT_NODE)
+            item = dump_content(subnode->content);
+        else
+            item = dump_node(subnode, 0);
+        if (!item)
+            goto error_recursion;
+        res = PyList_Append(result, item);
+        Py_DECREF(item);
+        if (res == -1)
+            goto error_recursion;
+
+        if (subnode->kind != TEXT_NODE && subnode->sep) {
+            if (!(item = dump_node((tdi_node_t *)subnode->sep, 1)))
+                goto error_recursion;
+            res = PyList_Append(result, item);
+            Py_DECREF(item);
+            if (res == -1)
+                goto error_recursion;
+        }
+    }
+
+    Py_LeaveRecursiveCall();
+    return result;
+
+error_recursion:
+    Py_LeaveRecursiveCall();
+error:
+    Py_DECREF(result);
+    return NULL;
+}
+
+
+/*
+ * Create a marshallable representation of a finalized (sub)tree
+ */
+PyObject *
+tdi_dump_do(tdi_node_t *node)
+{
+    return dump_nodes(node);
+}
+
+
+/*
+ * Create a marshallable representation of a single finalized node (and
+ * its separator node)
+ */
+PyObject *
+tdi_dump_node(tdi_node_t *node)
+{
+    PyObject *result, *item;
+    int res;
+
+    if (!(result = PyList_New(0)))
+        return NULL;
+
+    if (!(item = dump_node(node, 0)))
+        goto error;
+    res = PyList_Append(result, item);
+    Py_DECREF(item);
+    if (res == -1)
+        goto error;
+
+    if (node->sep) {
+        if (!(item = dump_node((tdi_node_t *)node->sep, 1)))
+            goto error;
+        res = PyList_Append(result, item);
+        Py_DECREF(item);
+        if (res == -1)
+            goto error;
+    }
+
+    return result;
+
+error:
+    Py_DECREF(result);
+    return NULL;
+}
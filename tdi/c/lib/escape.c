@@ -0,0 +1,269 @@
+/*
+ * Copyright 2006 - 2016
+ * Andr\xe9 Malo or his licensors, as applicable
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include "cext.h"
+
+#include "tdi_escape.h"
+
+
+/*
+ * Encodings, which are known to map ASCII to itself ({name: bool})
+ */
+static PyObject *ascii_compatible;
+
+
+/*
+ * Fill the escape table
+ */
+static void
+escape_init(tdi_escape_t *escape)
+{
+    const char *chars;
+    Py_ssize_t j;
+
+    for (chars = escape->chars, j = 0; *chars; ++chars, ++j) {
+        escape->table[(unsigned char)*chars] = escape->repl[j];
+        escape->length[(unsigned char)*chars] = strlen(escape->repl[j]);
+    }
+    escape->ready = 1;
+}
+
+
+/*
+ * Check if the encoding maps ASCII to itself
+ *
+ * The result is computed once per encoding. Unknown encodings are reported
+ * as incompatible (the actual encoding step raises the error then).
+ *
+ * Returns 1 if so, 0 if not, -1 on error.
+ */
+static int
+is_ascii_compatible(PyObject *encoding)
+{
+    PyObject *result, *ascii, *encoded;
+    const char *cencoding;
+    char cascii[128];
+    int j;
+
+    if (!ascii_compatible && !(ascii_compatible = PyDict_New()))
+        return -1;
+    if ((result = PyDict_GetItem(ascii_compatible, encoding)))
+        return result == Py_True;
+
+    if (!(cencoding = PyString_AsString(encoding)))
+        return -1;
+    for (j = 0; j < 128; ++j)
+        cascii[j] = (char)j;
+    if (!(ascii = PyUnicode_DecodeASCII(cascii, 128, "strict")))
+        return -1;
+    encoded = PyUnicode_AsEncodedString(ascii, cencoding, "strict");
+    Py_DECREF(ascii);
+    if (!encoded) {
+        PyErr_Clear();
+        result = Py_False;
+    }
+    else {
+        result = (   PyString_Check(encoded)
+                  && PyString_GET_SIZE(encoded) == 128
+                  && !memcmp(PyString_AS_STRING(encoded), cascii, 128))
+            ? Py_True : Py_False;
+        Py_DECREF(encoded);
+    }
+    if (PyDict_SetItem(ascii_compatible, encoding, result) == -1)
+        return -1;
+
+    return result == Py_True;
+}
+
+
+/*
+ * Escape a str
+ */
+PyObject *
+tdi_escape_str(PyObject *value, tdi_escape_t *escape, int quote)
+{
+    PyObject *result;
+    const char *cvalue, *end;
+    char *cresult;
+    Py_ssize_t size, specials = 0;
+    unsigned char c;
+
+    if (!escape->ready)
+        escape_init(escape);
+
+    /* 1st pass: count result bytes */
+    size = PyString_GET_SIZE(value);
+    cvalue = PyString_AS_STRING(value);
+    end = cvalue + size;
+    while (cvalue < end) {
+        if ((c = (unsigned char)*cvalue++) < 128 && escape->table[c]) {
+            size += escape->length[c] - 1;
+            ++specials;
+        }
+    }
+    if (!quote && !specials) {
+        Py_INCREF(value);
+        return value;
+    }
+
+    /* 2nd pass: assemble result */
+    if (!(result = PyString_FromStringAndSize(NULL, size + (quote ? 2 : 0))))
+        return NULL;
+    cresult = PyString_AS_STRING(result);
+    if (quote)
+        *cresult++ = '"';
+
+    cvalue = PyString_AS_STRING(value);
+    if (!specials) {
+        (void)memcpy(cresult, cvalue, (size_t)size);
+        cresult += size;
+    }
+    else {
+        while (cvalue < end) {
+            if ((c = (unsigned char)*cvalue++) < 128 && escape->table[c]) {
+                (void)memcpy(cresult, escape->table[c],
+                             (size_t)escape->length[c]);
+                cresult += escape->length[c];
+            }
+            else
+                *cresult++ = (char)c;
+        }
+    }
+    if (quote)
+        *cresult = '"';
+
+    return result;
+}
+
+
+/*
+ * Escape a unicode and encode it to the target charset
+ *
+ * Pure ASCII input is written into the result directly, if the target
+ * charset maps ASCII to itself. Otherwise the escaped unicode is passed to
+ * the codec (only once).
+ */
+PyObject *
+tdi_escape_unicode(PyObject *value, PyObject *encoding, tdi_escape_t *escape,
+                   const char *errors, int quote)
+{
+    PyObject *result, *tmp;
+    const Py_UNICODE *uvalue, *end;
+    Py_UNICODE *uresult;
+    const char *cencoding, *repl;
+    char *cresult;
+    Py_ssize_t size, specials = 0;
+    Py_UNICODE c;
+    int high = 0, compatible, inner;
+
+    if (!escape->ready)
+        escape_init(escape);
+
+    /* 1st pass: count result characters */
+    size = PyUnicode_GET_SIZE(value);
+    uvalue = PyUnicode_AS_UNICODE(value);
+    end = uvalue + size;
+    while (uvalue < end) {
+        if ((c = *uvalue++) >= 128)
+            high = 1;
+        else if (escape->table[c]) {
+            size += escape->length[c] - 1;
+            ++specials;
+        }
+    }
+    if ((compatible = is_ascii_compatible(encoding)) == -1)
+        return NULL;
+
+    if (!high && compatible) {
+        /* 2nd pass: write ASCII directly */
+        result = PyString_FromStringAndSize(NULL, size + (quote ? 2 : 0));
+        if (!result)
+            return NULL;
+        cresult = PyString_AS_STRING(result);
+        if (quote)
+            *cresult++ = '"';
+        uvalue = PyUnicode_AS_UNICODE(value);
+        while (uvalue < end) {
+            if ((repl = escape->table[c = *uvalue++])) {
+                (void)memcpy(cresult, repl, (size_t)escape->length[c]);
+                cresult += escape->length[c];
+            }
+            else
+                *cresult++ = (char)c;
+        }
+        if (quote)
+            *cresult = '"';
+        return result;
+    }
+
+    if (!(cencoding = PyString_AsString(encoding)))
+        return NULL;
+
+    /*
+     * The quotes are plain ASCII bytes. They can be encoded together with
+     * the value only if the charset maps ASCII to itself.
+     */
+    inner = quote && compatible;
+    if (!inner && !specials) {
+        if (!(result = PyUnicode_AsEncodedString(value, cencoding, errors)))
+            return NULL;
+    }
+    else {
+        /* 2nd pass: escape into a new unicode and encode that */
+        if (!(tmp = PyUnicode_FromUnicode(NULL, size + (inner ? 2 : 0))))
+            return NULL;
+        uresult = PyUnicode_AS_UNICODE(tmp);
+        if (inner)
+            *uresult++ = '"';
+        uvalue = PyUnicode_AS_UNICODE(value);
+        while (uvalue < end) {
+            if ((c = *uvalue++) < 128 && (repl = escape->table[c])) {
+                while (*repl)
+                    *uresult++ = (unsigned char)*repl++;
+            }
+            else
+                *uresult++ = c;
+        }
+        if (inner)
+            *uresult = '"';
+
+        result = PyUnicode_AsEncodedString(tmp, cencoding, errors);
+        Py_DECREF(tmp);
+        if (!result)
+            return NULL;
+    }
+    if (!quote || inner)
+        return result;
+
+    if (!PyString_Check(result)) {
+        PyErr_SetString(PyExc_TypeError, "Encoder did not return a str");
+        Py_DECREF(result);
+        return NULL;
+    }
+    size = PyString_GET_SIZE(result);
+    if (!(tmp = PyString_FromStringAndSize(NULL, size + 2))) {
+        Py_DECREF(result);
+        return NULL;
+    }
+    cresult = PyString_AS_STRING(tmp);
+    *cresult++ = '"';
+    (void)memcpy(cresult, PyString_AS_STRING(result), (size_t)size);
+    cresult[size] = '"';
+    Py_DECREF(result);
+
+    return tmp;
+}
@@ -327,10 +327,15 @@ finalize_do__finish_level(tdi_finalize_stack_t **stack,
     node->decoder = decoder;
     Py_CLEAR(node->modelscope);
     node->modelscope = modelscope;
+    Py_CLEAR(node->compiled);
     Py_CLEAR(node->nodes);
     if (node->flags & NODE_NEWATTR) {
         norm_attributes(node);
     }
+    Py_CLEAR(node->starttag);
+    if (!(node->flags & (NODE_NOELEMENT | NODE_ROOT))
+        && !(node->starttag = ENCODE_STARTTAG(node)))
+        goto error;
 
     /* Fast exit: Optimize for text-only content */
     if (PyList_GET_SIZE(nodes) == 0) {
@@ -763,7 +768,7 @@ finalize_do__separators(PyObject *separated)
             else {
                 PyObject *clean, *with_escapes;
 
-                if (!(clean = ENCODE_STARTTAG(sepnode)))
+                if (!(clean = tdi_encoder_starttag(sepnode)))
                     goto error;
                 PyString_Concat(&clean, sepnode->content->clean);
                 if (!clean)
@@ -772,7 +777,7 @@ finalize_do__separators(PyObject *separated)
                 if (!clean)
                     goto error;
 
-                if (!(with_escapes = ENCODE_STARTTAG(sepnode))) {
+                if (!(with_escapes = tdi_encoder_starttag(sepnode))) {
                     Py_DECREF(clean);
                     goto error;
                 }
@@ -897,6 +902,7 @@ tdi_finalize_tree(tdi_node_t *root, tdi_encoder_t *encoder,
         return -1;
     }
 
+    Py_CLEAR(root->startnodes);
     Py_CLEAR(root->overlays);
     if (!(root->overlays = finalize_do(root, encoder, decoder)))
         return -1;
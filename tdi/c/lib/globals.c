@@ -25,10 +25,13 @@
  */
 PyObject *tdi_g_rendermethod;     /* prefix of the render model method */
 PyObject *tdi_g_separatemethod;   /* prefix of the separate model method */
+PyObject *tdi_g_cachemethod;      /* prefix of the cache model method */
 PyObject *tdi_g_empty;            /* empty string */
 PyObject *tdi_g_newline;          /* newline */
 PyObject *tdi_g_empty_tuple;      /* empty tuple */
 PyObject *tdi_g_empty_dict;       /* empty dict */
+PyObject *tdi_g_method_cache;     /* method resolution cache */
+PyObject *tdi_g_method_cache_data; /* storage of the cache */
 
 /*
  * Exceptions and Warnings (imported and refcounted at module init time)
@@ -60,6 +63,7 @@ tdi_globals_init(void)
 {
     INIT_PYSTRING(tdi_g_rendermethod, "render");
     INIT_PYSTRING(tdi_g_separatemethod, "separate");
+    INIT_PYSTRING(tdi_g_cachemethod, "cache");
     INIT_PYSTRING(tdi_g_empty, "");
     INIT_PYSTRING(tdi_g_newline, "\n");
 
@@ -67,6 +71,28 @@ tdi_globals_init(void)
         return -1;
     if (!tdi_g_empty_dict && !(tdi_g_empty_dict = PyDict_New()))
         return -1;
+    if (!tdi_g_method_cache) {
+        PyObject *weakref;
+
+        if (!(weakref = PyImport_ImportModule("weakref")))
+            return -1;
+        tdi_g_method_cache = PyObject_CallMethod(weakref,
+                                                 "WeakKeyDictionary", "");
+        Py_DECREF(weakref);
+        if (!tdi_g_method_cache)
+            return -1;
+    }
+    if (!tdi_g_method_cache_data) {
+        if (!(tdi_g_method_cache_data = PyObject_GetAttrString(
+                tdi_g_method_cache, "data")))
+            return -1;
+        if (!PyDict_CheckExact(tdi_g_method_cache_data)) {
+            PyErr_SetString(PyExc_TypeError,
+                            "Unexpected WeakKeyDictionary storage");
+            Py_CLEAR(tdi_g_method_cache_data);
+            return -1;
+        }
+    }
 
     return 0;
 }
@@ -29,6 +29,27 @@ tdi_node_copy(tdi_node_t *node, tdi_adapter_t *model, PyObject *ctx,
               int light, tdi_node_t *target);
 
 
+/*
+ * Make sure, the node's attr and nodes are not shared anymore
+ */
+int
+tdi_node_unshare(tdi_node_t *node);
+
+
+/*
+ * Copy a node, but defer the copies of its user subnodes
+ */
+PyObject *
+tdi_node_lazycopy(tdi_node_t *node, tdi_adapter_t *model, PyObject *ctx);
+
+
+/*
+ * Check if subnode at position idx is an uncopied prototype node
+ */
+int
+tdi_node_is_proto(tdi_node_t *node, Py_ssize_t idx, tdi_node_t *subnode);
+
+
 /*
  * Deep-copy TDI_NodeType (but shallow-copy TemplateNodeType subnodes)
  */
@@ -0,0 +1,62 @@
+/*
+ * Copyright 2006 - 2016
+ * Andr\xe9 Malo or his licensors, as applicable
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#ifndef TDI_ESCAPE_H
+#define TDI_ESCAPE_H
+
+#include "cext.h"
+
+
+/*
+ * Escape table
+ *
+ * Initialize chars (the special ASCII characters) and repl (their
+ * replacements in the same order) statically. The rest is filled on first
+ * use.
+ */
+typedef struct {
+    const char *chars;
+    const char * const *repl;
+
+    int ready;
+    const char *table[128];     /* char -> replacement (or NULL) */
+    Py_ssize_t length[128];     /* char -> replacement length */
+} tdi_escape_t;
+
+
+/*
+ * Escape a str
+ *
+ * Characters >= 128 are copied unchanged. If quote is true, the result is
+ * surrounded by double quotes. Without quotes a str without special
+ * characters is returned as-is.
+ */
+PyObject *
+tdi_escape_str(PyObject *value, tdi_escape_t *escape, int quote);
+
+
+/*
+ * Escape a unicode and encode it to the target charset
+ *
+ * If quote is true, the result is surrounded by double quotes.
+ */
+PyObject *
+tdi_escape_unicode(PyObject *value, PyObject *encoding, tdi_escape_t *escape,
+                   const char *errors, int quote);
+
+
+#endif
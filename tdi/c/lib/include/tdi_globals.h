@@ -22,10 +22,13 @@
 
 extern PyObject *tdi_g_rendermethod;   /* prefix of the render method */
 extern PyObject *tdi_g_separatemethod; /* prefix of the separate method */
+extern PyObject *tdi_g_cachemethod;    /* prefix of the cache method */
 extern PyObject *tdi_g_empty;          /* empty string */
 extern PyObject *tdi_g_newline;        /* newline */
 extern PyObject *tdi_g_empty_tuple;    /* empty tuple */
 extern PyObject *tdi_g_empty_dict;     /* empty dict */
+extern PyObject *tdi_g_method_cache;   /* method resolution cache */
+extern PyObject *tdi_g_method_cache_data; /* storage of the cache */
 
 /*
  * Init TDI globals
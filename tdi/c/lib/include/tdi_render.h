@@ -77,9 +77,13 @@ struct tdi_render_t {
     PyObject *model;
     PyObject *endtag;
     PyObject *content;
+    PyObject *fragments;       /* fragment cache (or NULL) */
+    PyObject *owner;           /* owner of the cached fragments */
+    PyObject *uncached;        /* node not to look up in the cache */
     tdi_render_stack_t *stack;
     int done;
     int emit_escaped;
+    int events;                /* emit build events instead of chunks? */
     tdi_render_stage_t stage;
 };
 
@@ -105,4 +109,18 @@ tdi_render_iterate(tdi_node_t *self, PyObject *iteritems, PyObject *separate);
 PyObject *
 tdi_render_next(tdi_render_t *self);
 
+/*
+ * Precompile the static markup of all template nodes below a node
+ */
+int
+tdi_render_freeze(tdi_node_t *node);
+
+/*
+ * Compile the complete markup of an unmodified template node
+ *
+ * Returns a text node.
+ */
+PyObject *
+tdi_render_compile_static(tdi_node_t *node);
+
 #endif
@@ -21,6 +21,11 @@
 #include "cext.h"
 #include "tdi.h"
 
+/*
+ * Default batch size of Node.repeat_batch
+ */
+#define TDI_REPEAT_BATCH (512)
+
 
 /*
  * tdi_repeat_t state (a.k.a. jump target)
@@ -47,8 +52,17 @@ typedef struct {
     PyObject *sepmodel;
     PyObject *item;
     PyObject *last_item;
+    PyObject *pending;   /* prepared (node, item) pairs of the current batch
+                          * (or NULL) */
+    PyObject *mapping;   /* content mapping (or NULL) */
+    PyObject *rowparts;  /* compiled row chunks (slots are None) */
+    PyObject *erowparts; /* compiled escaped row chunks (or NULL) */
+    PyObject *rowslots;  /* row slots ((position, field or callable), ...) */
     tdi_repeat_stage_t stage;
     Py_ssize_t idx;
+    Py_ssize_t batch;    /* batch size (0 == callback per node) */
+    Py_ssize_t pos;      /* position within pending */
+    int escaped;         /* emit escaped rows? */
 } tdi_repeat_t;
 
 
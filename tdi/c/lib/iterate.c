@@ -135,9 +135,9 @@ make_iterated_node(tdi_iterate_t *self)
     PyObject *result;
     tdi_node_t *newnode;
 
-    /* create repeated node */
-    newnode = (tdi_node_t *)tdi_node_deepcopy(self->node, self->node->model,
-                                              NULL, NULL);
+    /* create repeated node (subnodes are copied when visited) */
+    newnode = (tdi_node_t *)tdi_node_lazycopy(self->node, self->node->model,
+                                              NULL);
     if (!newnode)
         return NULL;
     newnode->kind = DONE_NODE;
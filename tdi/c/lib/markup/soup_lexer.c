@@ -88,9 +88,12 @@ struct tdi_soup_lexer {
     void *normalize_ctx;
     PyObject *cdata_name;
 
-    /* Current unevaluated buffer */
+    /* Current buffer */
     PyObject *buffer;
 
+    /* Start of the unevaluated part of the buffer */
+    Py_ssize_t offset;
+
     /* Current lexer state */
     lexer_state state;
 
@@ -106,8 +109,37 @@ struct tdi_soup_lexer {
     int flags;
 };
 
+/* Unevaluated part of the buffer */
+#define BUF_START(self) (PyString_AS_STRING((self)->buffer) + (self)->offset)
+#define BUF_SIZE(self) (PyString_GET_SIZE((self)->buffer) - (self)->offset)
+
 /* --------------------------- END DECLARATIONS -------------------------- */
 
+/*
+ * Consume the rest of the buffer
+ *
+ * Returns a new reference to the unevaluated data.
+ */
+static PyObject *
+rest(tdi_soup_lexer *self)
+{
+    PyObject *data;
+
+    if (self->offset) {
+        data = PyString_FromStringAndSize(BUF_START(self), BUF_SIZE(self));
+        if (!data)
+            return NULL;
+    }
+    else {
+        data = self->buffer;
+        Py_INCREF(data);
+    }
+    self->offset = PyString_GET_SIZE(self->buffer);
+
+    return data;
+}
+
+
 /*
  * Text lexer
  *
@@ -117,10 +149,10 @@ struct tdi_soup_lexer {
 static int
 lex_TEXT(tdi_soup_lexer *self)
 {
-    const char *buf = PyString_AS_STRING(self->buffer);
-    const char *sentinel = buf + PyString_GET_SIZE(self->buffer);
+    const char *buf = BUF_START(self);
+    const char *sentinel = buf + BUF_SIZE(self);
     const char *start = buf;
-    PyObject *data, *tmp;
+    PyObject *data;
     tdi_lexer_event event;
     Py_ssize_t pos;
     int res;
@@ -137,22 +169,16 @@ lex_TEXT(tdi_soup_lexer *self)
         /* Buffer split */
         if (!(data = PyString_FromStringAndSize(start, pos)))
             goto error;
-        tmp = PyString_FromStringAndSize(buf, (Py_ssize_t)(sentinel - buf));
-        if (!tmp)
-            goto error_data;
 
-        Py_CLEAR(self->buffer);
-        self->buffer = tmp;
+        self->offset += pos;
         event.info.text.data = data;
         self->state = STATE_MARKUP;
         goto handle;
     }
 
     /* The whole buffer is text */
-    event.info.text.data = self->buffer;
-    if (!(tmp = PyString_FromString("")))
+    if (!(event.info.text.data = rest(self)))
         goto error;
-    self->buffer = tmp;
 
 handle:
     event.type = TDI_LEXER_EVENT_TEXT;
@@ -160,8 +186,6 @@ handle:
     Py_DECREF(event.info.text.data);
     return res;
 
-error_data:
-    Py_DECREF(data);
 error:
     self->last_error = TDI_LEXER_ERR_ENV;
     return -1;
@@ -176,9 +200,9 @@ error:
 static int
 lex_CDATA(tdi_soup_lexer *self)
 {
-    const char *buf, *start = PyString_AS_STRING(self->buffer);
-    const char *sentinel = start + PyString_GET_SIZE(self->buffer);
-    PyObject *data, *tmp;
+    const char *buf, *start = BUF_START(self);
+    const char *sentinel = start + BUF_SIZE(self);
+    PyObject *data;
     tdi_lexer_event event;
     Py_ssize_t pos;
     int res, incomplete = 0;
@@ -191,13 +215,8 @@ lex_CDATA(tdi_soup_lexer *self)
                 /* Pass seen text to the listener and wait for more input */
                 if (!(data = PyString_FromStringAndSize(start, pos)))
                     goto error;
-                tmp = PyString_FromStringAndSize(buf,
-                                                (Py_ssize_t)(sentinel - buf));
-                if (!tmp)
-                    goto error_data;
 
-                Py_CLEAR(self->buffer);
-                self->buffer = tmp;
+                self->offset += pos;
                 event.info.text.data = data;
                 incomplete = 1;
                 goto handle;
@@ -216,12 +235,8 @@ lex_CDATA(tdi_soup_lexer *self)
         /* Buffer split */
         if (!(data = PyString_FromStringAndSize(start, pos)))
             goto error;
-        tmp = PyString_FromStringAndSize(buf, (Py_ssize_t)(sentinel - buf));
-        if (!tmp)
-            goto error_data;
 
-        Py_CLEAR(self->buffer);
-        self->buffer = tmp;
+        self->offset += pos;
         event.info.text.data = data;
         self->seen = 2;
         self->state = STATE_ENDTAG;
@@ -229,10 +244,8 @@ lex_CDATA(tdi_soup_lexer *self)
     }
 
     /* The whole buffer is text */
-    event.info.text.data = self->buffer;
-    if (!(tmp = PyString_FromString("")))
+    if (!(event.info.text.data = rest(self)))
         goto error;
-    self->buffer = tmp;
 
 handle:
     event.type = TDI_LEXER_EVENT_TEXT;
@@ -240,8 +253,6 @@ handle:
     Py_DECREF(event.info.text.data);
     return res;
 
-error_data:
-    Py_DECREF(data);
 error:
     self->last_error = TDI_LEXER_ERR_ENV;
     return -1;
@@ -257,19 +268,18 @@ error:
 static int
 lex_MARKUP(tdi_soup_lexer *self)
 {
-    PyObject *data, *tmp;
+    PyObject *data;
     const char *buf;
     tdi_lexer_event event;
-    Py_ssize_t length;
     unsigned char c;
     int res;
 
-    if ((length = PyString_GET_SIZE(self->buffer)) < 2)
+    if (BUF_SIZE(self) < 2)
         return 1;
 
 #define u(c) (unsigned char)(c)
 
-    switch (c = (buf = PyString_AS_STRING(self->buffer))[1]) {
+    switch (c = (buf = BUF_START(self))[1]) {
     case u('/'): self->seen = 2; self->state = STATE_ENDTAG; return 0;
     case u('!'):
         self->substate = DECL_INIT; self->state = STATE_DECL; return 0;
@@ -290,11 +300,8 @@ lex_MARKUP(tdi_soup_lexer *self)
     /* Didn't recognize. Treat '<' as text */
     if (!(data = PyString_FromStringAndSize(buf, 1)))
         goto error;
-    if (!(tmp = PyString_FromStringAndSize(buf + 1, length - 1)))
-        goto error_data;
 
-    Py_CLEAR(self->buffer);
-    self->buffer = tmp;
+    ++self->offset;
     self->state = STATE_TEXT;
 
     event.info.text.data = data;
@@ -303,8 +310,6 @@ lex_MARKUP(tdi_soup_lexer *self)
     Py_DECREF(event.info.text.data);
     return res;
 
-error_data:
-    Py_DECREF(data);
 error:
     self->last_error = TDI_LEXER_ERR_ENV;
     return -1;
@@ -319,9 +324,9 @@ error:
 static int
 lex_PI(tdi_soup_lexer *self)
 {
-    const char *buf, *start = PyString_AS_STRING(self->buffer);
-    const char *sentinel = start + PyString_GET_SIZE(self->buffer);
-    PyObject *data, *tmp;
+    const char *buf, *start = BUF_START(self);
+    const char *sentinel = start + BUF_SIZE(self);
+    PyObject *data;
     tdi_lexer_event event;
     int res;
 
@@ -346,12 +351,8 @@ handle:
     data = PyString_FromStringAndSize(start, (Py_ssize_t)(buf - start));
     if (!data)
         goto error;
-    tmp = PyString_FromStringAndSize(buf, (Py_ssize_t)(sentinel - buf));
-    if (!tmp)
-        goto error_data;
 
-    Py_CLEAR(self->buffer);
-    self->buffer = tmp;
+    self->offset += (Py_ssize_t)(buf - start);
     self->state = STATE_TEXT;
 
     event.info.pi.data = data;
@@ -360,8 +361,6 @@ handle:
     Py_DECREF(event.info.pi.data);
     return res;
 
-error_data:
-    Py_DECREF(data);
 error:
     self->last_error = TDI_LEXER_ERR_ENV;
     return -1;
@@ -376,26 +375,18 @@ error:
 static int
 lex_EMPTY(tdi_soup_lexer *self)
 {
-    const char *buf;
-    PyObject *data, *tmp, *name, *attr;
+    PyObject *data, *name, *attr;
     tdi_lexer_event event;
-    Py_ssize_t length;
     int res;
 
-    buf = PyString_AS_STRING(self->buffer);
-    length = PyString_GET_SIZE(self->buffer);
-
-    if (!(data = PyString_FromStringAndSize(buf, 2)))
+    if (!(data = PyString_FromStringAndSize(BUF_START(self), 2)))
         goto error;
     if (!(name = PyString_FromString("")))
         goto error_data;
     if (!(attr = PyList_New(0)))
         goto error_name;
-    if (!(tmp = PyString_FromStringAndSize(buf + 2, length - 2)))
-        goto error_attr;
 
-    Py_CLEAR(self->buffer);
-    self->buffer = tmp;
+    self->offset += 2;
     self->state = STATE_TEXT;
 
     event.info.starttag.data = data;
@@ -409,8 +400,6 @@ lex_EMPTY(tdi_soup_lexer *self)
     Py_DECREF(event.info.starttag.data);
     return res;
 
-error_attr:
-    Py_DECREF(attr);
 error_name:
     Py_DECREF(name);
 error_data:
@@ -432,9 +421,9 @@ starttag_attr(const char *, const char *, PyObject **, int *);
 static int
 lex_STARTTAG(tdi_soup_lexer *self)
 {
-    const char *buf, *start = PyString_AS_STRING(self->buffer);
-    const char *sentinel = start + PyString_GET_SIZE(self->buffer);
-    PyObject *data, *tmp, *name, *attr;
+    const char *buf, *start = BUF_START(self);
+    const char *sentinel = start + BUF_SIZE(self);
+    PyObject *data, *name, *attr;
     tdi_lexer_event event;
     int res, closed;
     char c;
@@ -508,11 +497,8 @@ state_final:
         goto error_data;
     if (starttag_attr(start + self->pos1, buf, &attr, &closed) == -1)
         goto error_name;
-    if (!(tmp = PyString_FromStringAndSize(buf, sentinel - buf)))
-        goto error_attr;
 
-    Py_CLEAR(self->buffer);
-    self->buffer = tmp;
+    self->offset += (Py_ssize_t)(buf - start);
     self->state = STATE_TEXT;
 
     event.info.starttag.data = data;
@@ -526,8 +512,6 @@ state_final:
     Py_DECREF(event.info.starttag.data);
     return res;
 
-error_attr:
-    Py_DECREF(attr);
 error_name:
     Py_DECREF(name);
 error_data:
@@ -675,8 +659,8 @@ error:
 static int
 lex_ENDTAG(tdi_soup_lexer *self)
 {
-    const char *buf, *p, *p1, *start = PyString_AS_STRING(self->buffer);
-    const char *sentinel = start + PyString_GET_SIZE(self->buffer);
+    const char *buf, *p, *p1, *start = BUF_START(self);
+    const char *sentinel = start + BUF_SIZE(self);
     PyObject *data, *tmp, *name;
     tdi_lexer_event event;
     int res;
@@ -707,12 +691,8 @@ handle:
 
     if (!(name = PyString_FromStringAndSize(p, (Py_ssize_t)(p1 - p))))
         goto error_data;
-    tmp = PyString_FromStringAndSize(buf, (Py_ssize_t)(sentinel - buf));
-    if (!tmp)
-        goto error_name;
 
-    Py_CLEAR(self->buffer);
-    self->buffer = tmp;
+    self->offset += (Py_ssize_t)(buf - start);
     self->state = STATE_TEXT;
 
     if (self->cdata_name) {
@@ -762,9 +742,9 @@ error:
 static int
 lex_COMMENT(tdi_soup_lexer *self)
 {
-    const char *buf = NULL, *p, *start = PyString_AS_STRING(self->buffer);
-    const char *sentinel = start + PyString_GET_SIZE(self->buffer);
-    PyObject *data, *tmp;
+    const char *buf = NULL, *p, *start = BUF_START(self);
+    const char *sentinel = start + BUF_SIZE(self);
+    PyObject *data;
     tdi_lexer_event event;
     int res, emit = 0; /* 0 == comment, else == text */
     char c;
@@ -857,12 +837,8 @@ handle:
     data = PyString_FromStringAndSize(start, (Py_ssize_t)(buf - start));
     if (!data)
         goto error;
-    tmp = PyString_FromStringAndSize(buf, (Py_ssize_t)(sentinel - buf));
-    if (!tmp)
-        goto error_data;
 
-    Py_CLEAR(self->buffer);
-    self->buffer = tmp;
+    self->offset += (Py_ssize_t)(buf - start);
     self->state = STATE_TEXT;
 
     if (emit == 0) {
@@ -877,8 +853,6 @@ handle:
     Py_DECREF(data);
     return res;
 
-error_data:
-    Py_DECREF(data);
 error:
     self->last_error = TDI_LEXER_ERR_ENV;
     return -1;
@@ -896,9 +870,9 @@ check_msmsection(tdi_soup_lexer *);
 static int
 lex_MSECTION(tdi_soup_lexer *self)
 {
-    const char *buf, *p, *p1, *start = PyString_AS_STRING(self->buffer);
-    const char *sentinel = start + PyString_GET_SIZE(self->buffer);
-    PyObject *data, *tmp, *name = NULL, *value = NULL;
+    const char *buf, *p, *p1 = NULL, *start = BUF_START(self);
+    const char *sentinel = start + BUF_SIZE(self);
+    PyObject *data, *name = NULL, *value = NULL;
     tdi_lexer_event event;
     int res, emit = 0; /* 0 == msection, else == text */
 
@@ -1002,26 +976,22 @@ handle:
     data = PyString_FromStringAndSize(start, (Py_ssize_t)(buf - start));
     if (!data)
         goto error;
-    tmp = PyString_FromStringAndSize(buf, (Py_ssize_t)(sentinel - buf));
-    if (!tmp)
-        goto error_data;
     if (emit == 0) {
         name = PyString_FromStringAndSize(start + self->pos1,
                                           self->pos2 - self->pos1);
         if (!name)
-            goto error_tmp;
+            goto error_data;
 
         p = start + self->pos2;
         while (p < p1 && *p++ != '[');
         if (!(p < p1)) p = start + self->pos2;
         if (!(value = PyString_FromStringAndSize(p, p1 - p))) {
             Py_DECREF(name);
-            goto error_tmp;
+            goto error_data;
         }
     }
 
-    Py_CLEAR(self->buffer);
-    self->buffer = tmp;
+    self->offset += (Py_ssize_t)(buf - start);
     self->state = STATE_TEXT;
 
     if (emit == 0) {
@@ -1042,8 +1012,6 @@ handle:
     Py_DECREF(data);
     return res;
 
-error_tmp:
-    Py_DECREF(tmp);
 error_data:
     Py_DECREF(data);
 error:
@@ -1054,7 +1022,7 @@ error:
 static int
 check_msmsection(tdi_soup_lexer *self)
 {
-    const char *buf = PyString_AS_STRING(self->buffer) + self->pos1;
+    const char *buf = BUF_START(self) + self->pos1;
     Py_ssize_t length = self->pos2 - self->pos1;
 
     if (self->flags & FLAG_CONDITIONAL_IE_COMMENTS) {switch (length) {
@@ -1097,9 +1065,9 @@ check_msmsection(tdi_soup_lexer *self)
 static int
 lex_DECL(tdi_soup_lexer *self)
 {
-    PyObject *data, *tmp, *name, *value;
-    const char *buf, *p, *p1, *start = PyString_AS_STRING(self->buffer);
-    const char *sentinel = start + PyString_GET_SIZE(self->buffer);
+    PyObject *data, *name, *value;
+    const char *buf, *p, *p1, *start = BUF_START(self);
+    const char *sentinel = start + BUF_SIZE(self);
     tdi_lexer_event event;
     int res;
     char c;
@@ -1277,12 +1245,7 @@ handle:
     if (!value)
         goto error_name;
 
-    tmp = PyString_FromStringAndSize(buf, (Py_ssize_t)(sentinel - buf));
-    if (!tmp)
-        goto error_value;
-
-    Py_CLEAR(self->buffer);
-    self->buffer = tmp;
+    self->offset += (Py_ssize_t)(buf - start);
     self->state = STATE_TEXT;
 
     event.info.decl.value = value;
@@ -1295,8 +1258,6 @@ handle:
     Py_DECREF(data);
     return res;
 
-error_value:
-    Py_DECREF(value);
 error_name:
     Py_DECREF(name);
 error_data:
@@ -1322,7 +1283,7 @@ error:
 static int
 dispatch_loop(tdi_soup_lexer *self)
 {
-    while (PyString_GET_SIZE(self->buffer) > 0) {
+    while (BUF_SIZE(self) > 0) {
         switch (self->state) {
         LEX(TEXT)
         LEX(MARKUP)
@@ -1359,6 +1320,7 @@ tdi_soup_lexer_new(tdi_lexer_callback *cb, void *cb_ctx,
         PyMem_Free(self);
         return NULL;
     }
+    self->offset = 0;
     self->last_error = 0;
     self->cb = cb;
     self->cb_ctx = cb_ctx;
@@ -1386,11 +1348,31 @@ tdi_soup_lexer_del(tdi_soup_lexer *self)
 int
 tdi_soup_lexer_feed(tdi_soup_lexer *self, PyObject *food)
 {
-    PyString_Concat(&self->buffer, food);
-    if (!self->buffer) {
-        self->last_error = TDI_LEXER_ERR_ENV;
-        return -1;
+    PyObject *tmp;
+    Py_ssize_t size = BUF_SIZE(self);
+
+    /* The buffer is only compacted here, the lexer states just move the
+     * offset */
+    if (!size && PyString_CheckExact(food)) {
+        Py_INCREF(food);
+        tmp = food;
     }
+    else {
+        tmp = PyString_FromStringAndSize(NULL,
+                                         size + PyString_GET_SIZE(food));
+        if (!tmp) {
+            self->last_error = TDI_LEXER_ERR_ENV;
+            return -1;
+        }
+        (void)memcpy(PyString_AS_STRING(tmp), BUF_START(self),
+                     (size_t)size);
+        (void)memcpy(PyString_AS_STRING(tmp) + size,
+                     PyString_AS_STRING(food),
+                     (size_t)PyString_GET_SIZE(food));
+    }
+    Py_DECREF(self->buffer);
+    self->buffer = tmp;
+    self->offset = 0;
 
     return dispatch_loop(self);
 }
@@ -1401,7 +1383,7 @@ tdi_soup_lexer_finalize(tdi_soup_lexer *self)
     if (dispatch_loop(self) == -1)
         return -1;
 
-    if (PyString_GET_SIZE(self->buffer) != 0) {
+    if (BUF_SIZE(self) != 0) {
         self->last_error = TDI_LEXER_ERR_EOF;
         return -1;
     }
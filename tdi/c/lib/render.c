@@ -19,6 +19,7 @@
 
 #include "tdi_content.h"
 #include "tdi_copy.h"
+#include "tdi_exceptions.h"
 #include "tdi_globals.h"
 #include "tdi_render.h"
 
@@ -26,7 +27,9 @@
 #include "obj_iterate_iter.h"
 #include "obj_model_adapters.h"
 #include "obj_node.h"
+#include "obj_render_iter.h"
 #include "obj_repeat_iter.h"
+#include "obj_template_node.h"
 
 
 /*
@@ -46,12 +49,13 @@ tdi_render_iterate(tdi_node_t *self, PyObject *iteritems, PyObject *separate)
     }
     Py_INCREF(self);
     /* Note: tmp is passed later to tdi_iterate_iterator_new */
-    if (!(tmp = tdi_node_deepcopy(self, self->model, self->ctx, NULL))) {
-        Py_DECREF(self);
-        Py_DECREF(nodelist);
-        Py_DECREF(iteritems);
-        Py_XDECREF(separate);
-        return NULL;
+    if (!(tmp = tdi_node_deepcopy(self, self->model, self->ctx, NULL)))
+        goto error;
+
+    /* The container's nodes are replaced, so they must not be shared */
+    if (tdi_node_unshare(self) == -1) {
+        Py_DECREF(tmp);
+        goto error;
     }
 
     /*
@@ -60,6 +64,7 @@ tdi_render_iterate(tdi_node_t *self, PyObject *iteritems, PyObject *separate)
      * container now.
      */
     TDI_CONTENT_CLEAR(self->content);
+    Py_CLEAR(self->protos);
     Py_CLEAR(self->nodes);
     Py_INCREF(nodelist);
     self->nodes = nodelist;
@@ -71,6 +76,13 @@ tdi_render_iterate(tdi_node_t *self, PyObject *iteritems, PyObject *separate)
 
     return tdi_iterate_iterator_new((tdi_node_t *)tmp, nodelist,
                                     iteritems, separate);
+
+error:
+    Py_DECREF(self);
+    Py_DECREF(nodelist);
+    Py_DECREF(iteritems);
+    Py_XDECREF(separate);
+    return NULL;
 }
 
 
@@ -124,7 +136,8 @@ tdi_render_stack_push(tdi_render_stack_t **next, PyObject *iter,
 static PyObject *
 repeat(tdi_node_t *node)
 {
-    PyObject *callback, *itemlist, *fixed, *separate;
+    PyObject *callback, *itemlist, *fixed, *separate, *mapping, *tmp;
+    Py_ssize_t batch;
 
     Py_INCREF(node);
     callback = PyTuple_GET_ITEM(node->overlays, 0);
@@ -135,13 +148,18 @@ repeat(tdi_node_t *node)
     Py_INCREF(fixed);
     separate = PyTuple_GET_ITEM(node->overlays, 3);
     Py_INCREF(separate);
+    tmp = PyTuple_GET_ITEM(node->overlays, 4);
+    batch = (tmp == Py_None) ? 0 : PyInt_AS_LONG(tmp);
+    mapping = PyTuple_GET_ITEM(node->overlays, 5);
+    Py_INCREF(mapping);
 
     /* Clear the flag now, so the copies are not repeated again... */
     node->flags &= ~NODE_REPEATED;
 
     Py_CLEAR(node->overlays);
 
-    return tdi_repeat_iterator_new(node, callback, itemlist, fixed, separate);
+    return tdi_repeat_iterator_new(node, callback, itemlist, fixed, separate,
+                                   batch, mapping);
 }
 
 
@@ -203,7 +221,7 @@ nested_callback:
             Py_DECREF(tmp);
             Py_CLEAR(node->overlays);
             *done = 0;
-            return 0;
+            goto check;
         }
         result = ask_model__callback(tmp, node);
         Py_DECREF(tmp);
@@ -241,6 +259,7 @@ nested_callback:
 
 #undef AS_BOOL
 
+check:
     if (node->flags & NODE_REMOVED) {
         return 1;
     }
@@ -261,51 +280,339 @@ nested_callback:
 
 
 /*
- * Determine subnodes to render
+ * Render a node using the fragment cache
+ *
+ * The model is asked for a cache key via the cache_<name> method. If a key
+ * is returned, the rendered node is taken from the cache or, if it's not
+ * found there, rendered and stored.
+ *
+ * Returns 1 and the rendered node in *chunk, if the node was handled,
+ * 0 if it's not cached and -1 on error.
  */
-static PyObject *
-subnodes(tdi_node_t *node, tdi_adapter_t *model)
+static int
+fragment(tdi_render_t *self, tdi_node_t *node, PyObject **chunk)
 {
-    PyObject *list, *item = NULL, *iter = NULL;
+    PyObject *method, *key, *tmp, *iter, *result;
+
+    method = tdi_adapter_method(
+        (tdi_adapter_t *)self->model, tdi_g_cachemethod, node->name,
+        node->modelscope,
+        !!(node->flags & NODE_NOAUTO)
+    );
+    if (!method) {
+        if (!PyErr_ExceptionMatches(TDI_E_ModelMissingError))
+            return -1;
+        PyErr_Clear();
+        return 0;
+    }
+    if (method == Py_None) {
+        Py_DECREF(method);
+        return 0;
+    }
+    tmp = PyObject_CallFunctionObjArgs(method, (PyObject *)node, NULL);
+    Py_DECREF(method);
+    if (!tmp)
+        return -1;
+    if (tmp == Py_None) {
+        Py_DECREF(tmp);
+        return 0;
+    }
 
-    if (!(list = PyList_New(0)))
-        return NULL;
+    key = Py_BuildValue("(OOOO)", node->modelscope, node->name,
+                        self->emit_escaped ? Py_True : Py_False, tmp);
+    Py_DECREF(tmp);
+    if (!key)
+        return -1;
 
-#define APPEND(source) do {                                          \
-    PyObject *tmp;                                                   \
-    int subresult;                                                   \
-    if (!(tmp = tdi_node_copy((source), model, node->ctx, 1, NULL))) \
-        goto error;                                                  \
-    subresult = PyList_Append(list, tmp);                            \
-    Py_DECREF(tmp);                                                  \
-    if (subresult == -1)                                             \
-        goto error;                                                  \
-} while (0)
-
-    if (!(iter = PyObject_GetIter(node->nodes)))
+    if (!(result = PyObject_CallMethod(self->fragments, "get", "(OO)",
+                                       self->owner, key)))
         goto error;
-    while ((item = PyIter_Next(iter))) {
-        APPEND((tdi_node_t *)item);
-        Py_DECREF(item);
+    if (result != Py_None) {
+        Py_DECREF(key);
+        *chunk = result;
+        return 1;
     }
-    if (PyErr_Occurred())
+    Py_DECREF(result);
+
+    if (!(iter = tdi_render_fragment_new(self, node)))
         goto error;
+    tmp = PySequence_List(iter);
     Py_DECREF(iter);
+    if (!tmp)
+        goto error;
+    result = _PyString_Join(tdi_g_empty, tmp);
+    Py_DECREF(tmp);
+    if (!result)
+        goto error;
+
+    if (!(tmp = PyObject_CallMethod(self->fragments, "set", "(OOO)",
+                                    self->owner, key, result))) {
+        Py_DECREF(result);
+        goto error;
+    }
+    Py_DECREF(tmp);
+    Py_DECREF(key);
+    *chunk = result;
+    return 1;
+
+error:
+    Py_DECREF(key);
+    return -1;
+}
+
+
+/*
+ * Append a chunk to both the clean and the escaped chunk list
+ */
+static int
+compile_static__append(PyObject *clean, PyObject *with_escapes,
+                       PyObject *chunk, PyObject *escaped_chunk)
+{
+    if (PyList_Append(clean, chunk) == -1)
+        return -1;
+    return PyList_Append(with_escapes, escaped_chunk);
+}
+
+
+/*
+ * Compile the complete markup of an unmodified template node
+ *
+ * Template nodes are not changed after finalization. So, if the model is
+ * not asked anymore (because a parent node is done), the markup of the
+ * whole subtree is fixed and can be emitted as one chunk. The result is a
+ * text node, which is computed once and kept in node->compiled.
+ */
+static PyObject *
+compile_static(tdi_node_t *node)
+{
+    PyObject *clean, *with_escapes, *tmp, *tmp2, *result;
+    tdi_node_t *subnode;
+    Py_ssize_t idx, length;
+    int res;
+
+    if (node->compiled) {
+        Py_INCREF(node->compiled);
+        return node->compiled;
+    }
+
+    if (!(clean = PyList_New(0)))
+        return NULL;
+    if (!(with_escapes = PyList_New(0)))
+        goto error_clean;
+
+    if (!(node->flags & NODE_NOELEMENT)) {
+        if (!(tmp = tdi_encoder_starttag(node)))
+            goto error;
+        res = compile_static__append(clean, with_escapes, tmp, tmp);
+        Py_DECREF(tmp);
+        if (res == -1)
+            goto error;
+    }
+
+    if (node->content) {
+        if (node->content->with_escapes) {
+            Py_INCREF(node->content->with_escapes);
+            tmp = node->content->with_escapes;
+        }
+        else if (!(tmp = ENCODE_ESCAPE(node, node->content->clean)))
+            goto error;
+        res = compile_static__append(clean, with_escapes,
+                                     node->content->clean, tmp);
+        Py_DECREF(tmp);
+        if (res == -1)
+            goto error;
+    }
+    else {
+        length = PyList_GET_SIZE(node->nodes);
+        for (idx = 0; idx < length; ++idx) {
+            subnode = (tdi_node_t *)PyList_GET_ITEM(node->nodes, idx);
+            if (subnode->kind == TEXT_NODE) {
+                Py_INCREF(subnode);
+            }
+            else if (!(subnode = (tdi_node_t *)compile_static(subnode)))
+                goto error;
+            res = compile_static__append(clean, with_escapes,
+                                         subnode->content->clean,
+                                         subnode->content->with_escapes);
+            Py_DECREF(subnode);
+            if (res == -1)
+                goto error;
+        }
+    }
+
+    if (!(node->flags & NODE_NOELEMENT)) {
+        if (compile_static__append(clean, with_escapes, node->endtag,
+                                   node->endtag) == -1)
+            goto error;
+    }
+
+    tmp = _PyString_Join(tdi_g_empty, clean);
+    Py_DECREF(clean);
+    if (!tmp) {
+        Py_DECREF(with_escapes);
+        return NULL;
+    }
+    tmp2 = _PyString_Join(tdi_g_empty, with_escapes);
+    Py_DECREF(with_escapes);
+    if (!tmp2) {
+        Py_DECREF(tmp);
+        return NULL;
+    }
+    if (   (PyString_GET_SIZE(tmp) == PyString_GET_SIZE(tmp2))
+        && !memcmp(PyString_AS_STRING(tmp), PyString_AS_STRING(tmp2),
+                   PyString_GET_SIZE(tmp))) {
+        Py_DECREF(tmp2);
+        Py_INCREF(tmp);
+        tmp2 = tmp;
+    }
+
+    result = tdi_template_node_escaped_text_new(tmp, tmp2);
+    Py_DECREF(tmp2);
+    Py_DECREF(tmp);
+    if (!result)
+        return NULL;
+
+    /* Another thread may have compiled the node meanwhile */
+    if (node->compiled)
+        Py_DECREF(result);
+    else
+        node->compiled = result;
+    Py_INCREF(node->compiled);
+    return node->compiled;
+
+error:
+    Py_DECREF(with_escapes);
+error_clean:
+    Py_DECREF(clean);
+    return NULL;
+}
+
+
+/*
+ * Compile the complete markup of an unmodified template node
+ */
+PyObject *
+tdi_render_compile_static(tdi_node_t *node)
+{
+    return compile_static(node);
+}
+
+
+/*
+ * Precompile the static markup of all template nodes below a node
+ *
+ * Afterwards rendering does not modify the tree anymore (see
+ * compile_static).
+ */
+int
+tdi_render_freeze(tdi_node_t *node)
+{
+    PyObject *tmp;
+    tdi_node_t *item;
+    Py_ssize_t idx;
+
+    if (!node->nodes)
+        return 0;
+
+    if (Py_EnterRecursiveCall(" while freezing the tree"))
+        return -1;
+
+    for (idx = 0; idx < PyList_GET_SIZE(node->nodes); ++idx) {
+        item = (tdi_node_t *)PyList_GET_ITEM(node->nodes, idx);
+        if (item->kind == TEXT_NODE)
+            continue;
+        if (!(tmp = compile_static(item)))
+            goto error;
+        Py_DECREF(tmp);
+        if (tdi_render_freeze(item) == -1)
+            goto error;
+        if (item->sep
+            && tdi_render_freeze((tdi_node_t *)item->sep) == -1)
+            goto error;
+    }
+
+    Py_LeaveRecursiveCall();
+    return 0;
+
+error:
+    Py_LeaveRecursiveCall();
+    return -1;
+}
+
+
+/*
+ * Determine subnodes to render
+ *
+ * If done is true, the model is not asked anymore for these nodes and
+ * untouched template nodes are replaced by their static markup.
+ */
+static PyObject *
+subnodes(tdi_node_t *node, tdi_adapter_t *model, int done)
+{
+    PyObject *list, *tmp;
+    tdi_node_t *item;
+    Py_ssize_t idx;
+    int subresult;
 
-#undef APPEND
+    if (!(list = PyList_New(0)))
+        return NULL;
+
+    for (idx = 0; idx < PyList_GET_SIZE(node->nodes); ++idx) {
+        item = (tdi_node_t *)PyList_GET_ITEM(node->nodes, idx);
+        if (done && item->kind != TEXT_NODE && !(item->flags & NODE_USER))
+            tmp = compile_static(item);
+        else if (tdi_node_is_proto(node, idx, item))
+            tmp = tdi_node_lazycopy(item, model, node->ctx);
+        else
+            tmp = tdi_node_copy(item, model, node->ctx, 1, NULL);
+        if (!tmp)
+            goto error;
+        subresult = PyList_Append(list, tmp);
+        Py_DECREF(tmp);
+        if (subresult == -1)
+            goto error;
+    }
 
-    iter = PyObject_GetIter(list);
+    tmp = PyObject_GetIter(list);
     Py_DECREF(list);
-    return iter;
+    return tmp;
 
 error:
-    Py_XDECREF(item);
-    Py_XDECREF(iter);
     Py_DECREF(list);
     return NULL;
 }
 
 
+/*
+ * Create starttag build event (tagname, attr, closed, starttag)
+ *
+ * The reference to starttag is stolen.
+ */
+static PyObject *
+starttag_event(tdi_node_t *node, PyObject *starttag)
+{
+    PyObject *attrlist, *attr, *result;
+
+    if (!(attrlist = tdi_encoder_attrlist(node)))
+        goto error;
+    attr = PyList_AsTuple(attrlist);
+    Py_DECREF(attrlist);
+    if (!attr)
+        goto error;
+
+    result = PyTuple_Pack(4, node->tagname, attr,
+                          (node->flags & NODE_CLOSED) ? Py_True : Py_False,
+                          starttag);
+    Py_DECREF(attr);
+    Py_DECREF(starttag);
+    return result;
+
+error:
+    Py_DECREF(starttag);
+    return NULL;
+}
+
+
 /*
  * Get next rendered chunk
  */
@@ -346,6 +653,12 @@ tdi_render_next(tdi_render_t *self)
         node = (tdi_node_t *)tmp;
 
         if (node->kind == TEXT_NODE) {
+            if (self->events) {
+                tmp = PyTuple_Pack(2, node->content->clean,
+                                   node->content->with_escapes);
+                Py_DECREF(node);
+                return tmp;
+            }
             tmp = self->emit_escaped ?
                 node->content->with_escapes : node->content->clean;
             Py_INCREF(tmp);
@@ -358,6 +671,20 @@ tdi_render_next(tdi_render_t *self)
             goto tdi_re_stage_nextnode;
         }
 
+        if (self->fragments && !self->done && node->kind == PROC_NODE
+            && node->name
+            && (!node->callback || node->callback == Py_None)) {
+            if ((PyObject *)node == self->uncached) {
+                Py_CLEAR(self->uncached);
+            }
+            else if ((asked = fragment(self, node, &tmp))) {
+                Py_DECREF(node);
+                if (asked == -1)
+                    goto exit;
+                return tmp;
+            }
+        }
+
         if ((asked = ask_model(self, node, &done)) == -1) {
             Py_DECREF(node);
             goto exit;
@@ -368,25 +695,42 @@ tdi_render_next(tdi_render_t *self)
         }
 
         if (!(node->flags & (NODE_NOELEMENT | NODE_MASKED))) {
-            if (!(tmp = ENCODE_STARTTAG(node))) {
+            if (!(tmp = tdi_encoder_starttag(node))) {
                 Py_DECREF(node);
                 goto exit;
             }
+            if (self->events) {
+                if (!(tmp = starttag_event(node, tmp))) {
+                    Py_DECREF(node);
+                    goto exit;
+                }
+                if (!(endtag = PyTuple_Pack(1, node->endtag))) {
+                    Py_DECREF(tmp);
+                    Py_DECREF(node);
+                    goto exit;
+                }
+            }
+            else {
+                Py_INCREF(node->endtag);
+                endtag = node->endtag;
+            }
             asked = 1;
-            Py_INCREF(node->endtag);
-            endtag = node->endtag;
         }
-        else
+        else {
+            tmp = NULL;
             endtag = NULL;
+        }
 
         if (node->content) {
-            if (self->emit_escaped) {
+            if (self->emit_escaped || self->events) {
                 if (node->content->with_escapes) {
                     Py_INCREF(node->content->with_escapes);
                     self->content = node->content->with_escapes;
                 }
                 else {
                     if (!(esc = ENCODE_ESCAPE(node, node->content->clean))) {
+                        Py_XDECREF(tmp);
+                        Py_XDECREF(endtag);
                         Py_DECREF(node);
                         goto exit;
                     }
@@ -404,7 +748,8 @@ tdi_render_next(tdi_render_t *self)
                 goto tdi_re_stage_content;
         }
         else {
-            nodes = subnodes(node, (tdi_adapter_t *)self->model);
+            nodes = subnodes(node, (tdi_adapter_t *)self->model,
+                             done || self->done);
             Py_DECREF(node);
             if (!nodes)
                 goto exit;
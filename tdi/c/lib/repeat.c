@@ -17,19 +17,24 @@
 
 #include "cext.h"
 
+#include "tdi_content.h"
 #include "tdi_copy.h"
+#include "tdi_exceptions.h"
 #include "tdi_globals.h"
+#include "tdi_render.h"
 #include "tdi_repeat.h"
 
+#include "obj_encoder.h"
 #include "obj_model_adapters.h"
 #include "obj_node.h"
+#include "obj_template_node.h"
 
 
 /*
  * make repeated ctx
  */
 static PyObject *
-make_repeated_ctx(tdi_repeat_t *self, PyObject *item, int diff)
+make_repeated_ctx(tdi_repeat_t *self, PyObject *item, Py_ssize_t idx)
 {
     PyObject *ctx, *tmp;
 
@@ -40,7 +45,7 @@ make_repeated_ctx(tdi_repeat_t *self, PyObject *item, int diff)
     Py_INCREF(item);
     PyTuple_SET_ITEM(ctx, 1, item);
 
-    if (!(tmp = PyInt_FromSsize_t(self->idx - diff))) {
+    if (!(tmp = PyInt_FromSsize_t(idx))) {
         Py_DECREF(ctx);
         return NULL;
     }
@@ -104,7 +109,7 @@ make_repeated_separator(tdi_repeat_t *self)
     Py_INCREF(self->item);
     PyTuple_SET_ITEM(item, 1, self->item);
 
-    ctx = make_repeated_ctx(self, item, 1);
+    ctx = make_repeated_ctx(self, item, self->idx - 1);
     Py_DECREF(item);
     if (!ctx)
         return NULL;
@@ -147,12 +152,12 @@ make_repeated_node(tdi_repeat_t *self)
     PyObject *ctx;
     tdi_node_t *newnode;
 
-    if (!(ctx = make_repeated_ctx(self, self->item, 0)))
+    if (!(ctx = make_repeated_ctx(self, self->item, self->idx)))
         return NULL;
 
-    /* create repeated node */
-    newnode = (tdi_node_t *)tdi_node_deepcopy(self->node, self->node->model,
-                                              ctx, NULL);
+    /* create repeated node (subnodes are copied when visited) */
+    newnode = (tdi_node_t *)tdi_node_lazycopy(self->node, self->node->model,
+                                              ctx);
     Py_DECREF(ctx);
     if (!newnode)
         return NULL;
@@ -172,6 +177,398 @@ make_repeated_node(tdi_repeat_t *self)
 }
 
 
+/*
+ * Prepare the next batch of repeated nodes
+ *
+ * The nodes are created and passed to the callback as list of (node, item)
+ * pairs. If the callback returns a true value, the nodes are marked as
+ * done. Nodes, which have been replaced by the callback, keep their new
+ * callback.
+ *
+ * Returns the number of prepared nodes or -1 on error.
+ */
+static Py_ssize_t
+make_repeated_batch(tdi_repeat_t *self)
+{
+    PyObject *pairs, *pair, *item, *ctx, *args, *tmp;
+    tdi_node_t *newnode;
+    Py_ssize_t j, length;
+    int done;
+
+    Py_CLEAR(self->pending);
+    self->pos = 0;
+    if (!(pairs = PyList_New(0)))
+        return -1;
+
+    for (j = 0; j < self->batch; ++j) {
+        if (!(item = PyIter_Next(self->iteritems))) {
+            if (PyErr_Occurred())
+                goto error_pairs;
+            break;
+        }
+        ctx = make_repeated_ctx(self, item, self->idx + 1 + j);
+        if (!ctx)
+            goto error_item;
+
+        /* create repeated node (subnodes are copied when visited) */
+        newnode = (tdi_node_t *)tdi_node_lazycopy(self->node,
+                                                  self->node->model, ctx);
+        Py_DECREF(ctx);
+        if (!newnode)
+            goto error_item;
+
+        pair = PyTuple_Pack(2, (PyObject *)newnode, item);
+        Py_DECREF(newnode);
+        Py_DECREF(item);
+        if (!pair)
+            goto error_pairs;
+        if (PyList_Append(pairs, pair) == -1) {
+            Py_DECREF(pair);
+            goto error_pairs;
+        }
+        Py_DECREF(pair);
+    }
+    if (!(length = PyList_GET_SIZE(pairs))) {
+        Py_DECREF(pairs);
+        return 0;
+    }
+    if (!(self->pending = PyList_AsTuple(pairs)))
+        goto error_pairs;
+
+    /* call back */
+    if (!(args = PyTuple_New(PyTuple_GET_SIZE(self->fixed) + 1)))
+        goto error_pairs;
+    PyTuple_SET_ITEM(args, 0, pairs);
+    for (j = PyTuple_GET_SIZE(self->fixed); j > 0; --j) {
+        tmp = PyTuple_GET_ITEM(self->fixed, j - 1);
+        Py_INCREF(tmp);
+        PyTuple_SET_ITEM(args, j, tmp);
+    }
+    tmp = PyObject_CallObject(self->callback, args);
+    Py_DECREF(args);
+    if (!tmp)
+        return -1;
+    done = PyObject_IsTrue(tmp);
+    Py_DECREF(tmp);
+    if (done == -1)
+        return -1;
+
+    for (j = 0; j < length; ++j) {
+        newnode = (tdi_node_t *)PyTuple_GET_ITEM(
+            PyTuple_GET_ITEM(self->pending, j), 0
+        );
+        if (newnode->kind == CB_NODE)  /* replaced by the callback */
+            continue;
+        Py_CLEAR(newnode->overlays);
+        Py_CLEAR(newnode->callback);
+        if (done) {
+            newnode->kind = DONE_NODE;
+        }
+        else {
+            newnode->kind = CB_NODE;
+            Py_INCREF(Py_None);
+            newnode->callback = Py_None;
+        }
+    }
+
+    return length;
+
+error_item:
+    Py_DECREF(item);
+error_pairs:
+    Py_DECREF(pairs);
+    return -1;
+}
+
+
+/*
+ * Append a chunk to the compiled row
+ *
+ * Adjacent chunks are merged. The chunk reference is stolen.
+ */
+static int
+row_append(PyObject *parts, PyObject *chunk)
+{
+    PyObject *last;
+    Py_ssize_t length;
+    int res;
+
+    if (!chunk)
+        return -1;
+
+    length = PyList_GET_SIZE(parts);
+    if (length && (last = PyList_GET_ITEM(parts, length - 1)) != Py_None) {
+        Py_INCREF(last);
+        PyString_ConcatAndDel(&last, chunk);
+        if (!last)
+            return -1;
+        return PyList_SetItem(parts, length - 1, last);
+    }
+
+    res = PyList_Append(parts, chunk);
+    Py_DECREF(chunk);
+    return res;
+}
+
+
+/*
+ * Compile the chunks and content slots of a node
+ *
+ * mapping is NULL below the repeated node. The names of the mapped
+ * subnodes are collected in found. The slots are only recorded for the
+ * clean (not escaped) chunks.
+ */
+static int
+compile_row(tdi_repeat_t *self, tdi_node_t *node, PyObject *mapping,
+            PyObject *found, PyObject *parts, int escaped)
+{
+    PyObject *tmp, *spec;
+    tdi_node_t *subnode;
+    Py_ssize_t idx;
+    int element, subelement, res;
+
+    element = !(node->flags & (NODE_NOELEMENT | NODE_MASKED));
+    if (element && row_append(parts, tdi_encoder_starttag(node)) == -1)
+        return -1;
+
+    if (node->content) {
+        if (!escaped) {
+            tmp = node->content->clean;
+            Py_INCREF(tmp);
+        }
+        else if (node->content->with_escapes) {
+            tmp = node->content->with_escapes;
+            Py_INCREF(tmp);
+        }
+        else
+            tmp = ENCODE_ESCAPE(node, node->content->clean);
+        if (row_append(parts, tmp) == -1)
+            return -1;
+    }
+    else {
+        for (idx = 0; idx < PyList_GET_SIZE(node->nodes); ++idx) {
+            subnode = (tdi_node_t *)PyList_GET_ITEM(node->nodes, idx);
+            if (subnode->kind == TEXT_NODE) {
+                tmp = escaped ? subnode->content->with_escapes
+                                    : subnode->content->clean;
+                Py_INCREF(tmp);
+                if (row_append(parts, tmp) == -1)
+                    return -1;
+                continue;
+            }
+            if (subnode->flags & NODE_REMOVED)
+                continue;
+
+            if (mapping && subnode->name
+                && (spec = PyDict_GetItem(mapping, subnode->name))) {
+                if (PyDict_SetItem(found, subnode->name, Py_None) == -1)
+                    return -1;
+                subelement =
+                    !(subnode->flags & (NODE_NOELEMENT | NODE_MASKED));
+                if (subelement
+                    && row_append(parts, tdi_encoder_starttag(subnode)) == -1)
+                    return -1;
+                if (!escaped) {
+                    tmp = Py_BuildValue("(nO)",
+                                        PyList_GET_SIZE(parts), spec);
+                    if (!tmp)
+                        return -1;
+                    if (PyList_Append(self->rowslots, tmp) == -1) {
+                        Py_DECREF(tmp);
+                        return -1;
+                    }
+                    Py_DECREF(tmp);
+                }
+                if (PyList_Append(parts, Py_None) == -1)
+                    return -1;
+                if (subelement) {
+                    Py_INCREF(subnode->endtag);
+                    if (row_append(parts, subnode->endtag) == -1)
+                        return -1;
+                }
+            }
+            else if (subnode->flags & NODE_USER) {
+                if (Py_EnterRecursiveCall(" while compiling a row"))
+                    return -1;
+                res = compile_row(self, subnode, NULL, found, parts,
+                                  escaped);
+                Py_LeaveRecursiveCall();
+                if (res == -1)
+                    return -1;
+            }
+            else {
+                if (!(subnode = (tdi_node_t *)
+                                tdi_render_compile_static(subnode)))
+                    return -1;
+                tmp = escaped ? subnode->content->with_escapes
+                                    : subnode->content->clean;
+                Py_INCREF(tmp);
+                Py_DECREF(subnode);
+                if (row_append(parts, tmp) == -1)
+                    return -1;
+            }
+        }
+    }
+
+    if (element) {
+        Py_INCREF(node->endtag);
+        if (row_append(parts, node->endtag) == -1)
+            return -1;
+    }
+
+    return 0;
+}
+
+
+/*
+ * Compile the markup of the repeated node into chunks and content slots
+ */
+static int
+make_row_template(tdi_repeat_t *self)
+{
+    PyObject *found, *names, *name, *tmp;
+    Py_ssize_t j;
+
+    self->escaped = tdi_adapter_emit_escaped(self->node->model);
+    if (!(self->rowparts = PyList_New(0)))
+        return -1;
+    if (!(self->rowslots = PyList_New(0)))
+        return -1;
+    if (!(found = PyDict_New()))
+        return -1;
+    if (compile_row(self, self->node, self->mapping, found, self->rowparts,
+                    0) == -1)
+        goto error_found;
+    if (self->escaped) {
+        if (!(self->erowparts = PyList_New(0)))
+            goto error_found;
+        if (compile_row(self, self->node, self->mapping, found,
+                        self->erowparts, 1) == -1)
+            goto error_found;
+    }
+
+    if (!(names = PyDict_Keys(self->mapping)))
+        goto error_found;
+    if (PyList_Sort(names) == -1)
+        goto error_names;
+    for (j = 0; j < PyList_GET_SIZE(names); ++j) {
+        name = PyList_GET_ITEM(names, j);
+        if (!PyDict_GetItem(found, name)) {
+            PyErr_SetObject(TDI_E_NodeNotFoundError, name);
+            goto error_names;
+        }
+    }
+    Py_DECREF(names);
+    Py_DECREF(found);
+
+    tmp = PyList_AsTuple(self->rowslots);
+    Py_DECREF(self->rowslots);
+    self->rowslots = tmp;
+    return tmp ? 0 : -1;
+
+error_names:
+    Py_DECREF(names);
+error_found:
+    Py_DECREF(found);
+    return -1;
+}
+
+
+/*
+ * make repeated row (text node filled from the item)
+ *
+ * If escaped rows are emitted, the text node carries both the clean and
+ * the escaped row.
+ */
+static PyObject *
+make_repeated_row(tdi_repeat_t *self)
+{
+    PyObject *row, *erow = NULL, *slot, *spec, *value, *tmp, *etmp;
+    Py_ssize_t j, pos;
+
+    if (!self->rowparts && make_row_template(self) == -1)
+        return NULL;
+
+    row = PyList_GetSlice(self->rowparts, 0,
+                          PyList_GET_SIZE(self->rowparts));
+    if (!row)
+        return NULL;
+    if (self->erowparts) {
+        erow = PyList_GetSlice(self->erowparts, 0,
+                               PyList_GET_SIZE(self->erowparts));
+        if (!erow)
+            goto error;
+    }
+
+    for (j = 0; j < PyTuple_GET_SIZE(self->rowslots); ++j) {
+        slot = PyTuple_GET_ITEM(self->rowslots, j);
+        spec = PyTuple_GET_ITEM(slot, 1);
+        if (PyCallable_Check(spec))
+            value = PyObject_CallFunctionObjArgs(spec, self->item, NULL);
+        else
+            value = PyObject_GetItem(self->item, spec);
+        if (!value)
+            goto error;
+
+        if (!BaseString_Check(value)) {
+            tmp = PyObject_Str(value);
+            Py_DECREF(value);
+            if (!(value = tmp))
+                goto error;
+        }
+        tmp = ENCODE_CONTENT(self->node, value);
+        Py_DECREF(value);
+        if (!(value = tmp))
+            goto error;
+        if (!PyString_Check(value)) {
+            PyErr_SetString(TDI_E_ModelError,
+                            "Encoded value must be a string");
+            Py_DECREF(value);
+            goto error;
+        }
+        pos = PyInt_AS_LONG(PyTuple_GET_ITEM(slot, 0));
+        if (erow) {
+            if (!(tmp = ENCODE_ESCAPE(self->node, value))) {
+                Py_DECREF(value);
+                goto error;
+            }
+            if (PyList_SetItem(erow, pos, tmp) == -1) {
+                Py_DECREF(value);
+                goto error;
+            }
+        }
+        if (PyList_SetItem(row, pos, value) == -1)
+            goto error;
+    }
+
+    tmp = _PyString_Join(tdi_g_empty, row);
+    Py_CLEAR(row);
+    if (!tmp)
+        goto error;
+    if (!erow) {
+        row = tdi_template_node_text_new(tmp);
+        Py_DECREF(tmp);
+        return row;
+    }
+
+    etmp = _PyString_Join(tdi_g_empty, erow);
+    Py_DECREF(erow);
+    if (!etmp) {
+        Py_DECREF(tmp);
+        return NULL;
+    }
+    row = tdi_template_node_escaped_text_new(tmp, etmp);
+    Py_DECREF(etmp);
+    Py_DECREF(tmp);
+    return row;
+
+error:
+    Py_XDECREF(erow);
+    Py_XDECREF(row);
+    return NULL;
+}
+
+
 /*
  * Get next repetition node
  */
@@ -179,6 +576,7 @@ PyObject *
 tdi_repeat_next(tdi_repeat_t *self)
 {
     PyObject *nextnode;
+    Py_ssize_t length;
 
     switch (self->stage) {
 
@@ -203,7 +601,22 @@ tdi_repeat_next(tdi_repeat_t *self)
         self->stage = TDI_RI_STAGE_NEXT;
 
     case TDI_RI_STAGE_NEXT:
-        if (!self->item && !(self->item = PyIter_Next(self->iteritems))) {
+        if (self->batch) {
+            if (!self->pending
+                || self->pos >= PyTuple_GET_SIZE(self->pending)) {
+                if (!(length = make_repeated_batch(self)))
+                    goto done;
+                else if (length == -1)
+                    goto exit;
+            }
+            Py_CLEAR(self->item);
+            self->item = PyTuple_GET_ITEM(
+                PyTuple_GET_ITEM(self->pending, self->pos), 1
+            );
+            Py_INCREF(self->item);
+        }
+        else if (!self->item
+                 && !(self->item = PyIter_Next(self->iteritems))) {
             if (PyErr_Occurred())
                 goto exit;
             goto done;
@@ -216,8 +629,17 @@ tdi_repeat_next(tdi_repeat_t *self)
         self->stage = TDI_RI_STAGE_NODE;
 
     case TDI_RI_STAGE_NODE:
-        nextnode = make_repeated_node(self);
-        if (!nextnode)
+        if (self->batch) {
+            nextnode = PyTuple_GET_ITEM(
+                PyTuple_GET_ITEM(self->pending, self->pos++), 0
+            );
+            Py_INCREF(nextnode);
+        }
+        else if (self->mapping) {
+            if (!(nextnode = make_repeated_row(self)))
+                goto exit;
+        }
+        else if (!(nextnode = make_repeated_node(self)))
             goto exit;
         Py_CLEAR(self->last_item);
         self->last_item = self->item;
@@ -249,5 +671,10 @@ done:
     Py_CLEAR(self->sepmodel);
     Py_CLEAR(self->item);
     Py_CLEAR(self->last_item);
+    Py_CLEAR(self->pending);
+    Py_CLEAR(self->mapping);
+    Py_CLEAR(self->rowparts);
+    Py_CLEAR(self->erowparts);
+    Py_CLEAR(self->rowslots);
     return NULL;
 }
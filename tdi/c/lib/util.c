@@ -56,9 +56,9 @@ tdi_util_tolower(PyObject *string)
 PyObject *
 tdi_util_subnode(tdi_node_t *self, PyObject *name)
 {
-    PyObject *tmp, *nodes;
-    tdi_node_t *node;
-    Py_ssize_t idx;
+    PyObject *tmp;
+    tdi_node_t *node, *parent;
+    Py_ssize_t idx, pos;
 
     node = self;
     Py_INCREF(node);
@@ -70,30 +70,38 @@ tdi_util_subnode(tdi_node_t *self, PyObject *name)
             return NULL;
         }
         idx = PyInt_AsSsize_t(tmp);
-        if (PyErr_Occurred()) {
+        if (PyErr_Occurred() || tdi_node_unshare(node) == -1) {
             Py_DECREF(node);
             return NULL;
         }
-        nodes = node->nodes;
-        Py_DECREF(node);
-        if (!(node = (tdi_node_t *)PyList_GetItem(nodes,
-                                                  idx < 0 ? (-1 - idx): idx)))
+        parent = node;
+        pos = idx < 0 ? (-1 - idx) : idx;
+        if (!(node = (tdi_node_t *)PyList_GetItem(parent->nodes, pos))) {
+            Py_DECREF(parent);
             return NULL;
+        }
 
         Py_INCREF(node);
-        if (!(tmp = tdi_node_copy(node, self->model, self->ctx, 1, NULL))) {
+        if (tdi_node_is_proto(parent, pos, node))
+            tmp = tdi_node_lazycopy(node, self->model, self->ctx);
+        else
+            tmp = tdi_node_copy(node, self->model, self->ctx, 1, NULL);
+        if (!tmp) {
             Py_DECREF(node);
+            Py_DECREF(parent);
             return NULL;
         }
         if (tmp != (PyObject *)node) {
             Py_INCREF(tmp);
-            if (PyList_SetItem(nodes, idx < 0 ? (-1 - idx) : idx, tmp) == -1) {
+            if (PyList_SetItem(parent->nodes, pos, tmp) == -1) {
                 Py_DECREF(tmp);
                 Py_DECREF(node);
+                Py_DECREF(parent);
                 return NULL;
             }
         }
         Py_DECREF(node);
+        Py_DECREF(parent);
         if (idx >= 0)
             return tmp;
         node = (tdi_node_t *)tmp;
@@ -30,6 +30,7 @@
 #include "obj_model_adapters.h"
 #include "obj_node.h"
 #include "obj_raw_node.h"
+#include "obj_render_buffer.h"
 #include "obj_render_iter.h"
 #include "obj_repeat_iter.h"
 #include "obj_repr_iter.h"
@@ -153,6 +154,7 @@ EXT_INIT_FUNC {
     EXT_INIT_TYPE(m, &TDI_PreRenderWrapperType);
     EXT_INIT_TYPE(m, &TDI_RawNodeType);
     EXT_INIT_TYPE(m, &TDI_RenderAdapterType);
+    EXT_INIT_TYPE(m, &TDI_RenderBufferType);
     EXT_INIT_TYPE(m, &TDI_RenderIteratorType);
     EXT_INIT_TYPE(m, &TDI_RepeatIteratorType);
     EXT_INIT_TYPE(m, &TDI_ReprIteratorType);
@@ -174,6 +176,7 @@ EXT_INIT_FUNC {
     EXT_ADD_TYPE(m, "PreRenderWrapper", &TDI_PreRenderWrapperType);
     EXT_ADD_TYPE(m, "RawNode", &TDI_RawNodeType);
     EXT_ADD_TYPE(m, "RenderAdapter", &TDI_RenderAdapterType);
+    EXT_ADD_TYPE(m, "RenderBuffer", &TDI_RenderBufferType);
     EXT_ADD_TYPE(m, "Root", &TDI_RootNodeType);
     EXT_ADD_TYPE(m, "SoupEncoder", &TDI_SoupEncoderType);
     EXT_ADD_TYPE(m, "SoupEncodingDetectFilter",
@@ -185,6 +188,11 @@ EXT_INIT_FUNC {
     EXT_ADD_TYPE(m, "TextEncoder", &TDI_TextEncoderType);
     EXT_ADD_TYPE(m, "XMLDecoder", &TDI_XMLDecoderType);
 
+    /* The method resolution cache is shared with the python level */
+    Py_INCREF(tdi_g_method_cache);
+    if (PyModule_AddObject(m, "method_cache", tdi_g_method_cache) < 0)
+        EXT_INIT_ERROR(m);
+
     /* We inherit our exceptions and warnings from the package */
     if (!(exceptions = PyImport_ImportModule("tdi._exceptions")))
         EXT_INIT_ERROR(m);
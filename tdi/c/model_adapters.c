@@ -159,6 +159,117 @@ error_scope_part:
 }
 
 
+/* Maximum number of model classes kept in the method resolution cache */
+#define TDI_METHOD_CACHE_SIZE (1024)
+
+/*
+ * Find the method name cache of a model's class
+ *
+ * The cache maps prefix -> name -> (methodname, in_class). Classes, which
+ * customize attribute access, are mapped to None. The cache is a
+ * WeakKeyDictionary, lookups go to its storage directly.
+ *
+ * Return a borrowed reference or NULL on error.
+ */
+static PyObject *
+render_method_names(PyObject *model)
+{
+    PyObject *cls = (PyObject *)Py_TYPE(model), *names, *ref;
+
+    if (!(ref = PyWeakref_NewRef(cls, NULL)))
+        return NULL;
+    names = PyDict_GetItem(tdi_g_method_cache_data, ref);
+    Py_DECREF(ref);
+    if (names)
+        return names;
+
+    if (PyDict_Size(tdi_g_method_cache_data) >= TDI_METHOD_CACHE_SIZE) {
+        /* Evict a single (arbitrary) entry */
+        if (!(ref = PyObject_CallMethod(tdi_g_method_cache, "popitem", ""))) {
+            if (!PyErr_ExceptionMatches(PyExc_KeyError))
+                return NULL;
+            PyErr_Clear();
+        }
+        else
+            Py_DECREF(ref);
+    }
+
+    if (Py_TYPE(model)->tp_getattro == PyObject_GenericGetAttr) {
+        if (!(names = PyDict_New()))
+            return NULL;
+    }
+    else {
+        Py_INCREF(Py_None);
+        names = Py_None;
+    }
+    if (PyObject_SetItem(tdi_g_method_cache, cls, names) == -1) {
+        Py_DECREF(names);
+        return NULL;
+    }
+    Py_DECREF(names);
+
+    return names;
+}
+
+
+/*
+ * Build the method name and remember it in the name cache
+ *
+ * Return a new reference to the methodname or NULL on error.
+ */
+static PyObject *
+render_method_name(PyObject *model, PyObject *names, PyObject *prefix,
+                   PyObject *name, int *in_class)
+{
+    PyObject *methodname, *prefixed, *entry;
+    char *cmethodname;
+    Py_ssize_t size;
+
+    size = PyString_GET_SIZE(prefix) + PyString_GET_SIZE(name) + 1;
+    if (!(methodname = PyString_FromStringAndSize(NULL, size)))
+        return NULL;
+
+    cmethodname = PyString_AS_STRING(methodname);
+    size = PyString_GET_SIZE(prefix);
+    (void)memcpy(cmethodname, PyString_AS_STRING(prefix), (size_t)size);
+    cmethodname += size;
+    *cmethodname++ = '_';
+    (void)memcpy(cmethodname, PyString_AS_STRING(name),
+                 (size_t)PyString_GET_SIZE(name));
+    PyString_InternInPlace(&methodname);
+
+    if (names == Py_None) {
+        *in_class = 1;
+        return methodname;
+    }
+    *in_class = _PyType_Lookup(Py_TYPE(model), methodname) ? 1 : 0;
+
+    if (!(prefixed = PyDict_GetItem(names, prefix))) {
+        if (!(prefixed = PyDict_New()))
+            goto error;
+        if (PyDict_SetItem(names, prefix, prefixed) == -1) {
+            Py_DECREF(prefixed);
+            goto error;
+        }
+        Py_DECREF(prefixed);
+    }
+    if (!(entry = Py_BuildValue("(OO)", methodname,
+                                *in_class ? Py_True : Py_False)))
+        goto error;
+    if (PyDict_SetItem(prefixed, name, entry) == -1) {
+        Py_DECREF(entry);
+        goto error;
+    }
+    Py_DECREF(entry);
+
+    return methodname;
+
+error:
+    Py_DECREF(methodname);
+    return NULL;
+}
+
+
 /*
  * Find a model method
  */
@@ -166,9 +277,8 @@ static PyObject *
 render_modelmethod(tdi_adapter_t *adapter, PyObject *prefix, PyObject *name,
                    PyObject *scope, int noauto)
 {
-    PyObject *method, *methodname, *model;
-    char *cmethodname;
-    Py_ssize_t size;
+    PyObject *method, *methodname, *model, *names, *tmp, **dictptr;
+    int in_class;
 
     if (noauto || !name)
         Py_RETURN_NONE;
@@ -189,31 +299,44 @@ render_modelmethod(tdi_adapter_t *adapter, PyObject *prefix, PyObject *name,
     /*
      * Method lookup
      */
-
-    /* build methodname */
-    size = PyString_GET_SIZE(prefix) + PyString_GET_SIZE(name) + 1;
-    if (!(methodname = PyString_FromStringAndSize(NULL, size))) {
-        Py_DECREF(model);
-        return NULL;
+    if (!(names = render_method_names(model)))
+        goto error_model;
+
+    if (names != Py_None && (tmp = PyDict_GetItem(names, prefix))
+        && (tmp = PyDict_GetItem(tmp, name))) {
+        methodname = PyTuple_GET_ITEM(tmp, 0);
+        Py_INCREF(methodname);
+        /* Misses are checked again, the method may have been added to the
+         * class in the meantime (_PyType_Lookup uses the type cache) */
+        in_class = PyTuple_GET_ITEM(tmp, 1) == Py_True
+            || _PyType_Lookup(Py_TYPE(model), methodname);
+    }
+    else if (!(methodname = render_method_name(model, names, prefix, name,
+                                               &in_class)))
+        goto error_model;
+
+    if (in_class) {
+        method = PyObject_GetAttr(model, methodname);
+        if (!method) {
+            if (!PyErr_ExceptionMatches(PyExc_AttributeError))
+                goto error_methodname;
+            PyErr_Clear();
+        }
+    }
+    else {
+        /* Only the instance dict is left to look into */
+        method = NULL;
+        if ((dictptr = _PyObject_GetDictPtr(model)) && *dictptr
+            && (method = PyDict_GetItem(*dictptr, methodname)))
+            Py_INCREF(method);
     }
-
-    cmethodname = PyString_AS_STRING(methodname);
-    size = PyString_GET_SIZE(prefix);
-    (void)memcpy(cmethodname, PyString_AS_STRING(prefix), (size_t)size);
-    cmethodname += size;
-    *cmethodname++ = '_';
-    (void)memcpy(cmethodname, PyString_AS_STRING(name),
-                 (size_t)PyString_GET_SIZE(name));
-
-    method = PyObject_GetAttr(model, methodname);
     Py_DECREF(model);
+
     if (!method) {
-        if (!PyErr_ExceptionMatches(PyExc_AttributeError))
-            goto error_methodname;
-        PyErr_Clear();
         if (adapter->u.render.requiremethods) {
             PyErr_SetObject(TDI_E_ModelMissingError, methodname);
-            goto error_methodname;
+            Py_DECREF(methodname);
+            return NULL;
         }
         Py_INCREF(Py_None);
         method = Py_None;
@@ -224,6 +347,8 @@ render_modelmethod(tdi_adapter_t *adapter, PyObject *prefix, PyObject *name,
 
 error_methodname:
     Py_DECREF(methodname);
+error_model:
+    Py_DECREF(model);
     return NULL;
 }
 
@@ -373,9 +498,10 @@ prerender_modelmethod(tdi_adapter_t *self, PyObject *prefix, PyObject *name,
         return method;
     }
 
-#define SIZE (sizeof("separate") - 1)
-    if ((PyString_GET_SIZE(prefix) == SIZE)
-        && (!memcmp(PyString_AS_STRING(prefix), "separate", SIZE)))
+    /* Only render methods are generated */
+#define SIZE (sizeof("render") - 1)
+    if ((PyString_GET_SIZE(prefix) != SIZE)
+        || (memcmp(PyString_AS_STRING(prefix), "render", SIZE)))
         Py_RETURN_NONE;
 #undef SIZE
 
@@ -442,7 +568,7 @@ This implements the default look up.\n\
 \n\
 :Parameters:\n\
   `prefix` : ``str``\n\
-    The method prefix (``render``, or ``separate``)\n\
+    The method prefix (``render``, ``separate`` or ``cache``)\n\
 \n\
   `name` : ``str``\n\
     The node name\n\
@@ -747,7 +873,7 @@ found it generates its own, which restores the tdi attributes\n\
 \n\
 :Parameters:\n\
   `prefix` : ``str``\n\
-    The method prefix (``render``, or ``separate``)\n\
+    The method prefix (``render``, ``separate`` or ``cache``)\n\
 \n\
   `name` : ``str``\n\
     The node name\n\
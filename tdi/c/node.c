@@ -25,6 +25,7 @@
 #include "tdi_overlay.h"
 #include "tdi_remove.h"
 #include "tdi_render.h"
+#include "tdi_repeat.h"
 #include "tdi_replace.h"
 #include "tdi_scope.h"
 #include "tdi_util.h"
@@ -56,9 +57,11 @@ node_clear(tdi_node_t *self) {
     TDI_OVERLAY_CLEAR(self->overlay);
     TDI_CONTENT_CLEAR(self->content);
     Py_CLEAR(self->complete);
+    Py_CLEAR(self->protos);
     Py_CLEAR(self->tagname);
     Py_CLEAR(self->attr);
     Py_CLEAR(self->endtag);
+    Py_CLEAR(self->starttag);
     Py_CLEAR(self->name);
     Py_CLEAR(self->encoder);
     Py_CLEAR(self->decoder);
@@ -121,11 +124,17 @@ Examples:\n\
     ``None``, ``self.separate_name`` is looked up and called if it\n\
     exists.");
 
+/*
+ * Setup node repetition (repeat and repeat_batch)
+ *
+ * If batched is true, the batch keyword is accepted.
+ */
 static PyObject *
-TDI_NodeType_repeat(tdi_node_t *self, PyObject *args, PyObject *kwds)
+node_repeat(tdi_node_t *self, PyObject *args, PyObject *kwds,
+            const char *name, int batched)
 {
-    PyObject *callback, *itemlist, *fixed, *cbargs, *separate;
-    Py_ssize_t length;
+    PyObject *callback, *itemlist, *fixed, *cbargs, *separate, *batch_o;
+    Py_ssize_t length, batch = 0;
     int expected_kwds = 0;
 
     length = PyTuple_GET_SIZE(args);
@@ -139,8 +148,8 @@ TDI_NodeType_repeat(tdi_node_t *self, PyObject *args, PyObject *kwds)
         itemlist = kwds ? PyDict_GetItemString(kwds, "itemlist") : NULL;
         if (!itemlist) {
             if (!PyErr_Occurred())
-                PyErr_SetString(PyExc_TypeError,
-                                "Node.repeat takes at least 2 arguments");
+                PyErr_Format(PyExc_TypeError,
+                             "%s takes at least 2 arguments", name);
             return NULL;
         }
         Py_INCREF(itemlist);
@@ -153,8 +162,8 @@ TDI_NodeType_repeat(tdi_node_t *self, PyObject *args, PyObject *kwds)
             callback = kwds ? PyDict_GetItemString(kwds, "callback") : NULL;
             if (!callback) {
                 if (!PyErr_Occurred())
-                    PyErr_SetString(PyExc_TypeError,
-                                    "Node.repeat takes at least 2 arguments");
+                    PyErr_Format(PyExc_TypeError,
+                                 "%s takes at least 2 arguments", name);
                 Py_DECREF(itemlist);
                 return NULL;
             }
@@ -182,37 +191,197 @@ TDI_NodeType_repeat(tdi_node_t *self, PyObject *args, PyObject *kwds)
         ++expected_kwds;
     Py_INCREF(separate);
 
+    if (batched) {
+        batch_o = kwds ? PyDict_GetItemString(kwds, "batch") : NULL;
+        if (!batch_o) {
+            if (PyErr_Occurred())
+                goto error_separate;
+            batch = TDI_REPEAT_BATCH;
+        }
+        else {
+            ++expected_kwds;
+            batch = PyInt_AsSsize_t(batch_o);
+            if (batch == -1 && PyErr_Occurred())
+                goto error_separate;
+        }
+    }
+
     if (kwds && PyDict_Size(kwds) > expected_kwds) {
         PyErr_SetString(PyExc_TypeError, "Unrecognized keyword parameters");
-        Py_DECREF(separate);
-        Py_DECREF(itemlist);
-        Py_DECREF(callback);
-        return NULL;
+        goto error_separate;
+    }
+    if (batched && batch < 1) {
+        PyErr_SetString(PyExc_ValueError, "batch must be positive");
+        goto error_separate;
     }
 
     if (length <= 2) {
         fixed = tdi_g_empty_tuple;
         Py_INCREF(fixed);
     }
-    else if (!(fixed = PyTuple_GetSlice(args, 2, length))) {
-        Py_DECREF(separate);
-        Py_DECREF(itemlist);
-        Py_DECREF(callback);
-        return NULL;
-    }
+    else if (!(fixed = PyTuple_GetSlice(args, 2, length)))
+        goto error_separate;
 
-    if (!(cbargs = PyTuple_New(4))) {
-        Py_DECREF(separate);
-        Py_DECREF(itemlist);
-        Py_DECREF(callback);
-        Py_DECREF(fixed);
-        return NULL;
+    if (!batched)
+        batch_o = (Py_INCREF(Py_None), Py_None);
+    else if (!(batch_o = PyInt_FromSsize_t(batch)))
+        goto error_fixed;
+
+    if (!(cbargs = PyTuple_New(6))) {
+        Py_DECREF(batch_o);
+        goto error_fixed;
     }
 
     PyTuple_SET_ITEM(cbargs, 0, callback);
     PyTuple_SET_ITEM(cbargs, 1, itemlist);
     PyTuple_SET_ITEM(cbargs, 2, fixed);
     PyTuple_SET_ITEM(cbargs, 3, separate);
+    PyTuple_SET_ITEM(cbargs, 4, batch_o);
+    Py_INCREF(Py_None);
+    PyTuple_SET_ITEM(cbargs, 5, Py_None);
+
+    Py_CLEAR(self->overlays);
+    self->overlays = cbargs;
+    self->flags |= NODE_REPEATED;
+    self->kind = PROC_NODE;
+
+    Py_RETURN_NONE;
+
+error_fixed:
+    Py_DECREF(fixed);
+error_separate:
+    Py_DECREF(separate);
+    Py_DECREF(itemlist);
+    Py_DECREF(callback);
+    return NULL;
+}
+
+static PyObject *
+TDI_NodeType_repeat(tdi_node_t *self, PyObject *args, PyObject *kwds)
+{
+    return node_repeat(self, args, kwds, "Node.repeat", 0);
+}
+
+PyDoc_STRVAR(TDI_NodeType_repeat_batch__doc__,
+"repeat_batch(self, callback, itemlist, *fixed, **kwargs)\n\
+\n\
+Repeat the snippet ``len(list(itemlist))`` times, filled batchwise\n\
+\n\
+The actually supported signature is::\n\
+\n\
+    repeat_batch(self, callback, itemlist, *fixed, batch=512,\n\
+                 separate=None)\n\
+\n\
+In contrast to `repeat`, the callback is not called per repeated\n\
+node, but once per batch with a list of ``(node, item)`` pairs.\n\
+The nodes of a batch are created before the callback is called.\n\
+If the callback returns a true value, the nodes of the batch are\n\
+not processed any further.\n\
+\n\
+Example:\n\
+\n\
+>>> def render_foo(self, node):\n\
+>>>     def callback(pairs):\n\
+>>>         for node, item in pairs:\n\
+>>>             ...\n\
+>>>     node.repeat_batch(callback, [1, 2, 3, 4], batch=2)\n\
+\n\
+:Parameters:\n\
+  `callback` : ``callable``\n\
+    The callback function\n\
+\n\
+  `itemlist` : iterable\n\
+    The items to iterate over\n\
+\n\
+  `fixed` : ``tuple``\n\
+    Fixed parameters to be passed to the callback\n\
+\n\
+:Keywords:\n\
+  `batch` : ``int``\n\
+    Maximum number of nodes passed to a single callback call. If\n\
+    omitted, it defaults to ``512``.\n\
+\n\
+  `separate` : ``callable``\n\
+    Alternative callback function for separator nodes. If omitted or\n\
+    ``None``, ``self.separate_name`` is looked up and called if it\n\
+    exists.\n\
+\n\
+:Exceptions:\n\
+  - `ValueError` : `batch` is smaller than 1");
+
+static PyObject *
+TDI_NodeType_repeat_batch(tdi_node_t *self, PyObject *args, PyObject *kwds)
+{
+    return node_repeat(self, args, kwds, "Node.repeat_batch", 1);
+}
+
+PyDoc_STRVAR(TDI_NodeType_repeat_map__doc__,
+"repeat_map(self, itemlist, mapping, separate=None)\n\
+\n\
+Repeat the snippet ``len(list(itemlist))`` times, filled from a mapping\n\
+\n\
+This is a shortcut for the common case of a repeat callback, which\n\
+only sets the contents of some subnodes from the item. The mapping\n\
+names the direct subnodes and where their content comes from: either\n\
+a field looked up in the item (``item[field]``) or a callable, which\n\
+is called with the item. The contents are escaped like assignments\n\
+to `content`.\n\
+\n\
+The repeated markup is compiled once and filled by the renderer.\n\
+No nodes are created for the items and the model is not asked for\n\
+the repeated nodes or their subnodes. Mapped subnodes, which do not\n\
+exist, raise a `NodeNotFoundError` while rendering.\n\
+\n\
+Example:\n\
+\n\
+>>> def render_row(self, node):\n\
+>>>     node.repeat_map(rows, {\n\
+>>>         'name': 'name',\n\
+>>>         'size': lambda row: '%d KB' % (row['size'] // 1024),\n\
+>>>     })\n\
+\n\
+:Parameters:\n\
+  `itemlist` : iterable\n\
+    The items to iterate over\n\
+\n\
+  `mapping` : ``dict``\n\
+    Content mapping (``{'subnode name': field or callable, ...}``)\n\
+\n\
+  `separate` : ``callable``\n\
+    Alternative callback function for separator nodes. If omitted or\n\
+    ``None``, ``self.separate_name`` is looked up and called if it\n\
+    exists.");
+
+static PyObject *
+TDI_NodeType_repeat_map(tdi_node_t *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"itemlist", "mapping", "separate", NULL};
+    PyObject *itemlist, *mapping, *separate = Py_None, *cbargs;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OO|O", kwlist,
+                                     &itemlist, &mapping, &separate))
+        return NULL;
+
+    if (!(itemlist = PyObject_GetIter(itemlist)))
+        return NULL;
+    mapping = PyObject_CallFunctionObjArgs((PyObject *)&PyDict_Type,
+                                           mapping, NULL);
+    if (!mapping)
+        goto error_itemlist;
+
+    if (!(cbargs = PyTuple_New(6)))
+        goto error_mapping;
+
+    Py_INCREF(Py_None);
+    PyTuple_SET_ITEM(cbargs, 0, Py_None);
+    PyTuple_SET_ITEM(cbargs, 1, itemlist);
+    Py_INCREF(tdi_g_empty_tuple);
+    PyTuple_SET_ITEM(cbargs, 2, tdi_g_empty_tuple);
+    Py_INCREF(separate);
+    PyTuple_SET_ITEM(cbargs, 3, separate);
+    Py_INCREF(Py_None);
+    PyTuple_SET_ITEM(cbargs, 4, Py_None);
+    PyTuple_SET_ITEM(cbargs, 5, mapping);
 
     Py_CLEAR(self->overlays);
     self->overlays = cbargs;
@@ -220,8 +389,15 @@ TDI_NodeType_repeat(tdi_node_t *self, PyObject *args, PyObject *kwds)
     self->kind = PROC_NODE;
 
     Py_RETURN_NONE;
+
+error_mapping:
+    Py_DECREF(mapping);
+error_itemlist:
+    Py_DECREF(itemlist);
+    return NULL;
 }
 
+
 PyDoc_STRVAR(TDI_NodeType_remove__doc__,
 "remove(self)\n\
 \n\
@@ -494,7 +670,7 @@ TDI_NodeType_render(tdi_node_t *self, PyObject *args, PyObject *kwds)
     /* render */
     if (!(collect = PyList_New(0)))
         goto error_mynode;
-    if (!(iter = tdi_render_iterator_new(mynode, model)))
+    if (!(iter = tdi_render_iterator_new(mynode, model, NULL, NULL, 0)))
         goto error_collect;
 
     while ((tmp = PyIter_Next(iter))) {
@@ -614,6 +790,14 @@ static struct PyMethodDef TDI_NodeType_methods[] = {
      (PyCFunction)TDI_NodeType_repeat,      METH_KEYWORDS,
      TDI_NodeType_repeat__doc__},
 
+    {"repeat_batch",
+     (PyCFunction)TDI_NodeType_repeat_batch, METH_KEYWORDS,
+     TDI_NodeType_repeat_batch__doc__},
+
+    {"repeat_map",
+     (PyCFunction)TDI_NodeType_repeat_map,  METH_KEYWORDS,
+     TDI_NodeType_repeat_map__doc__},
+
     {"remove",
      (PyCFunction)TDI_NodeType_remove,      METH_NOARGS,
      TDI_NodeType_remove__doc__},
@@ -737,6 +921,10 @@ TDI_NodeType_setitem(tdi_node_t *self, PyObject *key, PyObject *value)
     tdi_attr_t *item;
     int subresult;
 
+    if (tdi_node_unshare(self) == -1)
+        return -1;
+    Py_CLEAR(self->starttag);
+
     if (!(key = ENCODE_NAME(self, key)))
         return -1;
 
@@ -987,9 +1175,11 @@ TDI_NodeType_traverse(tdi_node_t *self, visitproc visit, void *arg)
     TDI_OVERLAY_VISIT(self->overlay);
     TDI_CONTENT_VISIT(self->content);
     Py_VISIT(self->complete);
+    Py_VISIT(self->protos);
     Py_VISIT(self->tagname);
     Py_VISIT(self->attr);
     Py_VISIT(self->endtag);
+    Py_VISIT(self->starttag);
     Py_VISIT(self->name);
     Py_VISIT((PyObject *)self->encoder);
     Py_VISIT((PyObject *)self->decoder);
@@ -18,6 +18,7 @@
 #include "cext.h"
 #include "tdi_exceptions.h"
 #include "tdi_content.h"
+#include "tdi_copy.h"
 #include "tdi_globals.h"
 #include "tdi_util.h"
 
@@ -103,6 +104,10 @@ TDI_RawNodeType_setitem(rawnodeobject *self, PyObject *key, PyObject *value)
     tdi_attr_t *item;
     int subresult;
 
+    if (tdi_node_unshare(self->node) == -1)
+        return -1;
+    Py_CLEAR(self->node->starttag);
+
     if (!(key = ENCODE_NAME(self->node, key)))
         return -1;
 
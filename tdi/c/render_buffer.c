@@ -0,0 +1,411 @@
+/*
+ * Copyright 2006 - 2016
+ * Andr\xe9 Malo or his licensors, as applicable
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include "cext.h"
+
+#include "obj_render_buffer.h"
+
+/*
+ * Default block size (see tdi.render_buffer.DEFAULT_BUFSIZE)
+ */
+#define TDI_RENDER_BUFSIZE (8192)
+
+/*
+ * Minimal buffer allocation
+ */
+#define TDI_RENDER_BUFFER_MIN (256)
+
+
+/* ----------------- BEGIN TDI_RenderBufferType DEFINITION ----------------- */
+
+typedef struct {
+    PyObject_HEAD
+
+    PyObject   *write;    /* write function (or NULL) */
+    PyObject   *buffer;   /* buffer string (or NULL) */
+    Py_ssize_t size;      /* number of buffered bytes */
+    Py_ssize_t bufsize;   /* block size */
+} tdi_render_buffer_t;
+
+
+/*
+ * Make sure, the buffer can take length more bytes and may be modified
+ *
+ * The buffer string is modified in place, unless it's referenced
+ * elsewhere (after getvalue()).
+ */
+static int
+render_buffer_reserve(tdi_render_buffer_t *self, Py_ssize_t length)
+{
+    PyObject *tmp;
+    Py_ssize_t need, capacity;
+    int owned;
+
+    if (length > PY_SSIZE_T_MAX - self->size) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    need = self->size + length;
+    owned = self->buffer
+        && Py_REFCNT(self->buffer) == 1
+        && !PyString_CHECK_INTERNED(self->buffer);
+    capacity = self->buffer ? PyString_GET_SIZE(self->buffer) : 0;
+    if (owned && capacity >= need)
+        return 0;
+
+    if (capacity < TDI_RENDER_BUFFER_MIN)
+        capacity = TDI_RENDER_BUFFER_MIN;
+    while (capacity < need)
+        capacity = (capacity > PY_SSIZE_T_MAX / 2) ? need : capacity * 2;
+
+    if (owned) {
+        if (_PyString_Resize(&self->buffer, capacity) == -1) {
+            self->size = 0;
+            return -1;
+        }
+        return 0;
+    }
+
+    if (!(tmp = PyString_FromStringAndSize(NULL, capacity)))
+        return -1;
+    if (self->size)
+        (void)memcpy(PyString_AS_STRING(tmp),
+                     PyString_AS_STRING(self->buffer), (size_t)self->size);
+    Py_CLEAR(self->buffer);
+    self->buffer = tmp;
+
+    return 0;
+}
+
+
+/*
+ * Pass data to the write function
+ */
+static int
+render_buffer_write(tdi_render_buffer_t *self, PyObject *data)
+{
+    PyObject *tmp;
+
+    if (!(tmp = PyObject_CallFunctionObjArgs(self->write, data, NULL)))
+        return -1;
+    Py_DECREF(tmp);
+
+    return 0;
+}
+
+
+/*
+ * Pass the buffered data to the write function (if there is one)
+ */
+static int
+render_buffer_flush(tdi_render_buffer_t *self)
+{
+    PyObject *data;
+    int res;
+
+    if (!self->write || !self->size)
+        return 0;
+
+    data = PyString_FromStringAndSize(PyString_AS_STRING(self->buffer),
+                                      self->size);
+    if (!data)
+        return -1;
+    self->size = 0;
+    res = render_buffer_write(self, data);
+    Py_DECREF(data);
+
+    return res;
+}
+
+
+/*
+ * Append a chunk
+ */
+static int
+render_buffer_append(tdi_render_buffer_t *self, PyObject *data)
+{
+    Py_ssize_t length;
+
+    if (!PyString_Check(data)) {
+        PyErr_SetString(PyExc_TypeError, "Rendered chunks must be strings");
+        return -1;
+    }
+    if (!(length = PyString_GET_SIZE(data)))
+        return 0;
+
+    /* Large chunks are passed through, if nothing is buffered */
+    if (self->write && !self->size && length >= self->bufsize)
+        return render_buffer_write(self, data);
+
+    if (render_buffer_reserve(self, length) == -1)
+        return -1;
+    (void)memcpy(PyString_AS_STRING(self->buffer) + self->size,
+                 PyString_AS_STRING(data), (size_t)length);
+    ((PyStringObject *)self->buffer)->ob_shash = -1;
+    self->size += length;
+
+    if (self->write && self->size >= self->bufsize)
+        return render_buffer_flush(self);
+
+    return 0;
+}
+
+
+PyDoc_STRVAR(TDI_RenderBufferType_write__doc__,
+"write(self, data)\n\
+\n\
+Append a chunk\n\
+\n\
+:Parameters:\n\
+  `data` : ``str``\n\
+    The chunk");
+
+static PyObject *
+TDI_RenderBufferType_write(tdi_render_buffer_t *self, PyObject *data)
+{
+    if (render_buffer_append(self, data) == -1)
+        return NULL;
+
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(TDI_RenderBufferType_extend__doc__,
+"extend(self, chunks)\n\
+\n\
+Append all chunks of an iterable\n\
+\n\
+:Parameters:\n\
+  `chunks` : iterable\n\
+    The chunks (like the result of `tdi.nodetree.Root.render`)");
+
+static PyObject *
+TDI_RenderBufferType_extend(tdi_render_buffer_t *self, PyObject *chunks)
+{
+    PyObject *iter, *chunk;
+    int res;
+
+    if (!(iter = PyObject_GetIter(chunks)))
+        return NULL;
+
+    while ((chunk = PyIter_Next(iter))) {
+        res = render_buffer_append(self, chunk);
+        Py_DECREF(chunk);
+        if (res == -1)
+            break;
+    }
+    Py_DECREF(iter);
+    if (PyErr_Occurred())
+        return NULL;
+
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(TDI_RenderBufferType_flush__doc__,
+"flush(self)\n\
+\n\
+Pass the buffered data to the write function (if there is one)");
+
+static PyObject *
+TDI_RenderBufferType_flush(tdi_render_buffer_t *self, PyObject *args)
+{
+    if (render_buffer_flush(self) == -1)
+        return NULL;
+
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(TDI_RenderBufferType_getvalue__doc__,
+"getvalue(self)\n\
+\n\
+Fetch the buffered data\n\
+\n\
+The data stays in the buffer.\n\
+\n\
+:Return: The buffered data\n\
+:Rtype: ``str``");
+
+static PyObject *
+TDI_RenderBufferType_getvalue(tdi_render_buffer_t *self, PyObject *args)
+{
+    if (!self->size)
+        return PyString_FromStringAndSize("", 0);
+
+    /* Hand out the buffer itself, it's copied on the next modification */
+    if (PyString_GET_SIZE(self->buffer) != self->size) {
+        if (Py_REFCNT(self->buffer) == 1
+            && !PyString_CHECK_INTERNED(self->buffer)) {
+            if (_PyString_Resize(&self->buffer, self->size) == -1) {
+                self->size = 0;
+                return NULL;
+            }
+        }
+        else {
+            return PyString_FromStringAndSize(PyString_AS_STRING(self->buffer),
+                                              self->size);
+        }
+    }
+
+    Py_INCREF(self->buffer);
+    return self->buffer;
+}
+
+static struct PyMethodDef TDI_RenderBufferType_methods[] = {
+    {"write",
+     (PyCFunction)TDI_RenderBufferType_write,       METH_O,
+     TDI_RenderBufferType_write__doc__},
+
+    {"extend",
+     (PyCFunction)TDI_RenderBufferType_extend,      METH_O,
+     TDI_RenderBufferType_extend__doc__},
+
+    {"flush",
+     (PyCFunction)TDI_RenderBufferType_flush,       METH_NOARGS,
+     TDI_RenderBufferType_flush__doc__},
+
+    {"getvalue",
+     (PyCFunction)TDI_RenderBufferType_getvalue,    METH_NOARGS,
+     TDI_RenderBufferType_getvalue__doc__},
+
+    {NULL, NULL}  /* Sentinel */
+};
+
+static Py_ssize_t
+TDI_RenderBufferType_len(tdi_render_buffer_t *self)
+{
+    return self->size;
+}
+
+static PySequenceMethods TDI_RenderBufferType_as_sequence = {
+    (lenfunc)TDI_RenderBufferType_len,  /* sq_length */
+};
+
+static PyObject *
+TDI_RenderBufferType_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"write", "bufsize", NULL};
+    PyObject *write = NULL, *bufsize = NULL;
+    tdi_render_buffer_t *self;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|OO", kwlist,
+                                     &write, &bufsize))
+        return NULL;
+
+    if (!(self = GENERIC_ALLOC(type)))
+        return NULL;
+
+    self->bufsize = TDI_RENDER_BUFSIZE;
+    if (bufsize && bufsize != Py_None) {
+        self->bufsize = PyInt_AsSsize_t(bufsize);
+        if (PyErr_Occurred())
+            goto error;
+    }
+    if (write && write != Py_None) {
+        Py_INCREF(write);
+        self->write = write;
+    }
+
+    return (PyObject *)self;
+
+error:
+    Py_DECREF(self);
+    return NULL;
+}
+
+static int
+TDI_RenderBufferType_traverse(tdi_render_buffer_t *self, visitproc visit,
+                              void *arg)
+{
+    Py_VISIT(self->write);
+
+    return 0;
+}
+
+static int
+TDI_RenderBufferType_clear(tdi_render_buffer_t *self)
+{
+    Py_CLEAR(self->write);
+    Py_CLEAR(self->buffer);
+    self->size = 0;
+
+    return 0;
+}
+
+DEFINE_GENERIC_DEALLOC(TDI_RenderBufferType)
+
+PyDoc_STRVAR(TDI_RenderBufferType__doc__,
+"RenderBuffer(write=None, bufsize=None)\n\
+\n\
+Output buffer for rendered chunks\n\
+\n\
+The buffer behaves like a (write-only) stream, so it can be passed to\n\
+`tdi.template.Template.render` as well.\n\
+\n\
+:Parameters:\n\
+  `write` : ``callable``\n\
+    Write function, which takes a string. If omitted or ``None``,\n\
+    the buffer keeps all data until it's fetched with `getvalue`.\n\
+\n\
+  `bufsize` : ``int``\n\
+    Block size. The buffer is passed to `write` as soon as it\n\
+    contains at least this number of bytes. If omitted or ``None``,\n\
+    `DEFAULT_BUFSIZE` is applied.");
+
+PyTypeObject TDI_RenderBufferType = {
+    PyObject_HEAD_INIT(NULL)
+    0,                                                  /* ob_size */
+    EXT_MODULE_PATH ".RenderBuffer",                    /* tp_name */
+    sizeof(tdi_render_buffer_t),                        /* tp_basicsize */
+    0,                                                  /* tp_itemsize */
+    (destructor)TDI_RenderBufferType_dealloc,           /* tp_dealloc */
+    0,                                                  /* tp_print */
+    0,                                                  /* tp_getattr */
+    0,                                                  /* tp_setattr */
+    0,                                                  /* tp_compare */
+    0,                                                  /* tp_repr */
+    0,                                                  /* tp_as_number */
+    &TDI_RenderBufferType_as_sequence,                  /* tp_as_sequence */
+    0,                                                  /* tp_as_mapping */
+    0,                                                  /* tp_hash */
+    0,                                                  /* tp_call */
+    0,                                                  /* tp_str */
+    0,                                                  /* tp_getattro */
+    0,                                                  /* tp_setattro */
+    0,                                                  /* tp_as_buffer */
+    Py_TPFLAGS_HAVE_CLASS                               /* tp_flags */
+    | Py_TPFLAGS_BASETYPE
+    | Py_TPFLAGS_HAVE_GC,
+    TDI_RenderBufferType__doc__,                        /* tp_doc */
+    (traverseproc)TDI_RenderBufferType_traverse,        /* tp_traverse */
+    (inquiry)TDI_RenderBufferType_clear,                /* tp_clear */
+    0,                                                  /* tp_richcompare */
+    0,                                                  /* tp_weaklistoffset */
+    0,                                                  /* tp_iter */
+    0,                                                  /* tp_iternext */
+    TDI_RenderBufferType_methods,                       /* tp_methods */
+    0,                                                  /* tp_members */
+    0,                                                  /* tp_getset */
+    0,                                                  /* tp_base */
+    0,                                                  /* tp_dict */
+    0,                                                  /* tp_descr_get */
+    0,                                                  /* tp_descr_set */
+    0,                                                  /* tp_dictoffset */
+    0,                                                  /* tp_init */
+    0,                                                  /* tp_alloc */
+    TDI_RenderBufferType_new                            /* tp_new */
+};
+
+/* ------------------ END TDI_RenderBufferType DEFINITION ------------------ */
@@ -38,6 +38,9 @@ TDI_RenderIteratorType_traverse(tdi_render_t *self, visitproc visit,
     Py_VISIT(self->model);
     Py_VISIT(self->endtag);
     Py_VISIT(self->content);
+    Py_VISIT(self->fragments);
+    Py_VISIT(self->owner);
+    Py_VISIT(self->uncached);
     TDI_RENDER_STACK_VISIT(self->stack);
 
     return 0;
@@ -51,6 +54,9 @@ TDI_RenderIteratorType_clear(tdi_render_t *self)
     Py_CLEAR(self->model);
     Py_CLEAR(self->endtag);
     Py_CLEAR(self->content);
+    Py_CLEAR(self->fragments);
+    Py_CLEAR(self->owner);
+    Py_CLEAR(self->uncached);
     TDI_RENDER_STACK_CLEAR(self->stack);
 
     return 0;
@@ -148,7 +154,8 @@ error:
  * Create new render iterator object
  */
 PyObject *
-tdi_render_iterator_new(tdi_node_t *startnode, tdi_adapter_t *model)
+tdi_render_iterator_new(tdi_node_t *startnode, tdi_adapter_t *model,
+                        PyObject *fragments, PyObject *owner, int events)
 {
     PyObject *iter;
     tdi_render_t *self;
@@ -158,7 +165,7 @@ tdi_render_iterator_new(tdi_node_t *startnode, tdi_adapter_t *model)
 
     if (startnode->flags & NODE_ROOT && startnode->content) {
         self->stage = TDI_RE_STAGE_ONLY_CONTENT;
-        iter = tdi_adapter_emit_escaped(model) ?
+        iter = (events || tdi_adapter_emit_escaped(model)) ?
             (startnode->content->with_escapes) : (startnode->content->clean);
         Py_INCREF(iter);
         self->model = iter;
@@ -168,6 +175,13 @@ tdi_render_iterator_new(tdi_node_t *startnode, tdi_adapter_t *model)
         Py_INCREF((PyObject *)model);
         self->model = (PyObject *)model;
         self->emit_escaped = tdi_adapter_emit_escaped(model);
+        self->events = events;
+        if (fragments && fragments != Py_None) {
+            Py_INCREF(fragments);
+            self->fragments = fragments;
+            Py_INCREF(owner);
+            self->owner = owner;
+        }
         if (!(iter = find_rootnodes(startnode, model)))
             goto error;
         if (tdi_render_stack_push(&self->stack, iter, NULL, 0) == -1)
@@ -180,3 +194,48 @@ error:
     Py_DECREF(self);
     return NULL;
 }
+
+
+/*
+ * Create new render iterator object for a fragment
+ *
+ * The node is rendered as is (it's not copied) and not looked up in the
+ * fragment cache again.
+ */
+PyObject *
+tdi_render_fragment_new(tdi_render_t *parent, tdi_node_t *node)
+{
+    PyObject *list, *iter;
+    tdi_render_t *self;
+
+    if (!(list = PyList_New(1)))
+        return NULL;
+    Py_INCREF(node);
+    PyList_SET_ITEM(list, 0, (PyObject *)node);
+    iter = PyObject_GetIter(list);
+    Py_DECREF(list);
+    if (!iter)
+        return NULL;
+
+    if (!(self = GENERIC_ALLOC(&TDI_RenderIteratorType))) {
+        Py_DECREF(iter);
+        return NULL;
+    }
+
+    self->stage = TDI_RE_STAGE_BEGIN;
+    Py_INCREF(parent->model);
+    self->model = parent->model;
+    self->emit_escaped = parent->emit_escaped;
+    Py_INCREF(parent->fragments);
+    self->fragments = parent->fragments;
+    Py_INCREF(parent->owner);
+    self->owner = parent->owner;
+    Py_INCREF(node);
+    self->uncached = (PyObject *)node;
+    if (tdi_render_stack_push(&self->stack, iter, NULL, 0) == -1) {
+        Py_DECREF(self);
+        return NULL;
+    }
+
+    return (PyObject *)self;
+}
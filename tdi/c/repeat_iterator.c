@@ -36,6 +36,11 @@ TDI_RepeatIteratorType_traverse(tdi_repeat_t *self, visitproc visit,
     Py_VISIT(self->sepmodel);
     Py_VISIT(self->item);
     Py_VISIT(self->last_item);
+    Py_VISIT(self->pending);
+    Py_VISIT(self->mapping);
+    Py_VISIT(self->rowparts);
+    Py_VISIT(self->erowparts);
+    Py_VISIT(self->rowslots);
 
     return 0;
 }
@@ -52,6 +57,11 @@ TDI_RepeatIteratorType_clear(tdi_repeat_t *self)
     Py_CLEAR(self->sepmodel);
     Py_CLEAR(self->item);
     Py_CLEAR(self->last_item);
+    Py_CLEAR(self->pending);
+    Py_CLEAR(self->mapping);
+    Py_CLEAR(self->rowparts);
+    Py_CLEAR(self->erowparts);
+    Py_CLEAR(self->rowslots);
 
     return 0;
 }
@@ -100,11 +110,13 @@ PyTypeObject TDI_RepeatIteratorType = {
 PyObject *
 tdi_repeat_iterator_new(tdi_node_t *node, PyObject *callback,
                         PyObject *itemlist, PyObject *fixed,
-                        PyObject *separate)
+                        PyObject *separate, Py_ssize_t batch,
+                        PyObject *mapping)
 {
     tdi_repeat_t *self;
 
     if (!(self = GENERIC_ALLOC(&TDI_RepeatIteratorType))) {
+        Py_DECREF(mapping);
         Py_DECREF(separate);
         Py_DECREF(fixed);
         Py_DECREF(itemlist);
@@ -121,6 +133,11 @@ tdi_repeat_iterator_new(tdi_node_t *node, PyObject *callback,
         Py_DECREF(separate);
     else
         self->sepmodel = separate;
+    self->batch = batch;
+    if (mapping == Py_None)
+        Py_DECREF(mapping);
+    else
+        self->mapping = mapping;
     self->stage = TDI_RI_STAGE_BEGIN;
 
     return (PyObject *)self;
@@ -18,9 +18,11 @@
 #include "cext.h"
 
 #include "tdi_content.h"
+#include "tdi_dump.h"
 #include "tdi_exceptions.h"
 #include "tdi_finalize.h"
 #include "tdi_overlay.h"
+#include "tdi_render.h"
 #include "tdi_repr.h"
 
 #include "obj_avoid_gc.h"
@@ -128,13 +130,160 @@ findnode__resolve(PyObject *name, tdi_node_t **current)
     return 1;
 }
 
+/*
+ * Add node to the candidate list, if it's not there already
+ */
+static int
+findnode__add(PyObject *candidates, tdi_node_t *node)
+{
+    Py_ssize_t idx;
+
+    for (idx = 0; idx < PyList_GET_SIZE(candidates); ++idx) {
+        if (PyList_GET_ITEM(candidates, idx) == (PyObject *)node)
+            return 0;
+    }
+    return PyList_Append(candidates, (PyObject *)node);
+}
+
+/*
+ * Collect all nodes matching name below current (in findnode order: a
+ * matching child first, the others breadth-first)
+ */
+static PyObject *
+findnode__candidates(tdi_node_t *current, PyObject *name)
+{
+    PyObject *result, *next, *process;
+    tdi_node_t *node, *found;
+    Py_ssize_t idx, j;
+    int res;
+
+    if (!(result = PyList_New(0)))
+        return NULL;
+    if (!(next = PyList_New(0)))
+        goto error;
+    if (PyList_Append(next, (PyObject *)current) == -1)
+        goto error_next;
+
+    while (PyList_GET_SIZE(next) > 0) {
+        process = next;
+        if (!(next = PyList_New(0)))
+            goto error_process;
+        for (idx = 0; idx < PyList_GET_SIZE(process); ++idx) {
+            node = (tdi_node_t *)PyList_GET_ITEM(process, idx);
+            found = node;
+            Py_INCREF(found);
+            if ((res = findnode__resolve(name, &found)) == -1) {
+                Py_DECREF(found);
+                goto error_process;
+            }
+            res = res ? findnode__add(result, found) : 0;
+            Py_DECREF(found);
+            if (res == -1)
+                goto error_process;
+
+            /* other children with the same name */
+            for (j = 0; j < PyList_GET_SIZE(node->nodes); ++j) {
+                found = (tdi_node_t *)PyList_GET_ITEM(node->nodes, j);
+                if (found->kind != PROC_NODE || !found->name)
+                    continue;
+                if (PyObject_Cmp(found->name, name, &res) == -1)
+                    goto error_process;
+                if (res == 0 && findnode__add(result, found) == -1)
+                    goto error_process;
+            }
+
+            for (j = 0; j < PyList_GET_SIZE(node->nodes); ++j) {
+                found = (tdi_node_t *)PyList_GET_ITEM(node->nodes, j);
+                if (found->kind != PROC_NODE)
+                    continue;
+                if (PyList_Append(next, (PyObject *)found) == -1)
+                    goto error_process;
+            }
+        }
+        Py_DECREF(process);
+    }
+    Py_DECREF(next);
+
+    return result;
+
+error_process:
+    Py_DECREF(process);
+error_next:
+    Py_XDECREF(next);
+error:
+    Py_DECREF(result);
+    return NULL;
+}
+
+/*
+ * Find a node by names, starting at name_idx and trying all branches
+ *
+ * Failed (node, name_idx) combinations are remembered in the failed set,
+ * so they are not searched again.
+ *
+ * Returns NULL without exception if the node was not found.
+ */
+static tdi_node_t *
+findnode__backtrack(tdi_node_t *current, PyObject *names,
+                    Py_ssize_t name_idx, PyObject *failed)
+{
+    PyObject *candidates, *key, *ptr;
+    tdi_node_t *result = NULL;
+    Py_ssize_t idx;
+    int res;
+
+    if (name_idx == PyList_GET_SIZE(names)) {
+        Py_INCREF(current);
+        return current;
+    }
+
+    if (!(ptr = PyLong_FromVoidPtr(current)))
+        return NULL;
+    key = Py_BuildValue("(On)", ptr, name_idx);
+    Py_DECREF(ptr);
+    if (!key)
+        return NULL;
+    if ((res = PySet_Contains(failed, key))) {
+        /* Either known to fail (1) or error (-1) */
+        Py_DECREF(key);
+        return NULL;
+    }
+
+    if (Py_EnterRecursiveCall(" while looking for a node")) {
+        Py_DECREF(key);
+        return NULL;
+    }
+
+    candidates = findnode__candidates(current,
+                                      PyList_GET_ITEM(names, name_idx));
+    if (candidates) {
+        for (idx = 0; idx < PyList_GET_SIZE(candidates); ++idx) {
+            result = findnode__backtrack(
+                (tdi_node_t *)PyList_GET_ITEM(candidates, idx),
+                names, name_idx + 1, failed
+            );
+            if (result || PyErr_Occurred())
+                break;
+        }
+        Py_DECREF(candidates);
+    }
+
+    Py_LeaveRecursiveCall();
+    /* A failing PySet_Add leaves its exception set for the caller */
+    if (!result && !PyErr_Occurred())
+        (void)PySet_Add(failed, key);
+    Py_DECREF(key);
+    return result;
+}
+
 /*
  * Find a node by string (x.y.z). The chain is only loosely bound.
  */
 static tdi_node_t *
-findnode(tdi_node_t *current, PyObject *nodename)
+findnode(tdi_node_t *root, PyObject *nodename)
 {
-    PyObject *names, *name, *next, *process;
+    PyObject *names, *name, *next, *process, *failed;
+    tdi_node_t *current = root;
     Py_ssize_t name_idx, names_len, process_len, process_idx, j, jlen;
     int res;
 
@@ -192,8 +341,15 @@ findnode(tdi_node_t *current, PyObject *nodename)
     }
 
     if (name_idx != names_len) {
-        PyErr_SetObject(TDI_E_NodeNotFoundError, nodename);
-        goto error_current;
+        if (!(failed = PySet_New(NULL)))
+            goto error_current;
+        current = findnode__backtrack(root, names, 0, failed);
+        Py_DECREF(failed);
+        if (!current) {
+            if (!PyErr_Occurred())
+                PyErr_SetObject(TDI_E_NodeNotFoundError, nodename);
+            goto error_current;
+        }
     }
     Py_DECREF(names);
     return current;
@@ -208,9 +364,48 @@ error_current:
     return NULL;
 }
 
+/* Maximum number of resolved start nodes remembered per tree */
+#define TDI_STARTNODES_SIZE (1024)
+
+/*
+ * Find a node by string and remember the result in the tree
+ *
+ * Only found nodes are remembered, up to TDI_STARTNODES_SIZE addresses.
+ */
+static tdi_node_t *
+findnode_memo(tdi_node_t *root, PyObject *nodename)
+{
+    tdi_node_t *node;
+
+    if (root->startnodes
+        && (node = (tdi_node_t *)PyDict_GetItem(root->startnodes,
+                                                nodename))) {
+        Py_INCREF(node);
+        return node;
+    }
+    if (PyErr_Occurred())
+        return NULL;
+
+    if (!(node = findnode(root, nodename)))
+        return NULL;
+
+    if (!root->startnodes && !(root->startnodes = PyDict_New()))
+        goto error;
+    if (PyDict_Size(root->startnodes) < TDI_STARTNODES_SIZE
+        && PyDict_SetItem(root->startnodes, nodename,
+                          (PyObject *)node) == -1)
+        goto error;
+
+    return node;
+
+error:
+    Py_DECREF(node);
+    return NULL;
+}
+
 
 PyDoc_STRVAR(TDI_RootNodeType_render__doc__,
-"render(self, model, startnode=None)\n\
+"render(self, model, startnode=None, cache=None)\n\
 \n\
 Render the tree into chunks, calling `model` for input\n\
 \n\
@@ -224,15 +419,25 @@ Render the tree into chunks, calling `model` for input\n\
     would render the ``c`` node.) The notation does not describe a\n\
     strict node chain, though. Between to parts of a node chain may\n\
     be gaps in the tree. The algorithm looks out for the first\n\
-    matching node. It does no backtracking and so does not cover all\n\
-    branches (yet?), but that works fine for realistic cases :). A\n\
-    non-working example would be (searching for a.b.c)::\n\
+    matching node and backtracks if the chain cannot be completed\n\
+    from there. So the following example works as well (searching\n\
+    for a.b.c)::\n\
 \n\
       *\n\
       +- a\n\
       |  `- b - d\n\
       `- a\n\
          `- b - c\n\
+\n\
+    The resolved nodes are remembered per tree (up to 1024\n\
+    addresses), so each address is only searched once.\n\
+\n\
+  `cache` : `tdi.render_cache.RenderCache`\n\
+    Fragment cache. If omitted or ``None``, no fragments are cached.\n\
+    Otherwise nodes are rendered from the cache, if the model\n\
+    provides a ``cache_<name>`` method for them, which returns a\n\
+    hashable key describing the rendered node (or ``None`` if the\n\
+    node should not be cached).\n\
 \n\
 :Return: Rendered chunks\n\
 :Rtype: iterable");
@@ -240,12 +445,12 @@ Render the tree into chunks, calling `model` for input\n\
 static PyObject *
 TDI_RootNodeType_render(tdi_node_t *self, PyObject *args, PyObject *kwds)
 {
-    static char *kwlist[] = {"model", "startnode", NULL};
-    PyObject *result, *model, *startnode = NULL;
+    static char *kwlist[] = {"model", "startnode", "cache", NULL};
+    PyObject *result, *model, *startnode = NULL, *cache = NULL;
     tdi_node_t *rootnode;
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|O", kwlist,
-                                     &model, &startnode))
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|OO", kwlist,
+                                     &model, &startnode, &cache))
         return NULL;
 
     if (!(self->flags & NODE_FINALIZED)) {
@@ -265,7 +470,7 @@ TDI_RootNodeType_render(tdi_node_t *self, PyObject *args, PyObject *kwds)
             Py_DECREF(model);
             return NULL;
         }
-        rootnode = findnode(self, startnode);
+        rootnode = findnode_memo(self, startnode);
         Py_DECREF(startnode);
         if (!rootnode) {
             Py_DECREF(model);
@@ -276,7 +481,8 @@ TDI_RootNodeType_render(tdi_node_t *self, PyObject *args, PyObject *kwds)
         rootnode = self;
         Py_INCREF(rootnode);
     }
-    result = tdi_render_iterator_new(rootnode, (tdi_adapter_t *)model);
+    result = tdi_render_iterator_new(rootnode, (tdi_adapter_t *)model,
+                                     cache, (PyObject *)self, 0);
     Py_DECREF(rootnode);
     Py_DECREF(model);
 
@@ -284,6 +490,69 @@ TDI_RootNodeType_render(tdi_node_t *self, PyObject *args, PyObject *kwds)
 }
 
 
+PyDoc_STRVAR(TDI_RootNodeType_render_events__doc__,
+"render_events(self, model)\n\
+\n\
+Render the tree into build events, calling `model` for input\n\
+\n\
+The events describe the rendered tree instead of its markup, so a\n\
+new tree can be built from them without parsing (see\n\
+`tdi.factory.Factory.from_events`). There are four kinds of\n\
+events:\n\
+\n\
+``content``\n\
+  Node content as a string (encoded, including escape sequences).\n\
+  It may contain markup and is parsed again.\n\
+\n\
+``(clean, with_escapes)``\n\
+  Template text (the text itself and the text including escape\n\
+  sequences)\n\
+\n\
+``(tagname, attr, closed, starttag)``\n\
+  Start of an element (the tag name, the attribute list\n\
+  ``((name, value), ...)``, the closed flag and the encoded\n\
+  starttag)\n\
+\n\
+``(endtag,)``\n\
+  End of the last started element (``endtag`` is the encoded\n\
+  endtag, maybe empty). Every start event is followed by an end\n\
+  event, even for closed elements.\n\
+\n\
+:Parameters:\n\
+  `model` : `ModelAdapterInterface`\n\
+    The model object\n\
+\n\
+:Return: Build events\n\
+:Rtype: iterable");
+
+static PyObject *
+TDI_RootNodeType_render_events(tdi_node_t *self, PyObject *args,
+                               PyObject *kwds)
+{
+    static char *kwlist[] = {"model", NULL};
+    PyObject *result, *model;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O", kwlist, &model))
+        return NULL;
+
+    if (!(self->flags & NODE_FINALIZED)) {
+        PyErr_SetString(TDI_E_NodeTreeError,
+                        "The tree was not finalized yet");
+        return NULL;
+    }
+
+    Py_INCREF(model);
+    if (!(model = (PyObject *)tdi_adapter_adapt(model)))
+        return NULL;
+
+    result = tdi_render_iterator_new(self, (tdi_adapter_t *)model,
+                                     NULL, NULL, 1);
+    Py_DECREF(model);
+
+    return result;
+}
+
+
 PyDoc_STRVAR(TDI_RootNodeType_to_string__doc__,
 "to_string(self, verbose=False)\n\
 \n\
@@ -318,6 +587,87 @@ TDI_RootNodeType_to_string(tdi_node_t *self, PyObject *args, PyObject *kwds)
     return tdi_repr_do(self, is_verbose);
 }
 
+PyDoc_STRVAR(TDI_RootNodeType_dump__doc__,
+"dump(self)\n\
+\n\
+Marshallable representation of the tree\n\
+\n\
+The result consists of nested lists and tuples of strings, booleans\n\
+and ``None`` only. Use `load` to rebuild the tree.\n\
+\n\
+:Return: The tree representation\n\
+:Rtype: ``list``\n\
+\n\
+:Exceptions:\n\
+  - `NodeTreeError` : The tree was not finalized yet");
+
+static PyObject *
+TDI_RootNodeType_dump(tdi_node_t *self, PyObject *args)
+{
+    if (!(self->flags & NODE_FINALIZED)) {
+        PyErr_SetString(TDI_E_NodeTreeError,
+                        "The tree was not finalized yet");
+        return NULL;
+    }
+
+    return tdi_dump_do(self);
+}
+
+PyDoc_STRVAR(TDI_RootNodeType_reduce__doc__,
+"__reduce__(self)\n\
+\n\
+Reduce the tree for pickling\n\
+\n\
+Only finalized trees can be pickled. They are stored in their\n\
+`dump` representation. Encoder and decoder are recreated from their\n\
+class and encoding.\n\
+\n\
+:Return: Reconstructor and its arguments\n\
+:Rtype: ``tuple``\n\
+\n\
+:Exceptions:\n\
+  - `NodeTreeError` : The tree was not finalized yet");
+
+static PyObject *
+TDI_RootNodeType_reduce(tdi_node_t *self, PyObject *args)
+{
+    PyObject *module, *result;
+
+    if (!(module = PyImport_ImportModule("tdi.nodetree")))
+        return NULL;
+    result = PyObject_CallMethod(module, "_reduce", "(O)", self);
+    Py_DECREF(module);
+
+    return result;
+}
+
+PyDoc_STRVAR(TDI_RootNodeType_freeze__doc__,
+"freeze(self)\n\
+\n\
+Precompile the static markup of all template nodes\n\
+\n\
+Template nodes compile their markup lazily, when it's needed first.\n\
+Freezing the tree does that upfront, so rendering does not modify\n\
+the tree anymore. This is useful before forking worker processes.\n\
+\n\
+:Exceptions:\n\
+  - `NodeTreeError` : The tree was not finalized yet");
+
+static PyObject *
+TDI_RootNodeType_freeze(tdi_node_t *self, PyObject *args)
+{
+    if (!(self->flags & NODE_FINALIZED)) {
+        PyErr_SetString(TDI_E_NodeTreeError,
+                        "The tree was not finalized yet");
+        return NULL;
+    }
+
+    if (tdi_render_freeze(self) == -1)
+        return NULL;
+
+    Py_RETURN_NONE;
+}
+
 PyDoc_STRVAR(TDI_RootNodeType_finalize__doc__,
 "finalize(self, encoder)\n\
 \n\
@@ -490,10 +840,26 @@ static struct PyMethodDef TDI_RootNodeType_methods[] = {
      (PyCFunction)TDI_RootNodeType_render,      METH_KEYWORDS,
      TDI_RootNodeType_render__doc__},
 
+    {"render_events",
+     (PyCFunction)TDI_RootNodeType_render_events, METH_KEYWORDS,
+     TDI_RootNodeType_render_events__doc__},
+
     {"to_string",
      (PyCFunction)TDI_RootNodeType_to_string,   METH_KEYWORDS,
      TDI_RootNodeType_to_string__doc__},
 
+    {"dump",
+     (PyCFunction)TDI_RootNodeType_dump,        METH_NOARGS,
+     TDI_RootNodeType_dump__doc__},
+
+    {"__reduce__",
+     (PyCFunction)TDI_RootNodeType_reduce,      METH_NOARGS,
+     TDI_RootNodeType_reduce__doc__},
+
+    {"freeze",
+     (PyCFunction)TDI_RootNodeType_freeze,      METH_NOARGS,
+     TDI_RootNodeType_freeze__doc__},
+
     {"finalize",
      (PyCFunction)TDI_RootNodeType_finalize,    METH_KEYWORDS,
      TDI_RootNodeType_finalize__doc__},
@@ -518,6 +884,7 @@ TDI_RootNodeType_traverse(tdi_node_t *self, visitproc visit, void *arg)
     Py_VISIT(self->nodes);
     Py_VISIT(self->namedict);
     Py_VISIT(self->overlays);
+    Py_VISIT(self->startnodes);
     TDI_CONTENT_VISIT(self->content);
     Py_VISIT((PyObject *)self->encoder);
     Py_VISIT((PyObject *)self->decoder);
@@ -534,6 +901,7 @@ TDI_RootNodeType_clear(tdi_node_t *self)
     Py_CLEAR(self->nodes);
     Py_CLEAR(self->namedict);
     Py_CLEAR(self->overlays);
+    Py_CLEAR(self->startnodes);
     TDI_CONTENT_CLEAR(self->content);
     Py_CLEAR(self->encoder);
     Py_CLEAR(self->decoder);
@@ -16,6 +16,7 @@
  */
 
 #include "cext.h"
+#include "tdi_escape.h"
 #include "tdi_exceptions.h"
 #include "tdi_globals.h"
 
@@ -143,91 +144,34 @@ tdi_soup_encode_name(PyObject *name, PyObject *encoding)
     return name;
 }
 
+/*
+ * Escape tables
+ */
+static const char * const content_repl[] = {"&amp;", "&lt;", "&gt;"};
+static tdi_escape_t content_escape = {"&<>", content_repl};
+
+static const char * const attribute_repl[] = {
+    "&amp;", "&lt;", "&gt;", "&quot;"
+};
+static tdi_escape_t attribute_escape = {"&<>\"", attribute_repl};
+
+
 /*
  * HTML content encoder
  */
 PyObject *
 tdi_soup_encode_content(PyObject *value, PyObject *encoding)
 {
-    PyObject *tmp;
-    Py_ssize_t size, length;
-    char *cvalue, *ctmp;
-    int is_unicode = (PyUnicode_CheckExact(value) || PyUnicode_Check(value));
-    char c;
-
-    if (is_unicode) {
-        if (!(value = PyUnicode_AsUTF8String(value)))
-            return NULL;
-    }
-    else {
-        if (!PyString_CheckExact(value) && !PyString_Check(value)) {
-            PyErr_SetString(TDI_E_TemplateEncodingError,
-                            "Content encoder takes string or unicode");
-            return NULL;
-        }
-        Py_INCREF(value);
-    }
-
-    length = size = PyString_GET_SIZE(value);
-    cvalue = PyString_AS_STRING(value);
-    while (length--) {
-        switch (*cvalue++) {
-        case '&':
-            size += 4;  /* amp; */
-            break;
-        case '<':
-        case '>':
-            size += 3;  /* lt; or gt; */
-            break;
-        }
-    }
-    if (!(tmp = PyString_FromStringAndSize(NULL, size))) {
-        Py_DECREF(value);
+    if (PyUnicode_CheckExact(value) || PyUnicode_Check(value))
+        return tdi_escape_unicode(value, encoding, &content_escape,
+                                  "xmlcharrefreplace", 0);
+    else if (!PyString_CheckExact(value) && !PyString_Check(value)) {
+        PyErr_SetString(TDI_E_TemplateEncodingError,
+                        "Content encoder takes string or unicode");
         return NULL;
     }
-    ctmp = PyString_AS_STRING(tmp);
-    cvalue = PyString_AS_STRING(value);
-    length = PyString_GET_SIZE(value);
-    while (length--) {
-        switch (c = *cvalue++) {
-        case '&':
-            (void)memcpy(ctmp, "&amp;", 5);
-            ctmp += 5;
-            break;
-        case '<':
-            (void)memcpy(ctmp, "&lt;", 4);
-            ctmp += 4;
-            break;
-        case '>':
-            (void)memcpy(ctmp, "&gt;", 4);
-            ctmp += 4;
-            break;
-        default:
-            *ctmp++ = c;
-            break;
-        }
-    }
-    Py_DECREF(value);
-
-    if (is_unicode) {
-        const char *cencoding = PyString_AsString(encoding);
-        if (!cencoding) {
-            Py_DECREF(tmp);
-            return NULL;
-        }
-        value = PyUnicode_DecodeUTF8(PyString_AS_STRING(tmp),
-                                     PyString_GET_SIZE(tmp), "strict");
-        Py_DECREF(tmp);
-        if (!value)
-            return NULL;
-        tmp = PyUnicode_AsEncodedString(value, cencoding,
-                                        "xmlcharrefreplace");
-        Py_DECREF(value);
-        if (!tmp)
-            return NULL;
-    }
 
-    return tmp;
+    return tdi_escape_str(value, &content_escape, 0);
 }
 
 /*
@@ -236,95 +180,16 @@ tdi_soup_encode_content(PyObject *value, PyObject *encoding)
 PyObject *
 tdi_soup_encode_attribute(PyObject *value, PyObject *encoding)
 {
-    PyObject *tmp;
-    Py_ssize_t size, length;
-    char *cvalue, *ctmp;
-    int is_unicode = (PyUnicode_CheckExact(value) || PyUnicode_Check(value));
-    char c;
-
-    if (is_unicode) {
-        if (!(value = PyUnicode_AsUTF8String(value)))
-            return NULL;
-    }
-    else {
-        if (!PyString_CheckExact(value) && !PyString_Check(value)) {
-            PyErr_SetString(TDI_E_TemplateEncodingError,
-                            "Attribute encoder takes string or unicode");
-            return NULL;
-        }
-        Py_INCREF(value);
-    }
-
-    length = size = PyString_GET_SIZE(value);
-    cvalue = PyString_AS_STRING(value);
-    while (length--) {
-        switch (*cvalue++) {
-        case '&':
-            size += 4;  /* amp; */
-            break;
-        case '<':
-        case '>':
-            size += 3;  /* lt; or gt; */
-            break;
-        case '"':
-            size += 5;  /* quot; */
-            break;
-        }
-    }
-    /* +2 = surrounding quotes */
-    if (!(tmp = PyString_FromStringAndSize(NULL, size + 2))) {
-        Py_DECREF(value);
+    if (PyUnicode_CheckExact(value) || PyUnicode_Check(value))
+        return tdi_escape_unicode(value, encoding, &attribute_escape,
+                                  "xmlcharrefreplace", 1);
+    else if (!PyString_CheckExact(value) && !PyString_Check(value)) {
+        PyErr_SetString(TDI_E_TemplateEncodingError,
+                        "Attribute encoder takes string or unicode");
         return NULL;
     }
-    ctmp = PyString_AS_STRING(tmp);
-    cvalue = PyString_AS_STRING(value);
-    length = PyString_GET_SIZE(value);
-    *ctmp++ = '"';
-    while (length--) {
-        switch (c = *cvalue++) {
-        case '&':
-            (void)memcpy(ctmp, "&amp;", 5);
-            ctmp += 5;
-            break;
-        case '<':
-            (void)memcpy(ctmp, "&lt;", 4);
-            ctmp += 4;
-            break;
-        case '>':
-            (void)memcpy(ctmp, "&gt;", 4);
-            ctmp += 4;
-            break;
-        case '"':
-            (void)memcpy(ctmp, "&quot;", 6);
-            ctmp += 6;
-            break;
-        default:
-            *ctmp++ = c;
-            break;
-        }
-    }
-    *ctmp = '"';
-    Py_DECREF(value);
-
-    if (is_unicode) {
-        const char *cencoding = PyString_AsString(encoding);
-        if (!cencoding) {
-            Py_DECREF(tmp);
-            return NULL;
-        }
-        value = PyUnicode_DecodeUTF8(PyString_AS_STRING(tmp),
-                                     PyString_GET_SIZE(tmp), "strict");
-        Py_DECREF(tmp);
-        if (!value)
-            return NULL;
-        tmp = PyUnicode_AsEncodedString(value, cencoding,
-                                        "xmlcharrefreplace");
-        Py_DECREF(value);
-        if (!tmp)
-            return NULL;
-    }
 
-    return tmp;
+    return tdi_escape_str(value, &attribute_escape, 1);
 }
 
 /*
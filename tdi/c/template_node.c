@@ -18,12 +18,15 @@
 #include "cext.h"
 #include "tdi_exceptions.h"
 #include "tdi_content.h"
+#include "tdi_dump.h"
 #include "tdi_globals.h"
 #include "tdi_overlay.h"
 #include "tdi_scope.h"
 #include "tdi_util.h"
 
 #include "obj_avoid_gc.h"
+#include "obj_decoder.h"
+#include "obj_encoder.h"
 #include "obj_node.h"
 #include "obj_template_node.h"
 #include "obj_attr.h"
@@ -176,6 +179,48 @@ TDI_TemplateNodeType_append_node(tdi_node_t *self, PyObject *args,
     return (PyObject *)node;
 }
 
+PyDoc_STRVAR(TDI_TemplateNodeType_reduce__doc__,
+"__reduce__(self)\n\
+\n\
+Reduce the node for pickling\n\
+\n\
+Only nodes of finalized trees can be pickled. The node is stored\n\
+like a tree consisting of the node (and its separator node) only\n\
+and is rebuilt as part of such a new tree. The scope of its former\n\
+parent nodes is not kept.\n\
+\n\
+:Return: Reconstructor and its arguments\n\
+:Rtype: ``tuple``\n\
+\n\
+:Exceptions:\n\
+  - `NodeTreeError` : The tree was not finalized yet");
+
+static PyObject *
+TDI_TemplateNodeType_reduce(tdi_node_t *self, PyObject *args)
+{
+    PyObject *module, *data, *result;
+
+    if (self->kind == TEXT_NODE || !self->encoder || !self->decoder) {
+        PyErr_SetString(TDI_E_NodeTreeError,
+                        "The tree was not finalized yet");
+        return NULL;
+    }
+
+    if (!(data = tdi_dump_node(self)))
+        return NULL;
+    if (!(module = PyImport_ImportModule("tdi.nodetree"))) {
+        Py_DECREF(data);
+        return NULL;
+    }
+    result = PyObject_CallMethod(module, "_reduce_node", "(OOO)", data,
+                                 self->encoder->encoder,
+                                 self->decoder->decoder);
+    Py_DECREF(module);
+    Py_DECREF(data);
+
+    return result;
+}
+
 static struct PyMethodDef TDI_TemplateNodeType_methods[] = {
     {"append_text",
      (PyCFunction)TDI_TemplateNodeType_append_text, METH_KEYWORDS,
@@ -189,6 +234,10 @@ static struct PyMethodDef TDI_TemplateNodeType_methods[] = {
      (PyCFunction)TDI_TemplateNodeType_append_node, METH_KEYWORDS,
      TDI_TemplateNodeType_append_node__doc__},
 
+    {"__reduce__",
+     (PyCFunction)TDI_TemplateNodeType_reduce,    METH_NOARGS,
+     TDI_TemplateNodeType_reduce__doc__},
+
     {NULL, NULL}  /* Sentinel */
 };
 
@@ -260,11 +309,13 @@ TDI_TemplateNodeType_traverse(tdi_node_t *self, visitproc visit,
         Py_VISIT(self->tagname);
         Py_VISIT(self->attr);
         Py_VISIT(self->endtag);
+        Py_VISIT(self->starttag);
         Py_VISIT(self->name);
         Py_VISIT(self->modelscope);
         Py_VISIT((PyObject *)self->encoder);
         Py_VISIT((PyObject *)self->decoder);
         Py_VISIT(self->complete);
+        Py_VISIT(self->compiled);
         TDI_SCOPE_VISIT(self->scope);
         TDI_OVERLAY_VISIT(self->overlay);
     }
@@ -286,11 +337,13 @@ TDI_TemplateNodeType_clear(tdi_node_t *self)
         Py_CLEAR(self->tagname);
         Py_CLEAR(self->attr);
         Py_CLEAR(self->endtag);
+        Py_CLEAR(self->starttag);
         Py_CLEAR(self->name);
         Py_CLEAR(self->modelscope);
         Py_CLEAR(self->encoder);
         Py_CLEAR(self->decoder);
         Py_CLEAR(self->complete);
+        Py_CLEAR(self->compiled);
         TDI_SCOPE_CLEAR(self->scope);
         TDI_OVERLAY_CLEAR(self->overlay);
     }
@@ -16,6 +16,7 @@
  */
 
 #include "cext.h"
+#include "tdi_escape.h"
 #include "tdi_exceptions.h"
 #include "tdi_globals.h"
 
@@ -164,70 +165,32 @@ tdi_text_encode_content(PyObject *value, PyObject *encoding)
     return value;
 }
 
+/*
+ * Escape tables
+ */
+static const char * const attribute_repl[] = {"\\\""};
+static tdi_escape_t attribute_escape = {"\"", attribute_repl};
+
+static const char * const escape_repl[] = {"[]"};
+static tdi_escape_t escape_escape = {"[", escape_repl};
+
+
 /*
  * Text attribute encoder
  */
 PyObject *
 tdi_text_encode_attribute(PyObject *value, PyObject *encoding)
 {
-    PyObject *tmp;
-    Py_ssize_t size, length;
-    char *cvalue, *ctmp;
-    int is_unicode = (PyUnicode_CheckExact(value) || PyUnicode_Check(value));
-    char c;
-
-    if (is_unicode) {
-        if (!(value = PyUnicode_AsUTF8String(value)))
-            return NULL;
-    }
-    else {
-        if (!PyString_CheckExact(value) && !PyString_Check(value)) {
-            PyErr_SetString(TDI_E_TemplateEncodingError,
-                            "Attribute encoder takes string or unicode");
-            return NULL;
-        }
-        Py_INCREF(value);
-    }
-
-    length = size = PyString_GET_SIZE(value);
-    cvalue = PyString_AS_STRING(value);
-    while (length--) {
-        if (*cvalue++ == '"') ++size;  /* '\\' */
-    }
-    /* +2 = surrounding quotes */
-    if (!(tmp = PyString_FromStringAndSize(NULL, size + 2))) {
-        Py_DECREF(value);
+    if (PyUnicode_CheckExact(value) || PyUnicode_Check(value))
+        return tdi_escape_unicode(value, encoding, &attribute_escape,
+                                  "strict", 1);
+    else if (!PyString_CheckExact(value) && !PyString_Check(value)) {
+        PyErr_SetString(TDI_E_TemplateEncodingError,
+                        "Attribute encoder takes string or unicode");
         return NULL;
     }
-    ctmp = PyString_AS_STRING(tmp);
-    cvalue = PyString_AS_STRING(value);
-    length = PyString_GET_SIZE(value);
-    *ctmp++ = '"';
-    while (length--) {
-        if ((c = *cvalue++) == '"') *ctmp++ = '\\';
-        *ctmp++ = c;
-    }
-    *ctmp = '"';
-    Py_DECREF(value);
 
-    if (is_unicode) {
-        const char *cencoding = PyString_AsString(encoding);
-        if (!cencoding) {
-            Py_DECREF(tmp);
-            return NULL;
-        }
-        value = PyUnicode_DecodeUTF8(PyString_AS_STRING(tmp),
-                                     PyString_GET_SIZE(tmp), "strict");
-        Py_DECREF(tmp);
-        if (!value)
-            return NULL;
-        tmp = PyUnicode_AsEncodedString(value, cencoding, "strict");
-        Py_DECREF(value);
-        if (!tmp)
-            return NULL;
-    }
-
-    return tmp;
+    return tdi_escape_str(value, &attribute_escape, 1);
 }
 
 /*
@@ -256,39 +219,13 @@ tdi_text_encode_unicode(PyObject *value, PyObject *encoding)
 PyObject *
 tdi_text_encode_escape(PyObject *value)
 {
-    PyObject *tmp;
-    char *cvalue, *cp;
-    Py_ssize_t length, size, diff = 0;
-    char c;
-
     if (!PyString_CheckExact(value) && !PyString_Check(value)) {
         PyErr_SetString(TDI_E_TemplateEncodingError,
                         "Escaper takes str.");
         return NULL;
     }
 
-    length = size = PyString_GET_SIZE(value);
-    cvalue = PyString_AS_STRING(value);
-    while (length--) {
-        if (*cvalue++ == '[') ++diff;
-    }
-    if (!diff) {
-        Py_INCREF(value);
-        return value;
-    }
-
-    if (!(tmp = PyString_FromStringAndSize(NULL, size + diff))) {
-        return NULL;
-    }
-    cp = PyString_AS_STRING(tmp);
-    cvalue = PyString_AS_STRING(value);
-    length = PyString_GET_SIZE(value);
-    while (length--) {
-        *cp++ = c = *cvalue++;
-        if (c == '[') *cp++ = ']';
-    }
-
-    return tmp;
+    return tdi_escape_str(value, &escape_escape, 0);
 }
 
 
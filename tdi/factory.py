@@ -31,8 +31,16 @@ if __doc__:
 __author__ = r"Andr\xe9 Malo".encode('ascii').decode('unicode_escape')
 __docformat__ = "restructuredtext en"
 
+import collections as _collections
+import errno as _errno
+import gc as _gc
+import hashlib as _hashlib
+import marshal as _marshal
 import os as _os
 import sys as _sys
+import tempfile as _tempfile
+import time as _time
+import types as _types
 try:
     import cStringIO as _string_io
 except ImportError:
@@ -41,12 +49,157 @@ try:
     import threading as _threading
 except ImportError:
     import dummy_threading as _threading
+try:
+    import multiprocessing as _multiprocessing
+except ImportError:
+    _multiprocessing = None
 
-from ._exceptions import TemplateFactoryError
+from ._exceptions import NodeTreeError, TemplateFactoryError
 from . import filters as _filters
+from . import nodetree as _nodetree
 from . import template as _template
 from . import _util
 
+#: Format version of the tree cache files
+#:
+#: :Type: ``int``
+TREE_CACHE_VERSION = 1
+
+
+def _bound(obj):
+    """
+    Determine the object a method is bound to
+
+    :Parameters:
+      `obj` : any
+        The (possible) method
+
+    :Return: The object or ``None`` if `obj` is not a bound method
+    :Rtype: any
+    """
+    bound = getattr(obj, 'im_self', None)
+    if bound is None and isinstance(obj, _types.BuiltinMethodType):
+        bound = obj.__self__
+        if isinstance(bound, _types.ModuleType):
+            bound = None
+    return bound
+
+
+def _ident(obj):
+    """
+    Determine a stable identifier of a factory (for the tree cache key)
+
+    Only module level classes and functions (and methods bound to them)
+    can be identified. Closures, lambdas and instances cannot.
+
+    :Parameters:
+      `obj` : ``callable``
+        The factory
+
+    :Return: The identifier or ``None``
+    :Rtype: ``str``
+    """
+    bound = _bound(obj)
+    if bound is not None:
+        bound = _ident(bound)
+        if bound is None:
+            return None
+        return '%s.%s' % (bound, obj.__name__)
+
+    if isinstance(obj, _types.FunctionType):
+        if obj.func_closure is not None:
+            return None
+    elif not isinstance(obj, (type, _types.ClassType,
+                              _types.BuiltinFunctionType)):
+        return None
+
+    name, module = obj.__name__, getattr(obj, '__module__', None)
+    if module is None or name.startswith('<'):
+        return None
+    return '%s.%s' % (module, name)
+
+
+class _BoundMethod(object):
+    """
+    Pickle proxy for bound methods (like ``SoupParser.html``)
+
+    The proxy is unpickled as the method itself.
+
+    :IVariables:
+      `_obj` : any
+        The object the method is bound to
+
+      `_name` : ``str``
+        The method name
+    """
+    __slots__ = ('_obj', '_name')
+
+    def __init__(self, obj, name):
+        """
+        Initialization
+
+        :Parameters:
+          `obj` : any
+            The object the method is bound to
+
+          `name` : ``str``
+            The method name
+        """
+        self._obj = obj
+        self._name = name
+
+    def __reduce__(self):
+        """
+        Reduce to the method lookup
+
+        :Return: Reconstructor and its arguments
+        :Rtype: ``tuple``
+        """
+        return getattr, (self._obj, self._name)
+
+
+def _picklable(args):
+    """
+    Make initialization arguments picklable
+
+    Python 2 cannot pickle bound methods. They are wrapped into
+    `_BoundMethod` proxies (also inside of filter lists).
+
+    :Parameters:
+      `args` : ``dict``
+        Initialization arguments
+
+    :Return: The picklable arguments
+    :Rtype: ``dict``
+    """
+    def proxy(value):
+        """ Wrap a single value """
+        if isinstance(value, (list, tuple)):
+            return value.__class__(map(proxy, value))
+        bound = _bound(value)
+        if bound is not None:
+            return _BoundMethod(bound, value.__name__)
+        return value
+
+    return dict((key, proxy(value)) for key, value in args.iteritems())
+
+
+def _construct(cls, args):
+    """
+    Create an instance from keyword arguments (for unpickling)
+
+    :Parameters:
+      `cls` : ``type``
+        Class to instantiate
+
+      `args` : ``dict``
+        Keyword arguments
+
+    :Return: The new instance
+    :Rtype: any
+    """
+    return cls(**args)
+
 
 class Loader(object):
     """
@@ -63,7 +216,22 @@ class Loader(object):
         List of stream filter factories (``(file, ...)``)
 
       `_chunksize` : ``int``
-        Chunk size when reading templates
+        Chunk size when reading templates through stream filters
+
+      `_cachedir` : ``str``
+        Tree cache directory or ``None``
+
+      `_cacheconfig` : ``str``
+        Loader configuration as part of the tree cache key or ``None``
+
+      `_direct` : ``bool``
+        Can render events be passed to the builder directly? (see `build`)
+
+      `_parser` : ``callable``
+        Parser factory
+
+      `statcache` : `StatCache`
+        Modification check cache or ``None``
     """
 
     def __init__(self, parser, builder, encoder, decoder,
@@ -71,7 +239,7 @@ class Loader(object):
                  default_eventfilter_list=None,
                  default_streamfilter_list=None,
                  default_eventfilters=True, default_streamfilters=True,
-                 chunksize=None):
+                 chunksize=None, cachedir=None, statcache=None):
         """
         Initialization
 
@@ -109,7 +277,17 @@ class Loader(object):
             Apply default streamfilters (before this list)?
 
           `chunksize` : ``int``
-            Chunk size when reading templates
+            Chunk size when reading templates through stream filters.
+            Without stream filters templates are read in one piece.
+
+          `cachedir` : ``str``
+            Directory to store the built trees in. If omitted or ``None``,
+            the trees are not cached. See `__call__` for details.
+
+          `statcache` : `StatCache`
+            Modification check cache (usually shared by all loaders of a
+            factory). If omitted or ``None``, every check hits the file
+            system.
         """
         # pylint: disable = too-many-arguments
 
@@ -133,6 +311,7 @@ class Loader(object):
             eventfilters = default
         elif default_eventfilters:
             eventfilters = default + tuple(eventfilters)
+        self._direct = not streamfilters and tuple(eventfilters) == default
 
         def new_builder():
             """
@@ -145,21 +324,48 @@ class Loader(object):
 
         self.builder = new_builder
 
-        def make_parser(filename, encoding):
+        def make_listener(filename, encoding):
             """
-            Make parser instance
+            Make filtered builder instance
 
-            :Return: Parser and tree returner
-            :Rtype: ``tuple``
+            :Return: The builder wrapped into the event filters
+            :Rtype: `BuildingListenerInterface`
             """
             this_builder = _filters.FilterFilename(new_builder(), filename)
             for item in eventfilters:
                 this_builder = item(this_builder)
             this_builder.handle_encoding(encoding)
+            return this_builder
+
+        def make_parser(filename, encoding):
+            """
+            Make parser instance
+
+            :Return: Parser and tree returner
+            :Rtype: ``tuple``
+            """
+            this_builder = make_listener(filename, encoding)
             return parser(this_builder), this_builder.finalize
 
+        self._parser = parser
+        self._new_listener = make_listener
         self._new_parser = make_parser
 
+        self.statcache = statcache
+
+        self._cachedir, self._cacheconfig = cachedir, None
+        if cachedir is not None:
+            from . import __version__
+            config = [_ident(item) for item in (
+                (parser, builder, encoder, decoder)
+                + tuple(streamfilters) + tuple(eventfilters)
+            )]
+            if None not in config:
+                self._cacheconfig = repr((
+                    TREE_CACHE_VERSION, __version__, config,
+                    len(streamfilters),
+                ))
+
     @_util.Property
     def args():
         """
@@ -174,6 +380,15 @@ class Loader(object):
             return dict(self._args)
         return locals()
 
+    def __reduce__(self):
+        """
+        Reduce the loader for pickling
+
+        :Return: Reconstructor and its arguments
+        :Rtype: ``tuple``
+        """
+        return _construct, (self.__class__, _picklable(self.args))
+
     def persist(self, filename, encoding, opener):
         """
         Create persistent loader (able to reload)
@@ -197,6 +412,180 @@ class Loader(object):
         """
         Actually load the template and build the tree
 
+        If a cache directory is configured, the built trees are stored there
+        (see `tdi.nodetree.Root.dump`). They are keyed by the template source,
+        the filename, the initial encoding and the loader configuration
+        (parser, builder, encoder, decoder and filters). Cached trees are
+        loaded without parsing. The cache is disabled, if a configured
+        factory cannot be identified reliably (e.g. if it's a closure or an
+        instance).
+
+        :Parameters:
+          `stream` : ``file``
+            The stream to read from
+
+          `filename` : ``str``
+            The template filename
+
+          `encoding` : ``str``
+            Initial template encoding
+
+        :Return: The tree
+        :Rtype: `tdi.nodetree.Root`
+        """
+        if self._cacheconfig is None:
+            return self._load(stream, filename, encoding)
+
+        data = stream.read()
+        key = _hashlib.sha1(repr((self._cacheconfig, filename, encoding)))
+        key.update(data)
+        cachefile = _os.path.join(self._cachedir, key.hexdigest() + '.tree')
+        tree = self._load_cached(cachefile)
+        if tree is None:
+            if self._streamfilters:
+                tree = self._load(
+                    _string_io.StringIO(data), filename, encoding
+                )
+            else:
+                tree = self._load_data(data, filename, encoding)
+            self._store_cached(cachefile, tree)
+        return tree
+
+    def _load_cached(self, cachefile):
+        """
+        Load a tree from the cache
+
+        :Parameters:
+          `cachefile` : ``str``
+            Cache filename
+
+        :Return: The tree or ``None`` if it was not found or invalid
+        :Rtype: `tdi.nodetree.Root`
+        """
+        try:
+            fp = open(cachefile, 'rb')
+        except IOError:
+            return None
+        try:
+            try:
+                return self.undump(*_marshal.load(fp))
+            except (EOFError, ValueError, TypeError, NodeTreeError):
+                return None
+        finally:
+            fp.close()
+
+    def _store_cached(self, cachefile, tree):
+        """
+        Store a tree in the cache
+
+        Failures are silently ignored, the cache is just not populated
+        then. Trees, which cannot be reproduced exactly (e.g. because the
+        attribute order would change) are not stored either.
+
+        :Parameters:
+          `cachefile` : ``str``
+            Cache filename
+
+          `tree` : `tdi.nodetree.Root`
+            The tree to store
+        """
+        dumped = self.dump(tree)
+        if dumped is None:
+            return
+        try:
+            dumped = _marshal.dumps(dumped)
+        except ValueError:
+            return
+
+        try:
+            _os.makedirs(self._cachedir)
+        except OSError, e:
+            if e.errno != _errno.EEXIST:
+                return
+        try:
+            fd, tmpname = _tempfile.mkstemp(dir=self._cachedir)
+        except (IOError, OSError):
+            return
+        try:
+            fp = _os.fdopen(fd, 'wb')
+            try:
+                fp.write(dumped)
+            finally:
+                fp.close()
+            try:
+                _os.rename(tmpname, cachefile)
+            except OSError:
+                # Windows does not replace existing files
+                if not _os.path.exists(cachefile):
+                    raise
+                _os.unlink(tmpname)
+        except (IOError, OSError):
+            try:
+                _os.unlink(tmpname)
+            except OSError:
+                pass
+
+    def dump(self, tree):
+        """
+        Serialize a tree for `undump`
+
+        :Parameters:
+          `tree` : `tdi.nodetree.Root`
+            The tree to serialize
+
+        The representation is loaded and dumped again in order to verify
+        that it reproduces the tree. This doubles the serialization cost.
+
+        :Return: The tree's encoding and its `tdi.nodetree.Root.dump`
+                 representation (``(encoding, data)``) or ``None`` if the
+                 tree cannot be reproduced exactly (e.g. because the
+                 attribute order would change)
+        :Rtype: ``tuple``
+        """
+        encoding, data = tree.encoder.encoding, tree.dump()
+        try:
+            check = _nodetree.load(data, tree.encoder, tree.decoder).dump()
+        except (ValueError, TypeError, NodeTreeError):
+            return None
+        if check != data:
+            return None
+        return encoding, data
+
+    def undump(self, encoding, data):
+        """
+        Restore a tree serialized by `dump`
+
+        The tree is rebuilt through the tree building interface and
+        finalized again. The finalization is not part of the serialized
+        form.
+
+        :Parameters:
+          `encoding` : ``str``
+            The tree's encoding
+
+          `data` : ``tuple``
+            The tree's dump representation
+
+        :Return: The tree
+        :Rtype: `tdi.nodetree.Root`
+
+        :Exceptions:
+          - `NodeTreeError` : The data is invalid
+          - `ValueError` : The data is invalid
+          - `TypeError` : The data is invalid
+        """
+        builder = self.builder()
+        builder.handle_encoding(encoding)
+        return _nodetree.load(data, builder.encoder, builder.decoder)
+
+    def _load(self, stream, filename, encoding):
+        """
+        Parse the template and build the tree
+
+        Without stream filters the stream is read in one piece and passed
+        to the parser at once (see `_load_data`). Otherwise it's read
+        through the stream filters in chunks.
+
         :Parameters:
           `stream` : ``file``
             The stream to read from
@@ -210,6 +599,9 @@ class Loader(object):
         :Return: The tree
         :Rtype: `tdi.nodetree.Root`
         """
+        if not self._streamfilters:
+            return self._load_data(stream.read(), filename, encoding)
+
         stream = _filters.StreamFilename(stream, filename)
         for item in self._streamfilters:
             stream = item(stream)
@@ -224,6 +616,178 @@ class Loader(object):
         parser.finalize()
         return make_tree()
 
+    def _load_data(self, data, filename, encoding):
+        """
+        Parse the complete template source and build the tree
+
+        The source is fed to the parser in a single call. The lexers keep
+        the passed string as their buffer and walk it in one pass.
+
+        :Parameters:
+          `data` : ``str``
+            The template source
+
+          `filename` : ``str``
+            The template filename
+
+          `encoding` : ``str``
+            Initial template encoding
+
+        :Return: The tree
+        :Rtype: `tdi.nodetree.Root`
+        """
+        parser, make_tree = self._new_parser(filename, encoding)
+        parser.feed(data)
+        parser.finalize()
+        return make_tree()
+
+    def build(self, events, filename, encoding):
+        """
+        Build the tree from render events
+
+        The events are produced by `tdi.nodetree.Root.render_events`. If
+        the loader applies no stream filters and no event filters beyond
+        the default ones, they are passed to the builder directly. Only the
+        node contents are lexed again (they may contain markup), the
+        template text between the nodes is kept as is. Node contents are
+        parsed behind the start tag of their node up to its end tag, so the
+        parser applies its markup rules (e.g. CDATA content of script
+        elements). Otherwise the events are serialized and parsed like a
+        regular template.
+
+        :Parameters:
+          `events` : iterable
+            The render events
+
+          `filename` : ``str``
+            The template filename
+
+          `encoding` : ``str``
+            Initial template encoding
+
+        :Return: The tree
+        :Rtype: `tdi.nodetree.Root`
+        """
+        if not self._direct:
+            markup = []
+            push = markup.append
+            for event in events:
+                if isinstance(event, str):
+                    push(event)
+                elif len(event) == 2:
+                    push(event[1])
+                else:
+                    push(event[-1])
+            return self(_string_io.StringIO(''.join(markup)), filename,
+                        encoding)
+
+        listener = self._new_listener(filename, encoding)
+        handle_text = listener.handle_text
+        handle_escape = listener.handle_escape
+        handle_starttag = listener.handle_starttag
+        handle_endtag = listener.handle_endtag
+        parser, str_, isinstance_ = self._parser, str, isinstance
+        tags, content, level = [], None, 0
+        push, pop = tags.append, tags.pop
+        for event in events:
+            if isinstance_(event, str_):
+                if content is not None:
+                    content.feed(event)
+                elif event:
+                    if tags and tags[-1] is not None:
+                        content = parser(_ContentListener(listener))
+                        content.feed(tags[-1][1])
+                        content.feed(event)
+                        level = len(tags)
+                    else:
+                        root = parser(listener)
+                        root.feed(event)
+                        root.finalize()
+                continue
+            size = len(event)
+            if content is not None:
+                # Everything up to the node's end tag goes to the parser
+                content.feed(event[-1])
+                if size == 4:
+                    push(None)
+                elif size == 1:
+                    pop()
+                    if len(tags) < level:
+                        content.finalize()
+                        content = None
+                continue
+            if size == 2:
+                clean, escaped = event
+                if clean == escaped:
+                    if clean:
+                        handle_text(clean)
+                else:
+                    handle_escape(clean, escaped)
+            elif size == 4:
+                name, attr, closed, data = event
+                handle_starttag(name, list(attr), closed, data)
+                if closed:
+                    push(None)
+                else:
+                    push((name, data))
+            else:
+                tag, data = pop(), event[0]
+                if tag is not None:
+                    handle_endtag(tag[0], data)
+                elif data:
+                    handle_text(data)
+        return listener.finalize()
+
+
+class _ContentListener(object):
+    """
+    Listener for node contents parsed behind their node's start tag
+
+    The start tag is only fed to the parser for its markup rules, so its
+    event is not passed on. Everything else is delegated.
+
+    :IVariables:
+      `_listener` : `BuildingListenerInterface`
+        The actual listener
+
+      `_start` : ``bool``
+        Is the start tag event still to be dropped?
+    """
+
+    def __init__(self, listener):
+        """
+        Initialization
+
+        :Parameters:
+          `listener` : `BuildingListenerInterface`
+            The actual listener
+        """
+        self._listener = listener
+        self._start = True
+
+    def __getattr__(self, name):
+        """
+        Delegate everything else to the actual listener
+
+        :Parameters:
+          `name` : ``str``
+            The symbol to look up
+
+        :Return: The requested symbol
+        :Rtype: any
+
+        :Exceptions:
+          - `AttributeError` : The symbol was not found
+        """
+        return getattr(self._listener, name)
+
+    def handle_starttag(self, name, attr, closed, data):
+        """ :See: `tdi.interfaces.ListenerInterface` """
+        if self._start:
+            self._start = False
+        else:
+            self._listener.handle_starttag(name, attr, closed, data)
+
 
 class Reloader(object):
     """
@@ -269,6 +833,17 @@ class Reloader(object):
         self._encoding = encoding
         self._opener = opener
 
+    def __reduce__(self):
+        """
+        Reduce the reloader for pickling
+
+        :Return: Reconstructor and its arguments
+        :Rtype: ``tuple``
+        """
+        return self.__class__, (
+            self._loader, self._filename, self._encoding, self._opener
+        )
+
     def load(self, mtime=None, force=False):
         """
         Load the template again, if the mtime changed.
@@ -309,7 +884,123 @@ class Reloader(object):
         :Return: A tuple of: update available? and the new mtime
         :Rtype: ``tuple``
         """
-        return self._opener(self._filename, mtime, check_only=True)
+        cache = self._loader.statcache
+        if cache is None:
+            return self._opener(self._filename, mtime, check_only=True)
+        return cache.check(self._opener, self._filename, mtime)
+
+
+class StatCache(object):
+    """
+    Modification check cache
+
+    The results of the stream openers' modification checks are kept for
+    a configured interval. The cache is shared by all templates of a
+    factory, so every template file is checked at most once per interval,
+    no matter how many (overlay) templates include it. Modifications are
+    noticed with a delay of up to the interval, though.
+
+    Expired entries are dropped when new results are stored. At most
+    `maxentries` results are kept (the oldest ones are dropped first).
+
+    :IVariables:
+      `interval` : ``float``
+        Check interval in seconds
+
+      `maxentries` : ``int``
+        Maximum number of kept check results
+
+      `_timer` : ``callable``
+        Timer function
+
+      `_lock` : Lock
+        Lock for the entries
+
+      `_entries` : ``collections.OrderedDict``
+        Check results (``{(opener, filename): (expires, mtime, result)}``)
+        in the order of their expiry
+    """
+
+    def __init__(self, interval, timer=None, maxentries=1024):
+        """
+        Initialization
+
+        :Parameters:
+          `interval` : ``float``
+            Check interval in seconds
+
+          `timer` : ``callable``
+            Timer function. If omitted or ``None``, ``time.time`` is used.
+
+          `maxentries` : ``int``
+            Maximum number of kept check results
+        """
+        self.interval = interval
+        self.maxentries = maxentries
+        self._timer = timer or _time.time
+        self._lock = _threading.Lock()
+        self._entries = _collections.OrderedDict()
+
+    def __reduce__(self):
+        """
+        Reduce the cache for pickling
+
+        Only the configuration is pickled, not the check results.
+
+        :Return: Reconstructor and its arguments
+        :Rtype: ``tuple``
+        """
+        return self.__class__, (self.interval, None, self.maxentries)
+
+    def check(self, opener, filename, mtime):
+        """
+        Check a template for modifications
+
+        :Parameters:
+          `opener` : ``callable``
+            Stream opener
+
+          `filename` : ``str``
+            Filename in question
+
+          `mtime` : any
+            Known modification time
+
+        :Return: A tuple of: update available? and the new mtime
+        :Rtype: ``tuple``
+        """
+        key, now = (opener, filename), self._timer()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            if entry[1] == mtime:
+                return entry[2]
+            xtime = entry[2][1]
+            if mtime is not None and xtime is not None:
+                return mtime != xtime, xtime
+        result = opener(filename, mtime, check_only=True)
+
+        self._lock.acquire()
+        try:
+            entries = self._entries
+            entries.pop(key, None)
+            entries[key] = now + self.interval, mtime, result
+            while entries:
+                first = next(iter(entries))
+                if entries[first][0] > now \
+                        and len(entries) <= self.maxentries:
+                    break
+                del entries[first]
+        finally:
+            self._lock.release()
+        return result
+
+    def clear(self):
+        """ Forget all check results """
+        self._lock.acquire()
+        try:
+            self._entries.clear()
+        finally:
+            self._lock.release()
 
 
 def file_opener(filename, mtime, check_only=False):
@@ -359,6 +1050,23 @@ def file_opener(filename, mtime, check_only=False):
                 del e
 
 
+def _compile(args):
+    """
+    Load a template tree in a worker process (see `Factory.compile_all`)
+
+    :Parameters:
+      `args` : ``tuple``
+        The loader, the filename and the initial encoding
+
+    :Return: The serialized tree (as returned by `Loader.dump`, ``None``
+             if it cannot be serialized) and the file's mtime
+    :Rtype: ``tuple``
+    """
+    loader, filename, encoding = args
+    tree, mtime = loader.persist(filename, encoding, file_opener).load()
+    return loader.dump(tree), mtime
+
+
 def overlay(templates):
     """
     Overlay a list of templates from left to right
@@ -411,18 +1119,23 @@ def _memoize(func):
             lock = _global_lock
         lock.acquire()
         try:
-            if ckey in cache:
-                return cache[ckey]
+            try:
+                if ckey in cache:
+                    return cache[ckey]
+            except KeyError:  # dropped by a bounded memoizer meanwhile
+                pass
         finally:
             lock.release()
         res = func(*args, **kwargs)
         lock.acquire()
         try:
-            if ckey in cache:
-                return cache[ckey]
-            else:
-                cache[ckey] = res
-                return res
+            try:
+                if ckey in cache:
+                    return cache[ckey]
+            except KeyError:
+                pass
+            cache[ckey] = res
+            return res
         finally:
             lock.release()
     return _util.decorating(func, extra=dict(key=None))(proxy)
@@ -465,7 +1178,8 @@ class Factory(object):
                  overlay_eventfilters=None, overlay_streamfilters=None,
                  overlay_default_eventfilters=True,
                  overlay_default_streamfilters=True,
-                 default_encoding='ascii', chunksize=None, memoizer=None):
+                 default_encoding='ascii', chunksize=None, memoizer=None,
+                 cachedir=None, checkinterval=None, statcache=None):
         """
         Initialization
 
@@ -526,13 +1240,36 @@ class Factory(object):
             Default encoding
 
           `chunksize` : ``int``
-            Chunk size when reading templates
+            Chunk size when reading templates through stream filters.
+            Without stream filters templates are read in one piece.
 
           `memoizer` : `MemoizerInterface`
             Memoizer to use. If omitted or ``None``, memoization is turned
             off.
+
+          `cachedir` : ``str``
+            Directory to cache the built template trees in. If omitted or
+            ``None``, the trees are not cached. Cached trees are loaded
+            without parsing them again. The directory is shared safely
+            between processes.
+
+          `checkinterval` : ``float``
+            Minimum interval in seconds between two modification checks of
+            the same template file (for autoupdated templates). The check
+            results are shared by all templates of the factory and of the
+            factories created by `replace` (unless they get their own
+            `checkinterval`). If omitted, ``None`` or ``0``, every check
+            hits the file system.
+
+          `statcache` : `StatCache`
+            Modification check cache to share with another factory. If
+            omitted or ``None``, a new one is created if `checkinterval` is
+            set. Otherwise `checkinterval` is ignored.
         """
-        # pylint: disable = too-many-arguments
+        # pylint: disable = too-many-arguments, too-many-locals
+
+        if statcache is None and checkinterval:
+            statcache = StatCache(checkinterval)
 
         self._loader = Loader(
             parser=parser,
@@ -546,6 +1283,8 @@ class Factory(object):
             builder=builder,
             encoder=encoder,
             chunksize=chunksize,
+            cachedir=cachedir,
+            statcache=statcache,
         )
         if overlay_eventfilters is None and overlay_streamfilters is None:
             self.overlay_filters = None
@@ -572,12 +1311,41 @@ class Factory(object):
         """
         return self._loader.builder()
 
+    def __reduce__(self):
+        """
+        Reduce the factory for pickling
+
+        The factory is pickled by its configuration. The memoizer is not
+        pickled.
+
+        :Return: Reconstructor and its arguments
+        :Rtype: ``tuple``
+        """
+        return _construct, (self.__class__, _picklable(self._args()))
+
+    def _args(self):
+        """
+        Determine the initialization arguments (without the memoizer)
+
+        :Return: The arguments
+        :Rtype: ``dict``
+        """
+        args = self._loader.args
+        statcache = args.pop('statcache')
+        args['checkinterval'] = statcache and statcache.interval or None
+        args['autoupdate'] = self._autoupdate
+        if self.overlay_filters:
+            for key, value in self.overlay_filters.iteritems():
+                args['overlay_' + key] = value
+        args['default_encoding'] = self._default_encoding
+        return args
+
     def replace(self, autoupdate=None, eventfilters=None, streamfilters=None,
                 default_eventfilters=None, default_streamfilters=None,
                 overlay_eventfilters=None, overlay_streamfilters=None,
                 overlay_default_eventfilters=None,
                 overlay_default_streamfilters=None, default_encoding=None,
-                memoizer=None):
+                memoizer=None, cachedir=None, checkinterval=None):
         """
         Create a new factory instance with replaced values
 
@@ -620,16 +1388,24 @@ class Factory(object):
             New memoizer. If omitted or ``None``, the new factory will be
             initialized without memoizing.
 
+          `cachedir` : ``str``
+            Tree cache directory. If omitted or ``None``, the current
+            setting is applied.
+
+          `checkinterval` : ``float``
+            Modification check interval. If omitted or ``None``, the new
+            factory shares the modification check cache of this one.
+            Otherwise it gets its own cache.
+
         :Return: New factory instance
         :Rtype: `Factory`
         """
         # pylint: disable = too-many-arguments, too-many-branches
         # pylint: disable = unsubscriptable-object, not-a-mapping
 
-        args = self._loader.args
-        if autoupdate is None:
-            autoupdate = self._autoupdate
-        args['autoupdate'] = autoupdate
+        args = self._args()
+        if autoupdate is not None:
+            args['autoupdate'] = autoupdate
         if eventfilters is not None:
             args['eventfilters'] = eventfilters
         if default_eventfilters is not None:
@@ -639,9 +1415,6 @@ class Factory(object):
         if default_streamfilters is not None:
             args['default_streamfilters'] = default_streamfilters
 
-        if self.overlay_filters:
-            for key, value in self.overlay_filters.iteritems():
-                args['overlay_' + key] = value
         if overlay_eventfilters is not None:
             args['overlay_eventfilters'] = overlay_eventfilters
         if overlay_default_eventfilters is not None:
@@ -653,14 +1426,20 @@ class Factory(object):
             args['overlay_default_streamfilters'] = \
                 overlay_default_streamfilters
 
-        if default_encoding is None:
-            args['default_encoding'] = self._default_encoding
-        else:
+        if default_encoding is not None:
             args['default_encoding'] = default_encoding
 
         if memoizer is not None:
             args['memoizer'] = memoizer
 
+        if cachedir is not None:
+            args['cachedir'] = cachedir
+
+        if checkinterval is not None:
+            args['checkinterval'] = checkinterval
+        else:
+            args['statcache'] = self._loader.statcache
+
         return self.__class__(**args)
 
     @_memoize
@@ -816,6 +1595,49 @@ class Factory(object):
                                 encoding=encoding, filename=filename,
                                 mtime=mtime, cls=cls)
 
+    def from_events(self, events, encoding=None, filename=None, mtime=None,
+                    cls=None):
+        """
+        Build template from render events
+
+        This is used for prerendering: the events are produced by
+        `tdi.nodetree.Root.render_events` and turned into the new tree
+        without serializing and parsing the markup again (see
+        `Loader.build`). Templates built using this method cannot be
+        auto-updated and are not memoized.
+
+        :Parameters:
+          `events` : iterable
+            The render events
+
+          `encoding` : ``str``
+            The initial template encoding. If omitted or ``None``, the
+            default encoding is applied.
+
+          `filename` : ``str``
+            Optional fake filename of the template. If not set,
+            it's ``<events>``
+
+          `mtime` : ``int``
+            Optional fake mtime
+
+          `cls` : ``callable``
+            result wrapper, takes the resulting template and returns the final
+            template. If omitted or ``None``, the result won't be wrapped.
+
+        :Return: The new `tdi.template.Template` instance
+        :Rtype: `tdi.template.Template`
+        """
+        if encoding is None:
+            encoding = self._default_encoding
+        if filename is None:
+            filename = '<events>'
+        tree = self._loader.build(events, filename, encoding)
+        result = _template.Template(tree, filename, mtime, self, None)
+        if cls is not None:
+            return cls(result)
+        return result
+
     @_memoize
     def from_files(self, names, encoding=None, basedir=None, cls=None):
         """
@@ -917,3 +1739,196 @@ class Factory(object):
         if cls is not None:
             return cls(result)
         return result
+
+    def compile_all(self, names, encoding=None, basedir=None, workers=None,
+                    cls=None):
+        """
+        Load templates from files in parallel worker processes
+
+        The files are parsed and their trees finalized in a process pool.
+        The trees are passed back in their `tdi.nodetree.Root.dump`
+        representation (see `Loader.dump`), which the calling process has
+        to rebuild and finalize again (see `Loader.undump`). That still
+        costs about a quarter to a third of a full parse per template, so
+        the speedup is limited accordingly.
+
+        If memoization is enabled, the templates are memoized by filename,
+        encoding and `cls` (already memoized ones are not loaded again).
+        The entries are not shared with `from_file`, which is memoized by
+        the key passed by the caller. Trees, which cannot be serialized
+        exactly, are loaded in the calling process again. The factory
+        configuration needs to be picklable (see `__reduce__`).
+
+        :Parameters:
+          `names` : iterable
+            List of filenames, possibly relative to basedir. If it's
+            callable, it's called without arguments and has to return the
+            list.
+
+          `encoding` : ``str``
+            Initial template encoding for all files. If omitted or ``None``,
+            the default encoding is applied.
+
+          `basedir` : ``basestring``
+            Directory, all filenames are relative to. If omitted or ``None``
+            the names are applied as-is.
+
+          `workers` : ``int``
+            Number of worker processes. If omitted or ``None``, the number
+            of CPUs is used. If it's less than 2 (or multiprocessing is not
+            available), the templates are loaded in the calling process.
+
+          `cls` : ``callable``
+            result wrapper, takes each resulting template and returns the
+            final template. If omitted or ``None``, the results won't be
+            wrapped.
+
+        :Return: The templates (in the order of `names`)
+        :Rtype: ``list``
+
+        :Exceptions:
+          - `Error` : An error occured while loading a template
+          - `IOError` : Error while opening/reading a file
+        """
+        # pylint: disable = too-many-locals, too-many-branches
+
+        if callable(names):
+            names = names()
+        if encoding is None:
+            encoding = self._default_encoding
+        cache = self._cache
+        if cache is not None:
+            lock = getattr(cache, 'lock', None)
+            if lock is None:
+                lock = _global_lock
+
+        result, templates, jobs = [], {}, {}
+        for name in names:
+            if basedir is not None:
+                name = _os.path.join(basedir, name)
+            result.append(name)
+            if cache is not None:
+                lock.acquire()
+                try:
+                    try:
+                        ckey = ('compile_all', (name, encoding, cls))
+                        if ckey in cache:
+                            templates[name] = cache[ckey]
+                            continue
+                    except KeyError:
+                        pass
+                finally:
+                    lock.release()
+            jobs[name] = None
+
+        if workers is None and _multiprocessing is not None:
+            try:
+                workers = _multiprocessing.cpu_count()
+            except NotImplementedError:
+                workers = 1
+        workers = min(workers or 1, len(jobs))
+        if workers > 1 and _multiprocessing is not None:
+            todo = sorted(jobs)
+            pool = _multiprocessing.Pool(workers)
+            try:
+                loaded = pool.map(_compile, [
+                    (self._loader, name, encoding) for name in todo
+                ])
+            finally:
+                pool.terminate()
+                pool.join()
+            for name, (dumped, mtime) in zip(todo, loaded):
+                if dumped is not None:
+                    jobs[name] = self._loader.undump(*dumped), mtime
+
+        for name in jobs:
+            loader = self._loader.persist(name, encoding, file_opener)
+            if jobs[name] is None:
+                tree, mtime = loader.load()
+            else:
+                tree, mtime = jobs[name]
+            template = _template.Template(tree, name, mtime, self, loader)
+            if cls is not None:
+                template = cls(template)
+            if self._autoupdate:
+                template = _template.AutoUpdate(template)
+            if cache is not None:
+                ckey = ('compile_all', (name, encoding, cls))
+                lock.acquire()
+                try:
+                    try:
+                        if ckey in cache:
+                            template = cache[ckey]
+                        else:
+                            cache[ckey] = template
+                    except KeyError:
+                        cache[ckey] = template
+                finally:
+                    lock.release()
+            templates[name] = template
+
+        return [templates[name] for name in result]
+
+    def warm(self, names, encoding=None, basedir=None, prerender=None,
+             preadapter=None, gcfreeze=True):
+        """
+        Load and prepare templates in advance
+
+        This is meant to be called before forking worker processes. The
+        templates are loaded (memoized, if memoization is enabled),
+        prepared, possibly prerendered and frozen (see
+        `tdi.template.Template.warm`). So the workers don't need to do the
+        work again and the trees stay unmodified and shared between the
+        processes.
+
+        :Parameters:
+          `names` : iterable
+            List of filenames, possibly relative to basedir. If it's
+            callable, it's called without arguments and has to return the
+            list.
+
+          `encoding` : ``str``
+            Initial template encoding for all files. If omitted or ``None``,
+            the default encoding is applied.
+
+          `basedir` : ``basestring``
+            Directory, all filenames are relative to. If omitted or ``None``
+            the names are applied as-is.
+
+          `prerender` : any
+            Prerender-Model. If omitted or ``None``, the templates are not
+            prerendered.
+
+          `preadapter` : `ModelAdapterInterface`
+            Prerender-adapter. If omitted or ``None``, the default
+            prerender adapter is applied.
+
+          `gcfreeze` : ``bool``
+            Collect the garbage afterwards and move all objects into the
+            permanent generation (if the python version provides
+            ``gc.freeze``)? This avoids touching the shared memory pages by
+            later garbage collections.
+
+        :Return: The templates (in the order of `names`)
+        :Rtype: ``list``
+        """
+        # pylint: disable = too-many-arguments
+
+        if callable(names):
+            names = names()
+        result = []
+        for name in names:
+            if basedir is not None:
+                name = _os.path.join(basedir, name)
+            template = self.from_file(  # noqa pylint: disable = unexpected-keyword-arg
+                name, encoding=encoding, key=name
+            )
+            template.warm(prerender=prerender, preadapter=preadapter)
+            result.append(template)
+
+        if gcfreeze:
+            _gc.collect()
+            freeze = getattr(_gc, 'freeze', None)
+            if freeze is not None:
+                freeze()
+        return result
@@ -24,6 +24,9 @@ r"""
 =================
 
 Factory Caching.
+
+`MemoizedFactory` provides the memoization keys for the factory methods,
+`Memoizer` is a bounded memoization storage.
 """
 if __doc__:
     # pylint: disable = redefined-builtin
@@ -31,6 +34,19 @@ if __doc__:
 __author__ = r"Andr\xe9 Malo".encode('ascii').decode('unicode_escape')
 __docformat__ = "restructuredtext en"
 
+import collections as _collections
+import itertools as _itertools
+import marshal as _marshal
+import time as _time
+try:
+    import threading as _threading
+except ImportError:
+    import dummy_threading as _threading
+import weakref as _weakref
+
+from ._exceptions import NodeTreeError
+from . import interfaces as _interfaces
+
 
 def _copy_doc(func):
     """
@@ -70,7 +86,7 @@ class MemoizedFactory(object):
                 overlay_eventfilters=None, overlay_streamfilters=None,
                 overlay_default_eventfilters=None,
                 overlay_default_streamfilters=None, default_encoding=None,
-                memoizer=None):
+                memoizer=None, cachedir=None, checkinterval=None):
         """ Create factory with replaced parameters """
         # pylint: disable = too-many-arguments
 
@@ -86,6 +102,8 @@ class MemoizedFactory(object):
             overlay_default_streamfilters=overlay_default_streamfilters,
             default_encoding=default_encoding,
             memoizer=memoizer,
+            cachedir=cachedir,
+            checkinterval=checkinterval,
         ))
     _copy_doc(replace)
 
@@ -170,3 +188,412 @@ class MemoizedFactory(object):
             key=key,
         )
     _copy_doc(from_streams)
+
+    def compile_all(self, names, encoding=None, basedir=None, workers=None,
+                    cls=None):
+        """ Load templates from files in parallel worker processes """
+        # pylint: disable = too-many-arguments
+
+        return self._factory.compile_all(
+            names,
+            encoding=encoding,
+            basedir=basedir,
+            workers=workers,
+            cls=cls,
+        )
+    _copy_doc(compile_all)
+
+    def warm(self, names, encoding=None, basedir=None, prerender=None,
+             preadapter=None, gcfreeze=True):
+        """ Load and prepare templates in advance """
+        # pylint: disable = too-many-arguments
+
+        return self._factory.warm(
+            names,
+            encoding=encoding,
+            basedir=basedir,
+            prerender=prerender,
+            preadapter=preadapter,
+            gcfreeze=gcfreeze,
+        )
+    _copy_doc(warm)
+
+
+#: Estimated sizes of the trees measured so far (``{tree: size}``)
+#:
+#: :Type: ``weakref.WeakKeyDictionary``
+_sizes = _weakref.WeakKeyDictionary()
+
+
+def tree_size(template):
+    """
+    Estimate the memory used by a template
+
+    The estimate is the size of the marshalled dump of the template's tree
+    (see `tdi.nodetree.Root.dump`). It's computed once per tree and
+    remembered as long as the tree is alive. Storing the same template
+    again (after an eviction or in another memoizer) doesn't dump the tree
+    again.
+
+    :Parameters:
+      `template` : `tdi.template.Template`
+        The template
+
+    :Return: The estimated size in bytes. If it cannot be determined
+             (e.g. because the value is not a template), 0 is returned.
+    :Rtype: ``int``
+    """
+    try:
+        tree = template.virgin_tree
+        try:
+            return _sizes[tree]
+        except KeyError:
+            size = _sizes[tree] = len(_marshal.dumps(tree.dump()))
+            return size
+    except (AttributeError, ValueError, TypeError, NodeTreeError):
+        return 0
+
+
+class _NoLock(object):
+    """
+    Dummy lock
+
+    `Memoizer` does its own locking, so the factory does not need to
+    serialize the cache access.
+
+    Note that the factory does not hold the lock while loading a template
+    anyway. Without a real lock, it also doesn't look up and store the
+    result atomically. So concurrent misses for the same key may load the
+    template more than once and the callers may receive different (but
+    equivalent) template objects. The last one stored is kept.
+    """
+
+    def acquire(self):
+        """ Acquire the lock (does nothing) """
+        pass
+
+    def release(self):
+        """ Release the lock (does nothing) """
+        pass
+
+
+class _Stripe(object):
+    """
+    Part of the memoizer storage with its own lock
+
+    :IVariables:
+      `lock` : Lock
+        Lock for the stripe access
+
+      `entries` : ``collections.OrderedDict``
+        The entries (``{key: (value, size, expires, stamp)}``) in LRU order.
+        The stamp is the (memoizer wide) sequence number of the last access.
+
+      `size` : ``int``
+        Current estimated size of all entries
+
+      `hits` : ``int``
+        Number of memoized values returned
+
+      `misses` : ``int``
+        Number of values stored for keys, which were not memoized
+
+      `evictions` : ``int``
+        Number of entries evicted because of the limits
+
+      `expirations` : ``int``
+        Number of entries dropped because of the TTL
+    """
+    __slots__ = (
+        'lock', 'entries', 'size', 'hits', 'misses', 'evictions',
+        'expirations',
+    )
+
+    def __init__(self):
+        """ Initialization """
+        self.lock = _threading.Lock()
+        self.entries = _collections.OrderedDict()
+        self.size = self.hits = self.misses = 0
+        self.evictions = self.expirations = 0
+
+
+class Memoizer(object):
+    """
+    Bounded memoization storage
+
+    Pass it as ``memoizer`` argument to the template factory. Entries are
+    evicted in LRU order, if the cache exceeds `maxentries` entries or
+    `maxbytes` estimated bytes. Entries older than `ttl` seconds are
+    dropped when they are looked up.
+
+    The keys are distributed over `stripes` independently locked parts of
+    the storage (by their hash). The limits apply to the whole storage.
+    Evictions pick the stripe with the least recently used oldest entry.
+
+    Loading is not serialized per key. Concurrent misses for the same key
+    may load the template more than once (see `_NoLock`).
+
+    :IVariables:
+      `lock` : Lock
+        Dummy lock (the access is locked per stripe)
+
+      `maxentries` : ``int``
+        Maximum number of entries or ``None``
+
+      `maxbytes` : ``int``
+        Maximum estimated size of all entries or ``None``
+
+      `ttl` : ``float``
+        Time to live of an entry in seconds or ``None``
+
+      `_sizeof` : ``callable``
+        Size estimator
+
+      `_timer` : ``callable``
+        Timer function
+
+      `_stripes` : ``tuple``
+        The stripes
+
+      `_stamp` : ``callable``
+        Access sequence number generator
+
+      `_total` : Lock
+        Lock for the global accounting (`_entries` and `_size`) and the
+        eviction. It's never acquired while a stripe lock is held.
+
+      `_entries` : ``int``
+        Number of all entries
+
+      `_size` : ``int``
+        Estimated size of all entries
+    """
+    __implements__ = [_interfaces.MemoizerInterface]
+
+    def __init__(self, maxentries=None, maxbytes=None, ttl=None, stripes=16,
+                 sizeof=None, timer=None):
+        """
+        Initialization
+
+        :Parameters:
+          `maxentries` : ``int``
+            Maximum number of entries. If omitted or ``None``, the number is
+            not limited.
+
+          `maxbytes` : ``int``
+            Maximum estimated size of all entries in bytes. If omitted or
+            ``None``, the size is not limited.
+
+          `ttl` : ``float``
+            Time to live of an entry in seconds. If omitted or ``None``,
+            entries don't expire.
+
+          `stripes` : ``int``
+            Number of independently locked parts of the storage
+
+          `sizeof` : ``callable``
+            Size estimator, takes the memoized value and returns its size in
+            bytes. If omitted or ``None``, `tree_size` is used.
+
+          `timer` : ``callable``
+            Timer function. If omitted or ``None``, ``time.time`` is used.
+        """
+        # pylint: disable = too-many-arguments
+
+        self.lock = _NoLock()
+        self.maxentries = maxentries
+        self.maxbytes = maxbytes
+        self.ttl = ttl
+        self._sizeof = sizeof or tree_size
+        self._timer = timer or _time.time
+        self._stripes = tuple([
+            _Stripe() for _ in xrange(max(1, stripes))
+        ])
+        self._stamp = _itertools.count().next
+        self._total = _threading.Lock()
+        self._entries = self._size = 0
+
+    def _stripe(self, key):
+        """
+        Find the stripe of a key
+
+        :Parameters:
+          `key` : hashable
+            Key
+
+        :Return: The stripe
+        :Rtype: `_Stripe`
+
+        :Exceptions:
+          - `TypeError` : Unhashable key
+        """
+        stripes = self._stripes
+        return stripes[hash(key) % len(stripes)]
+
+    def _account(self, entries, size):
+        """
+        Update the global accounting and evict entries beyond the limits
+
+        The stripe locks must not be held by the caller.
+
+        :Parameters:
+          `entries` : ``int``
+            Change of the number of entries
+
+          `size` : ``int``
+            Change of the estimated size
+        """
+        maxentries, maxbytes = self.maxentries, self.maxbytes
+        self._total.acquire()
+        try:
+            self._entries += entries
+            self._size += size
+            while (maxentries is not None and self._entries > maxentries) \
+                    or (maxbytes is not None and self._size > maxbytes):
+                victim, oldest = None, None
+                for stripe in self._stripes:
+                    stripe.lock.acquire()
+                    try:
+                        if stripe.entries:
+                            stamp = stripe.entries[
+                                next(iter(stripe.entries))
+                            ][3]
+                            if oldest is None or stamp < oldest:
+                                victim, oldest = stripe, stamp
+                    finally:
+                        stripe.lock.release()
+                if victim is None:
+                    break
+
+                victim.lock.acquire()
+                try:
+                    if not victim.entries:
+                        continue
+                    _, (_, size, _, _) = victim.entries.popitem(last=False)
+                    victim.size -= size
+                    victim.evictions += 1
+                finally:
+                    victim.lock.release()
+                self._entries -= 1
+                self._size -= size
+        finally:
+            self._total.release()
+
+    def __len__(self):
+        """
+        Determine the number of memoized entries
+
+        :Return: The number of entries
+        :Rtype: ``int``
+        """
+        return self._entries
+
+    @property
+    def size(self):
+        """
+        Current estimated size of all entries in bytes
+
+        :Type: ``int``
+        """
+        return self._size
+
+    def stats(self):
+        """
+        Determine the cache counters
+
+        :Return: The counters (``{'hits': int, 'misses': int, 'evictions':
+                 int, 'expirations': int, 'entries': int, 'size': int}``)
+        :Rtype: ``dict``
+        """
+        result = dict.fromkeys((
+            'hits', 'misses', 'evictions', 'expirations', 'entries', 'size'
+        ), 0)
+        for stripe in self._stripes:
+            stripe.lock.acquire()
+            try:
+                result['hits'] += stripe.hits
+                result['misses'] += stripe.misses
+                result['evictions'] += stripe.evictions
+                result['expirations'] += stripe.expirations
+                result['entries'] += len(stripe.entries)
+                result['size'] += stripe.size
+            finally:
+                stripe.lock.release()
+        return result
+
+    def __contains__(self, key):
+        """ :See: `tdi.interfaces.MemoizerInterface` """
+        stripe = self._stripe(key)
+        stripe.lock.acquire()
+        try:
+            entry = stripe.entries.get(key)
+            if entry is None:
+                return False
+            if entry[2] is None or entry[2] > self._timer():
+                return True
+            del stripe.entries[key]
+            stripe.size -= entry[1]
+            stripe.expirations += 1
+        finally:
+            stripe.lock.release()
+        self._account(-1, -entry[1])
+        return False
+
+    def __getitem__(self, key):
+        """
+        :See: `tdi.interfaces.MemoizerInterface`
+
+        :Exceptions:
+          - `KeyError` : The key is not memoized (anymore)
+        """
+        stripe = self._stripe(key)
+        stripe.lock.acquire()
+        try:
+            entry = stripe.entries.pop(key)
+            stripe.entries[key] = entry[:3] + (self._stamp(),)
+            stripe.hits += 1
+            return entry[0]
+        finally:
+            stripe.lock.release()
+
+    def __setitem__(self, key, value):
+        """
+        :See: `tdi.interfaces.MemoizerInterface`
+
+        Values larger than `maxbytes` are not stored at all.
+        """
+        stripe = self._stripe(key)
+        size, expires = self._sizeof(value), self.ttl
+        if expires is not None:
+            expires += self._timer()
+        store = self.maxbytes is None or size <= self.maxbytes
+        stripe.lock.acquire()
+        try:
+            entries = stripe.entries
+            old = entries.pop(key, None)
+            if old is None:
+                stripe.misses += 1
+                dentries, dsize = 0, 0
+            else:
+                stripe.size -= old[1]
+                dentries, dsize = -1, -old[1]
+            if store:
+                entries[key] = value, size, expires, self._stamp()
+                stripe.size += size
+                dentries += 1
+                dsize += size
+        finally:
+            stripe.lock.release()
+        self._account(dentries, dsize)
+
+    def clear(self):
+        """ Drop all entries """
+        for stripe in self._stripes:
+            stripe.lock.acquire()
+            try:
+                entries, size = len(stripe.entries), stripe.size
+                stripe.entries.clear()
+                stripe.size = 0
+            finally:
+                stripe.lock.release()
+            self._account(-entries, -size)
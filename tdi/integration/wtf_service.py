@@ -40,6 +40,10 @@ Configuration
   #autoreload = False
   #require_scopes = False
   #require_methods = False
+  # bound the memoized templates (unlimited by default)
+  #memoize_maxentries =
+  #memoize_maxbytes =
+  #memoize_ttl =
   #filters.html.load =
   #filters.html.overlay =
   #filters.html.overlay_class =
@@ -278,7 +282,7 @@ class GlobalTemplate(object):
     """
 
     def __init__(self, locations, autoreload=False, require_scopes=False,
-                 require_methods=False, filters=None):
+                 require_methods=False, filters=None, memoize=None):
         """
         Initialization
 
@@ -297,7 +301,14 @@ class GlobalTemplate(object):
 
           `filters` : ``dict``
             Filter factories to apply
+
+          `memoize` : ``dict``
+            Arguments for `tdi.factory_memoize.Memoizer` (like
+            ``maxentries``, ``maxbytes`` or ``ttl``). If omitted or
+            ``None``, the memoized templates are not limited.
         """
+        # pylint: disable = too-many-arguments
+
         self._dirs = list(_it.chain(*[
             # pylint: disable = unsubscriptable-object
             _resource()[location] for location in locations
@@ -323,7 +334,10 @@ class GlobalTemplate(object):
         def loader(which, post_load=None, overlay_cls=None, **kwargs):
             """ Template loader """
             kwargs['autoupdate'] = autoreload
-            kwargs['memoizer'] = _Memoizer()
+            if memoize is None:
+                kwargs['memoizer'] = _Memoizer()
+            else:
+                kwargs['memoizer'] = _factory_memoize.Memoizer(**memoize)
             factory = _factory_memoize.MemoizedFactory(
                 getattr(_markup_factory, which).replace(**kwargs)
             )
@@ -710,12 +724,20 @@ class TDIService(object):
         """ Initialization """
         # pylint: disable = unused-argument
 
+        memoize = {}
+        for name, convert in (('maxentries', int), ('maxbytes', int),
+                              ('ttl', float)):
+            value = config.tdi('memoize_' + name, None)
+            if value is not None:
+                memoize[name] = convert(value)
+
         self._global = GlobalTemplate(
             config.tdi.locations,
             config.tdi('autoreload', False),
             config.tdi('require_scopes', False),
             config.tdi('require_methods', False),
             config.tdi('filters', None),
+            memoize or None,
         )
 
     def shutdown(self):
@@ -560,6 +560,9 @@ class MemoizerInterface(object):
 
         :Exceptions:
           - `TypeError` : Unhashable key
+          - `KeyError` : The entry was dropped after `__contains__` was
+            asked (bounded memoizers may do that). It's treated as not
+            memoized.
         """
 
     def __setitem__(self, key, value):
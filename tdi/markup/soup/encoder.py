@@ -31,8 +31,25 @@ if __doc__:  # pragma: no cover
 __author__ = r"Andr\xe9 Malo".encode('ascii').decode('unicode_escape')
 __docformat__ = "restructuredtext en"
 
+import re as _re
+
 from ... import interfaces as _interfaces
 
+#: Replacements of the special characters
+_ESCAPES = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}
+
+
+def _escape_char(match, _escapes=_ESCAPES):
+    """ Return the replacement of the matched special character """
+    return _escapes[match.group(0)]
+
+
+#: Escape attribute values in one pass (returns unchanged values as-is)
+_escape_attribute = _re.compile(r'[&<>"]').sub
+
+#: Escape content in one pass (returns unchanged values as-is)
+_escape_content = _re.compile(r'[&<>]').sub
+
 
 class SoupEncoder(object):
     """ Encoder for HTML/XML output """
@@ -67,42 +84,17 @@ class SoupEncoder(object):
 
     def attribute(self, value):
         """ :See: `EncoderInterface` """
+        value = _escape_attribute(_escape_char, value)
         if isinstance(value, unicode):
-            value = (
-                value
-                .replace(u'&', u'&amp;')
-                .replace(u'<', u'&lt;')
-                .replace(u'>', u'&gt;')
-                .replace(u'"', u'&quot;')
-                .encode(self.encoding, 'xmlcharrefreplace')
-            )
-        else:
-            value = (
-                value
-                .replace('&', '&amp;')
-                .replace('<', '&lt;')
-                .replace('>', '&gt;')
-                .replace('"', '&quot;')
-            )
-
+            value = value.encode(self.encoding, 'xmlcharrefreplace')
         return '"%s"' % value
 
     def content(self, value):
         """ :See: `EncoderInterface` """
+        value = _escape_content(_escape_char, value)
         if isinstance(value, unicode):
-            return (
-                value
-                .replace(u'&', u'&amp;')
-                .replace(u'<', u'&lt;')
-                .replace(u'>', u'&gt;')
-                .encode(self.encoding, 'xmlcharrefreplace')
-            )
-        return (
-            value
-            .replace('&', '&amp;')
-            .replace('<', '&lt;')
-            .replace('>', '&gt;')
-        )
+            return value.encode(self.encoding, 'xmlcharrefreplace')
+        return value
 
     def encode(self, value):
         """ :See: `EncoderInterface` """
@@ -137,7 +137,10 @@ class SoupLexer(object):
         The listener the events shall be sent to
 
       `_buffer` : ``str``
-        Current unprocessed buffer
+        Current buffer
+
+      `_pos` : ``int``
+        Start of the unprocessed part of the buffer
 
       `_conditional_ie_comments` : ``bool``
         Handle conditional IE comments as text?
@@ -167,7 +170,7 @@ class SoupLexer(object):
 
         self._state = self.TEXT
         self._lexers = [getattr(self, name) for name in self._LEXERS]
-        self._buffer = ''
+        self._buffer, self._pos = '', 0
         self._conditional_ie_comments = bool(conditional_ie_comments)
 
     def feed(self, food):
@@ -178,7 +181,9 @@ class SoupLexer(object):
           `food` : ``str``
             The data to process
         """
-        self._buffer += food
+        # The buffer is only compacted here, the lexer states just move the
+        # position
+        self._buffer, self._pos = self._buffer[self._pos:] + food, 0
         self._lex()
 
     def finalize(self):
@@ -191,7 +196,7 @@ class SoupLexer(object):
           - `LexerEOFError` : The rest buffer could not be consumed
         """
         self._lex()
-        if self._buffer:
+        if self._pos < len(self._buffer):
             raise LexerEOFError(
                 "Unfinished parser state %s" % self._STATES[self._state]
             )
@@ -207,7 +212,7 @@ class SoupLexer(object):
 
     def _lex(self):
         """ Parse the current buffer """
-        while self._buffer:
+        while self._pos < len(self._buffer):
             if self._lexers[self._state]():
                 break
 
@@ -221,18 +226,18 @@ class SoupLexer(object):
         :Return: Unfinished state?
         :Rtype: ``bool``
         """
-        data = self._buffer
-        pos = data.find('<')
-        if pos == 0:
+        data, start = self._buffer, self._pos
+        pos = data.find('<', start)
+        if pos == start:
             self._state = self.MARKUP
             return False
         elif pos == -1:
-            self._buffer = ''
+            pos = len(data)
         else:
-            self._buffer, data = data[pos:], data[:pos]
             self._state = self.MARKUP
 
-        self._listener.handle_text(data)
+        self._pos = pos
+        self._listener.handle_text(data[start:pos])
         return False
 
     def _lex_cdata(self):
@@ -245,12 +250,12 @@ class SoupLexer(object):
         :Rtype: ``bool``
         """
         incomplete = False
-        data, pos = self._buffer, 0
+        data, start = self._buffer, self._pos
+        pos = start
         while True:
             pos = data.find('<', pos)
             if pos == -1:
                 pos = len(data)
-                self._buffer = ''
                 break
             else:
                 char = data[pos + 1:pos + 2]
@@ -263,9 +268,9 @@ class SoupLexer(object):
                 else:
                     pos += 1
 
-        if pos > 0:
-            self._buffer, data = data[pos:], data[:pos]
-            self._listener.handle_text(data)
+        if pos > start:
+            self._pos = pos
+            self._listener.handle_text(data[start:pos])
 
         return incomplete
 
@@ -284,11 +289,11 @@ class SoupLexer(object):
         :Return: Unfinished state?
         :Rtype: ``bool``
         """
-        data = self._buffer
-        if len(data) < 2:
+        data, start = self._buffer, self._pos
+        if len(data) - start < 2:
             return True
 
-        char = data[1]
+        char = data[start + 1]
         state = (self.ENDTAG, self.DECL, self.PI, self.EMPTY, -1)[
             "/!?>".find(char)
         ]
@@ -297,8 +302,8 @@ class SoupLexer(object):
                 state = self.STARTTAG
             else:
                 state = self.TEXT
-                self._buffer = data[1:]
-                self._listener.handle_text(data[0])
+                self._pos = start + 1
+                self._listener.handle_text(data[start])
 
         self._state = state
         return False
@@ -349,13 +354,13 @@ class SoupLexer(object):
         :Return: Unfinished State?
         :Rtype: ``bool``
         """
-        data = self._buffer
-        match = self._START_MATCH(data)
+        data, start = self._buffer, self._pos
+        match = self._START_MATCH(data, start)
         if match is None:
             return True
 
         pos = match.end()
-        self._buffer, data = data[pos:], data[:pos]
+        self._pos, data = pos, data[start:pos]
 
         name, attrstring = match.group('name', 'attr')
         attr, closed = [], False
@@ -385,12 +390,12 @@ class SoupLexer(object):
         :Return: Unfinished state?
         :Rtype: ``bool``
         """
-        data = self._buffer
-        pos = data.find('>') + 1
+        data, start = self._buffer, self._pos
+        pos = data.find('>', start) + 1
         if pos == 0:
             return True
 
-        self._buffer, data = data[pos:], data[:pos]
+        self._pos, data = pos, data[start:pos]
         name = data[2:-1].strip()
 
         if self._cdata_name is not None and \
@@ -426,21 +431,21 @@ class SoupLexer(object):
         :Return: Unfinished state?
         :Rtype: ``bool``
         """
-        data = self._buffer
-        if len(data) < 7:
+        data, start = self._buffer, self._pos
+        if len(data) - start < 7:
             return True
 
         if self._conditional_ie_comments:
-            match = iec = self._IE_COMMENT_MATCH(data, 4)
+            match = iec = self._IE_COMMENT_MATCH(data, start + 4)
         else:
             match = iec = None
         if match is None:
-            match = self._COMMENT_SEARCH(data, 4)
+            match = self._COMMENT_SEARCH(data, start + 4)
             if match is None:
                 return True
 
         pos = match.end()
-        self._buffer, data = data[pos:], data[:pos]
+        self._pos, data = pos, data[start:pos]
 
         self._state = self.TEXT
         if iec:
@@ -486,14 +491,14 @@ class SoupLexer(object):
         :Return: Unfinished state?
         :Rtype: ``bool``
         """
-        data = self._buffer
-        match = self._MSECTION_MATCH(data)
+        data, begin = self._buffer, self._pos
+        match = self._MSECTION_MATCH(data, begin)
         if match is None:
-            match = self._MSECTIONINVALID_MATCH(data)
+            match = self._MSECTIONINVALID_MATCH(data, begin)
             if match is not None:  # pass invalid msection as text
                 pos = match.end()
-                self._buffer = data[pos:]
-                data = data[:pos]
+                self._pos = pos
+                data = data[begin:pos]
                 self._state = self.TEXT
                 self._listener.handle_text(data)
                 return False
@@ -513,7 +518,7 @@ class SoupLexer(object):
             return True
         pos, end = match.end(), match.start()
         value = data[start:end]
-        self._buffer, data = data[pos:], data[:pos]
+        self._pos, data = pos, data[begin:pos]
 
         self._state = self.TEXT
         if iec:
@@ -584,26 +589,26 @@ class SoupLexer(object):
         :Return: Unfinished state?
         :Rtype: ``bool``
         """
-        data = self._buffer
-        if len(data) < 3:
+        data, start = self._buffer, self._pos
+        if len(data) - start < 3:
             return True
 
-        if data.startswith('<!--'):
+        if data.startswith('<!--', start):
             self._state = self.COMMENT
             return False
-        elif data.startswith('<!['):
+        elif data.startswith('<![', start):
             self._state = self.MSECTION
             return False
-        elif data == '<!-':
+        elif len(data) - start == 3 and data.startswith('<!-', start):
             return True
 
-        match = self._DECL_MATCH(data)
+        match = self._DECL_MATCH(data, start)
         if match is None:
             return True
 
         name, value = match.group('name', 'value')
         pos = match.end()
-        self._buffer, data = data[pos:], data[:pos]
+        self._pos, data = pos, data[start:pos]
 
         self._state = self.TEXT
         self._listener.handle_decl(name, value.strip(), data)
@@ -618,13 +623,13 @@ class SoupLexer(object):
         :Return: Unfinished state?
         :Rtype: ``bool``
         """
-        data = self._buffer
-        pos = data.find('?>', 2)
+        data, start = self._buffer, self._pos
+        pos = data.find('?>', start + 2)
         if pos == -1:
             return True
         pos += 2
 
-        self._buffer, data = data[pos:], data[:pos]
+        self._pos, data = pos, data[start:pos]
 
         self._state = self.TEXT
         self._listener.handle_pi(data)
@@ -639,7 +644,8 @@ class SoupLexer(object):
         :Return: Unfinished state?
         :Rtype: ``bool``
         """
-        self._buffer, data = self._buffer[2:], self._buffer[:2]
+        start = self._pos
+        self._pos, data = start + 2, self._buffer[start:start + 2]
 
         self._state = self.TEXT
         self._listener.handle_starttag('', [], False, data)
@@ -53,7 +53,7 @@ class TextLexer(object):
 
         self.state = self.TEXT
         self._lexers = [getattr(self, name) for name in self._LEXERS]
-        self._buffer = ''
+        self._buffer, self._pos = '', 0
 
     def feed(self, food):
         """
@@ -63,7 +63,9 @@ class TextLexer(object):
           `food` : ``str``
             The data to process
         """
-        self._buffer += food
+        # The buffer is only compacted here, the lexer states just move the
+        # position
+        self._buffer, self._pos = self._buffer[self._pos:] + food, 0
         self._lex()
 
     def finalize(self):
@@ -76,7 +78,7 @@ class TextLexer(object):
           - `LexerEOFError` : The rest buffer could not be consumed
         """
         self._lex()
-        if self._buffer:
+        if self._pos < len(self._buffer):
             raise LexerEOFError(
                 "Unfinished parser state %s" % self._STATES[self.state]
             )
@@ -85,7 +87,7 @@ class TextLexer(object):
 
     def _lex(self):
         """ Parse the current buffer """
-        while self._buffer:
+        while self._pos < len(self._buffer):
             if self._lexers[self.state]():
                 break
 
@@ -99,18 +101,18 @@ class TextLexer(object):
         :Return: Unfinished state?
         :Rtype: ``bool``
         """
-        data = self._buffer
-        pos = data.find('[')
-        if pos == 0:
+        data, start = self._buffer, self._pos
+        pos = data.find('[', start)
+        if pos == start:
             self.state = self.MARKUP
             return False
         elif pos == -1:
-            self._buffer = ''
+            pos = len(data)
         else:
-            self._buffer, data = data[pos:], data[:pos]
             self.state = self.MARKUP
 
-        self._listener.handle_text(data)
+        self._pos = pos
+        self._listener.handle_text(data[start:pos])
         return False
 
     def _lex_markup(self):
@@ -123,11 +125,11 @@ class TextLexer(object):
         :Return: Unfinished state?
         :Rtype: ``bool``
         """
-        data = self._buffer
-        if len(data) < 2:
+        data, start = self._buffer, self._pos
+        if len(data) - start < 2:
             return True
 
-        char = data[1]
+        char = data[start + 1]
         if char == '/':
             state = self.ENDTAG
         elif char == '#':
@@ -136,8 +138,8 @@ class TextLexer(object):
             state = self.PI
         elif char == ']':
             state = self.TEXT
-            self._listener.handle_escape(data[0], data[:2])
-            self._buffer = data[2:]
+            self._pos = start + 2
+            self._listener.handle_escape(data[start], data[start:start + 2])
         else:
             state = self.STARTTAG
 
@@ -208,13 +210,16 @@ class TextLexer(object):
         :Return: Unfinished State?
         :Rtype: ``bool``
         """
-        data = self._buffer
-        match = self._EMPTY_START_MATCH(data) or self._START_MATCH(data)
+        data, start = self._buffer, self._pos
+        match = (
+            self._EMPTY_START_MATCH(data, start) or
+            self._START_MATCH(data, start)
+        )
         if match is None:
             return True
 
         pos = match.end()
-        self._buffer, data = data[pos:], data[:pos]
+        self._pos, data = pos, data[start:pos]
 
         attrstring = match.group(1)
         quoted = attrstring.startswith('[')
@@ -258,12 +263,12 @@ class TextLexer(object):
         :Return: Unfinished state?
         :Rtype: ``bool``
         """
-        data = self._buffer
-        pos = data.find(']') + 1
+        data, start = self._buffer, self._pos
+        pos = data.find(']', start) + 1
         if pos == 0:
             return True
 
-        self._buffer, data = data[pos:], data[:pos]
+        self._pos, data = pos, data[start:pos]
         name = data[2:-1].strip()
 
         self.state = self.TEXT
@@ -284,16 +289,16 @@ class TextLexer(object):
         :Return: Unfinished state?
         :Rtype: ``bool``
         """
-        data = self._buffer
-        if len(data) < 4:
+        data, start = self._buffer, self._pos
+        if len(data) - start < 4:
             return True
 
-        match = self._COMMENT_SEARCH(data, 2)
+        match = self._COMMENT_SEARCH(data, start + 2)
         if match is None:
             return True
 
         pos = match.end()
-        self._buffer, data = data[pos:], data[:pos]
+        self._pos, data = pos, data[start:pos]
 
         self.state = self.TEXT
         self._listener.handle_comment(data)
@@ -308,13 +313,13 @@ class TextLexer(object):
         :Return: Unfinished state?
         :Rtype: ``bool``
         """
-        data = self._buffer
-        pos = data.find('?]', 2)
+        data, start = self._buffer, self._pos
+        pos = data.find('?]', start + 2)
         if pos == -1:
             return True
         pos += 2
 
-        self._buffer, data = data[pos:], data[:pos]
+        self._pos, data = pos, data[start:pos]
 
         self.state = self.TEXT
         self._listener.handle_pi(data)
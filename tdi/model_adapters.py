@@ -31,9 +31,75 @@ if __doc__:
 __author__ = r"Andr\xe9 Malo".encode('ascii').decode('unicode_escape')
 __docformat__ = "restructuredtext en"
 
+import weakref as _weakref
+
 from ._exceptions import ModelMissingError
 from . import interfaces as _interfaces
 
+#: Method resolution cache, shared by all render adapters
+#: (``{model class: {prefix: {name: (methodname, in_class)}}}``). Classes,
+#: which customize attribute access, are mapped to ``None``. The model
+#: classes are referenced weakly. Names not found in the class
+#: (``in_class`` is false) are checked again on every lookup, so methods
+#: added to the class later are found.
+#:
+#: :Type: ``weakref.WeakKeyDictionary``
+_method_cache = _weakref.WeakKeyDictionary()
+
+#: Maximum number of model classes kept in the method resolution cache. If
+#: it's exceeded, an arbitrary entry is evicted.
+#:
+#: :Type: ``int``
+_METHOD_CACHE_SIZE = 1024
+
+
+def invalidate_method_cache(cls=None):
+    """
+    Invalidate the method resolution cache
+
+    Model methods are looked up per model class and cached. Methods
+    added, removed or replaced at runtime are picked up without
+    invalidation. If the attribute access of a model class is customized
+    at runtime (by adding ``__getattr__`` or ``__getattribute__``), the
+    cache needs to be invalidated for that class.
+
+    :Parameters:
+      `cls` : ``type``
+        The model class to invalidate (subclasses are invalidated as well).
+        If omitted or ``None``, the whole cache is cleared.
+    """
+    if cls is None:
+        _method_cache.clear()
+    else:
+        for key in list(_method_cache):
+            if cls in getattr(key, '__mro__', ()):
+                _method_cache.pop(key, None)
+
+
+def _method_names(cls):
+    """
+    Create the method name cache for a model class
+
+    :Parameters:
+      `cls` : ``type``
+        The model class
+
+    :Return: The name cache (``{prefix: {name: (methodname, in_class)}}``)
+             or ``None`` if the class customizes attribute access
+    :Rtype: ``dict``
+    """
+    if len(_method_cache) >= _METHOD_CACHE_SIZE:
+        try:
+            _method_cache.popitem()
+        except KeyError:
+            pass
+    names = None
+    if cls.__getattribute__ is object.__getattribute__ \
+            and not hasattr(cls, '__getattr__'):
+        names = {}
+    _method_cache[cls] = names
+    return names
+
 
 class RenderAdapter(object):
     """
@@ -64,7 +130,7 @@ class RenderAdapter(object):
 
         requiremethods = bool(requiremethods)
         requirescopes = bool(requirescopes)
-        getattr_ = getattr
+        getattr_, type_, empty = getattr, type, {}
         models = {'': model}
 
         class unset(object):
@@ -88,7 +154,7 @@ class RenderAdapter(object):
 
             :Parameters:
               `prefix` : ``str``
-                The method prefix (``render``, or ``separate``)
+                The method prefix (``render``, ``separate`` or ``cache``)
 
               `name` : ``str``
                 The node name
@@ -128,10 +194,39 @@ class RenderAdapter(object):
                             model = None
                         models[scope_part] = model
 
-            method = getattr_(model, "%s_%s" % (prefix, name), unset)
+            cls = type_(model)
+            names = _method_cache.get(cls, unset)
+            if names is unset:
+                names = _method_names(cls)
+            if names is None:
+                methodname, in_class = "%s_%s" % (prefix, name), True
+            else:
+                try:
+                    methodname, in_class = names[prefix][name]
+                except KeyError:
+                    methodname, in_class = "%s_%s" % (prefix, name), None
+                if not in_class:
+                    # Misses are checked again, the method may have been
+                    # added to the class in the meantime
+                    cached, in_class = in_class is not None, False
+                    for base in cls.__mro__:
+                        if methodname in vars(base):
+                            in_class = True
+                            break
+                    if in_class or not cached:
+                        names.setdefault(prefix, {})[name] = \
+                            methodname, in_class
+
+            if in_class:
+                method = getattr_(model, methodname, unset)
+            else:
+                # Only the instance dict is left to look into
+                method = getattr_(model, '__dict__', empty).get(
+                    methodname, unset
+                )
             if method is unset:
                 if requiremethods:
-                    raise ModelMissingError("%s_%s" % (prefix, name))
+                    raise ModelMissingError(methodname)
                 method = None
             return method
 
@@ -208,7 +303,7 @@ class PreRenderWrapper(object):
 
             :Parameters:
               `prefix` : ``str``
-                The method prefix (``render``, or ``separate``)
+                The method prefix (``render``, ``separate`` or ``cache``)
 
               `name` : ``str``
                 The node name
@@ -233,8 +328,9 @@ class PreRenderWrapper(object):
             # These methods we only see of the model repeats a node, but
             # doesn't define a separator logic. We do not want to write out
             # the special node stuff in this case (since the separators would
-            # be alone after that).
-            if prefix == 'separate':
+            # be alone after that). Other (cache) methods are not needed for
+            # prerendering either.
+            if prefix != 'render':
                 return None
 
             # The node is repeated in order to get our hands on
@@ -297,4 +393,5 @@ c = c.load('impl')
 if c is not None:
     RenderAdapter = c.RenderAdapter  # noqa
     PreRenderWrapper = c.PreRenderWrapper  # noqa
+    _method_cache = c.method_cache  # noqa
 del c
@@ -36,6 +36,11 @@ from . import _finalize
 from . import _nodetree
 from . import _util
 
+#: Maximum number of resolved start nodes remembered per tree
+#:
+#: :Type: ``int``
+_STARTNODES_SIZE = 1024
+
 
 class RawNode(object):
     """
@@ -142,6 +147,7 @@ class RawNode(object):
         normname = udict['decoder'].normalize(name)
         realname = attr.get(normname, (name,))[0]
         attr[normname] = (realname, value)
+        udict.pop('starttag', None)
 
     def __getitem__(self, name):
         """
@@ -180,6 +186,8 @@ class RawNode(object):
         except KeyError:
             # Ignore, because this is not an error.
             pass
+        else:
+            udict.pop('starttag', None)
 
 
 class Node(object):
@@ -202,9 +210,13 @@ class Node(object):
 
       `_udict` : ``dict``
         The dict containing node information
+
+      `_shared` : ``bool``
+        Is `_udict` still shared with the template node? It's copied before
+        the first modification.
     """
     _usernode = True
-    __slots__ = ['content', 'raw', 'ctx', '_model', '_udict']
+    __slots__ = ['content', 'raw', 'ctx', '_model', '_udict', '_shared']
 
     # pylint: disable = protected-access
 
@@ -231,7 +243,7 @@ class Node(object):
         def fset(self, content):
             if not isinstance_(content, basestring_):
                 content = str_(content)
-            udict = self._udict
+            udict = self._unshare()
             udict['content'] = (udict['encoder'].content(content), None)
             udict['namedict'] = {}
 
@@ -250,7 +262,7 @@ class Node(object):
         # pylint: disable = missing-docstring
 
         def fset(self, value):
-            self._udict['noelement'] = value and True or False
+            self._unshare()['noelement'] = value and True or False
 
         def fget(self):
             return self._udict['noelement']
@@ -281,6 +293,7 @@ class Node(object):
         # pylint: disable = missing-docstring
 
         def fget(self):
+            self._unshare()
             return RawNode(self)
         return locals()
 
@@ -313,9 +326,16 @@ class Node(object):
             return node
 
         self = object.__new__(cls)
-        udict = node._udict.copy()
-        udict['attr'] = udict['attr'].copy()
-        udict['nodes'] = udict['nodes'][:]
+        if node._usernode and not node._shared:
+            udict = node._udict.copy()
+            udict['attr'] = udict['attr'].copy()
+            udict['nodes'] = udict['nodes'][:]
+            self._shared = False
+        else:
+            # Template nodes don't change anymore, so their data is shared
+            # until the node is modified (see `_unshare`).
+            udict = node._udict
+            self._shared = True
         self._udict = udict
         self._model = model
         if udict.get('callback'):
@@ -325,6 +345,23 @@ class Node(object):
 
         return self
 
+    def _unshare(self):
+        """
+        Make sure, the node data is not shared with the template node
+
+        This needs to be called before the node data is modified.
+
+        :Return: The node's own udict
+        :Rtype: ``dict``
+        """
+        udict = self._udict
+        if self._shared:
+            udict = udict.copy()
+            udict['attr'] = udict['attr'].copy()
+            udict['nodes'] = udict['nodes'][:]
+            self._udict, self._shared = udict, False
+        return udict
+
     def __call__(self, name):
         """
         Determine direct subnodes by name
@@ -349,17 +386,26 @@ class Node(object):
         except (UnicodeError, KeyError):
             raise NodeNotFoundError(name)
 
+        node, isproto = self, _nodetree.isproto
         while idx < 0:  # walk through transparent "nodes"
             kind, result = udict['nodes'][-1 - idx]
             if not result._usernode:
                 result = Node(result, self._model, self.ctx)
+                node._unshare()['nodes'][-1 - idx] = (kind, result)
+            elif isproto(udict, -1 - idx, result):
+                result = _nodetree.copylazy(
+                    result, self._model, self.ctx, Node
+                )
                 udict['nodes'][-1 - idx] = (kind, result)
-            udict = result._udict
+            node, udict = result, result._udict
             idx = udict['namedict'][name]
 
         kind, result = udict['nodes'][idx]
         if not result._usernode:
             result = Node(result, self._model, self.ctx)
+            node._unshare()['nodes'][idx] = (kind, result)
+        elif isproto(udict, idx, result):
+            result = _nodetree.copylazy(result, self._model, self.ctx, Node)
             udict['nodes'][idx] = (kind, result)
         else:
             result.ctx = self.ctx
@@ -406,7 +452,7 @@ class Node(object):
             attributes). Objects that are not ``None`` and and not
             ``unicode`` are stored as their string representation.
         """
-        udict = self._udict
+        udict = self._unshare()
         if value is not None:
             if not isinstance(value, basestring):
                 value = str(value)
@@ -417,6 +463,7 @@ class Node(object):
         normname = udict['decoder'].normalize(name)
         realname = attr.get(normname, [name])[0]
         attr[normname] = (realname, value)
+        udict.pop('starttag', None)
 
     def __getitem__(self, name):
         """
@@ -451,7 +498,7 @@ class Node(object):
           `name` : ``str``
             The name of the attribute to delete (case insensitive)
         """
-        udict = self._udict
+        udict = self._unshare()
         try:
             del udict['attr'][
                 udict['decoder'].normalize(udict['encoder'].name(name))
@@ -459,6 +506,8 @@ class Node(object):
         except KeyError:
             # Ignore, because this is not an error.
             pass
+        else:
+            udict.pop('starttag', None)
 
     def repeat(self, callback, itemlist, *fixed, **kwargs):
         """
@@ -519,7 +568,106 @@ class Node(object):
             raise TypeError("Unrecognized keyword parameters")
         else:
             separate = None
-        self._udict['repeated'] = (callback, iter(itemlist), fixed, separate)
+        self._unshare()['repeated'] = (
+            callback, iter(itemlist), fixed, separate
+        )
+
+    def repeat_batch(self, callback, itemlist, *fixed, **kwargs):
+        """
+        Repeat the snippet ``len(list(itemlist))`` times, filled batchwise
+
+        The actually supported signature is::
+
+            repeat_batch(self, callback, itemlist, *fixed, batch=512,
+                         separate=None)
+
+        In contrast to `repeat`, the callback is not called per repeated
+        node, but once per batch with a list of ``(node, item)`` pairs.
+        The nodes of a batch are created before the callback is called.
+        If the callback returns a true value, the nodes of the batch are
+        not processed any further.
+
+        Example::
+
+            def render_foo(self, node):
+                def callback(pairs):
+                    for node, item in pairs:
+                        ...
+                node.repeat_batch(callback, [1, 2, 3, 4], batch=2)
+
+        :Parameters:
+          `callback` : ``callable``
+            The callback function
+
+          `itemlist` : iterable
+            The items to iterate over
+
+          `fixed` : ``tuple``
+            Fixed parameters to be passed to the callback
+
+        :Keywords:
+          `batch` : ``int``
+            Maximum number of nodes passed to a single callback call. If
+            omitted, it defaults to ``512``.
+
+          `separate` : ``callable``
+            Alternative callback function for separator nodes. If omitted or
+            ``None``, ``self.separate_name`` is looked up and called if it
+            exists.
+
+        :Exceptions:
+          - `ValueError` : `batch` is smaller than 1
+        """
+        kwargs = dict(kwargs)
+        batch = int(kwargs.pop('batch', 512))
+        separate = kwargs.pop('separate', None)
+        if kwargs:
+            raise TypeError("Unrecognized keyword parameters")
+        if batch < 1:
+            raise ValueError("batch must be positive")
+        self._unshare()['repeated'] = (
+            callback, iter(itemlist), fixed, separate, batch
+        )
+
+    def repeat_map(self, itemlist, mapping, separate=None):
+        """
+        Repeat the snippet ``len(list(itemlist))`` times, filled from a mapping
+
+        This is a shortcut for the common case of a repeat callback, which
+        only sets the contents of some subnodes from the item. The mapping
+        names the direct subnodes and where their content comes from: either
+        a field looked up in the item (``item[field]``) or a callable, which
+        is called with the item. The contents are escaped like assignments
+        to `content`.
+
+        The repeated markup is compiled once and filled by the renderer.
+        No nodes are created for the items and the model is not asked for
+        the repeated nodes or their subnodes. Mapped subnodes, which do not
+        exist, raise a `NodeNotFoundError` while rendering.
+
+        Example::
+
+            def render_row(self, node):
+                node.repeat_map(rows, {
+                    'name': 'name',
+                    'size': lambda row: '%d KB' % (row['size'] // 1024),
+                })
+
+        :Parameters:
+          `itemlist` : iterable
+            The items to iterate over
+
+          `mapping` : ``dict``
+            Content mapping (``{'subnode name': field or callable, ...}``)
+
+          `separate` : ``callable``
+            Alternative callback function for separator nodes. If omitted or
+            ``None``, ``self.separate_name`` is looked up and called if it
+            exists.
+        """
+        self._unshare()['repeated'] = (
+            None, iter(itemlist), (), separate, None, dict(mapping)
+        )
 
     def remove(self):
         """
@@ -528,8 +676,9 @@ class Node(object):
         Tells the system, that the node (and all of its subnodes) should
         not be rendered.
         """
-        self._udict['removed'] = True
-        self._udict['namedict'] = {}
+        udict = self._unshare()
+        udict['removed'] = True
+        udict['namedict'] = {}
 
     def iterate(self, itemlist, separate=None):
         """
@@ -565,10 +714,12 @@ class Node(object):
         # This effectively indents the iterated nodeset by one level.
         # The original node (which was copied from before) only acts as a
         # container now.
-        self._udict['content'] = (None, None)
-        self._udict['nodes'] = nodelist
-        self._udict['namedict'] = {}
-        self._udict['masked'] = True
+        udict = self._unshare()
+        udict['content'] = (None, None)
+        udict['nodes'] = nodelist
+        udict.pop('proto', None)
+        udict['namedict'] = {}
+        udict['masked'] = True
 
         return _nodetree.iterate(
             node, nodelist, itemlist, separate, Node
@@ -605,12 +756,13 @@ class Node(object):
             (kind != TEXT and node._usernode)
             and deep(node, model, ctx, Node) or node
         ) for kind, node in udict['nodes']]
+        udict.pop('proto', None)
 
         udict['name'] = self._udict['name']  # name stays the same
         udict['callback'] = callback
         udict['complete'] = fixed
 
-        self._udict = udict
+        self._udict, self._shared = udict, False
         return self
 
     def copy(self):
@@ -798,6 +950,28 @@ class TemplateNode(object):
         }
         self._finalized = False
 
+    def __reduce__(self):
+        """
+        Reduce the node for pickling
+
+        Only nodes of finalized trees can be pickled. The node is stored
+        like a tree consisting of the node (and its separator node) only
+        and is rebuilt as part of such a new tree. The scope of its former
+        parent nodes is not kept.
+
+        :Return: Reconstructor and its arguments
+        :Rtype: ``tuple``
+
+        :Exceptions:
+          - `NodeTreeError` : The tree was not finalized yet
+        """
+        udict = self._udict
+        if 'encoder' not in udict:
+            raise NodeTreeError("Tree was not finalized yet")
+        return _reduce_node(
+            _nodetree.dump_node(udict), udict['encoder'], udict['decoder']
+        )
+
     def append_text(self, content):
         """
         Append a text node
@@ -948,11 +1122,28 @@ class Root(TemplateNode):
         super(Root, self).__init__('', (), {}, False)
         self.endtag = ''
         self._udict['is_root'] = True
+        self._startnodes = {}
 
     def __str__(self):
         """ String representation of the tree """
         return self.to_string(verbose=True)
 
+    def __reduce__(self):
+        """
+        Reduce the tree for pickling
+
+        Only finalized trees can be pickled. They are stored in their
+        `dump` representation. Encoder and decoder are recreated from their
+        class and encoding.
+
+        :Return: Reconstructor and its arguments
+        :Rtype: ``tuple``
+
+        :Exceptions:
+          - `NodeTreeError` : The tree was not finalized yet
+        """
+        return _reduce(self)
+
     def to_string(self, verbose=False):
         """
         String representation of the tree
@@ -970,6 +1161,38 @@ class Root(TemplateNode):
             _nodetree.represent(self._udict, bool(verbose))
         )) + '\n'
 
+    def dump(self):
+        """
+        Marshallable representation of the tree
+
+        The result consists of nested lists and tuples of strings, booleans
+        and ``None`` only. Use `load` to rebuild the tree.
+
+        :Return: The tree representation
+        :Rtype: ``list``
+
+        :Exceptions:
+          - `NodeTreeError` : The tree was not finalized yet
+        """
+        if not self._finalized:
+            raise NodeTreeError("Tree was not finalized yet")
+        return _nodetree.dump(self._udict)
+
+    def freeze(self):
+        """
+        Precompile the static markup of all template nodes
+
+        Template nodes compile their markup lazily, when it's needed first.
+        Freezing the tree does that upfront, so rendering does not modify
+        the tree anymore. This is useful before forking worker processes.
+
+        :Exceptions:
+          - `NodeTreeError` : The tree was not finalized yet
+        """
+        if not self._finalized:
+            raise NodeTreeError("Tree was not finalized yet")
+        _nodetree.freeze(self._udict)
+
     def finalize(self, encoder, decoder):
         """
         Finalize the tree
@@ -1011,7 +1234,7 @@ class Root(TemplateNode):
             self._udict, other._sources, TemplateNode, Root
         )
 
-    def render(self, model, startnode=None):
+    def render(self, model, startnode=None, cache=None):
         """
         Render the tree into chunks, calling `model` for input
 
@@ -1025,9 +1248,9 @@ class Root(TemplateNode):
             would render the ``c`` node.) The notation does not describe a
             strict node chain, though. Between to parts of a node chain may
             be gaps in the tree. The algorithm looks out for the first
-            matching node. It does no backtracking and so does not cover all
-            branches (yet?), but that works fine for realistic cases :). A
-            non-working example would be (searching for a.b.c)::
+            matching node and backtracks if the chain cannot be completed
+            from there. So the following example works as well (searching
+            for a.b.c)::
 
               *
               +- a
@@ -1035,12 +1258,190 @@ class Root(TemplateNode):
               `- a
                  `- b - c
 
+            The resolved nodes are remembered per tree (up to 1024
+            addresses), so each address is only searched once.
+
+          `cache` : `tdi.render_cache.RenderCache`
+            Fragment cache. If omitted or ``None``, no fragments are cached.
+            Otherwise nodes are rendered from the cache, if the model
+            provides a ``cache_<name>`` method for them, which returns a
+            hashable key describing the rendered node (or ``None`` if the
+            node should not be cached).
+
         :Return: Rendered chunks
         :Rtype: iterable
         """
-        return _nodetree.render(
-            _nodetree.findnode(self, startnode), model, Node
-        )
+        node = self
+        if startnode is not None:
+            node = self._startnodes.get(startnode)
+            if node is None:
+                node = _nodetree.findnode(self, startnode)
+                if len(self._startnodes) < _STARTNODES_SIZE:
+                    self._startnodes[startnode] = node
+        return _nodetree.render(node, model, Node, cache, self)
+
+    def render_events(self, model):
+        """
+        Render the tree into build events, calling `model` for input
+
+        The events describe the rendered tree instead of its markup, so a
+        new tree can be built from them without parsing (see
+        `tdi.factory.Factory.from_events`). There are four kinds of
+        events:
+
+        ``content``
+          Node content as a string (encoded, including escape sequences).
+          It may contain markup and is parsed again.
+
+        ``(clean, with_escapes)``
+          Template text (the text itself and the text including escape
+          sequences)
+
+        ``(tagname, attr, closed, starttag)``
+          Start of an element (the tag name, the attribute list
+          ``((name, value), ...)``, the closed flag and the encoded
+          starttag)
+
+        ``(endtag,)``
+          End of the last started element (``endtag`` is the encoded
+          endtag, maybe empty). Every start event is followed by an end
+          event, even for closed elements.
+
+        :Parameters:
+          `model` : `ModelAdapterInterface`
+            The model object
+
+        :Return: Build events
+        :Rtype: iterable
+        """
+        return _nodetree.render(self, model, Node, events=True)
+
+
+def load(data, encoder, decoder):
+    """
+    Rebuild a finalized tree from its `Root.dump` representation
+
+    :Parameters:
+      `data` : ``list``
+        The tree representation
+
+      `encoder` : `EncoderInterface`
+        Encoder instance
+
+      `decoder` : `DecoderInterface`
+        Decoder instance
+
+    :Return: The new tree
+    :Rtype: `Root`
+
+    :Exceptions:
+      - `NodeTreeError` : The representation was invalid
+    """
+    root = Root()
+    try:
+        _nodetree.load(root, data)
+    except (TypeError, ValueError), e:
+        raise NodeTreeError("Invalid tree representation: %s" % (e,))
+    root.finalize(encoder, decoder)
+    return root
+
+
+def _reduce(root):
+    """
+    Reduce a tree for pickling
+
+    :Parameters:
+      `root` : `Root`
+        The finalized tree
+
+    :Return: Reconstructor and its arguments (see `Root.__reduce__`)
+    :Rtype: ``tuple``
+
+    :Exceptions:
+      - `NodeTreeError` : The tree was not finalized yet
+    """
+    data = root.dump()
+    encoder, decoder = root.encoder, root.decoder
+    return _unpickle, (
+        data,
+        (encoder.__class__, encoder.encoding),
+        (decoder.__class__, decoder.encoding),
+    )
+
+
+def _reduce_node(data, encoder, decoder):
+    """
+    Reduce a template node for pickling
+
+    :Parameters:
+      `data` : ``list``
+        The node representation (see `_nodetree.dump_node`)
+
+      `encoder` : `EncoderInterface`
+        The node's encoder
+
+      `decoder` : `DecoderInterface`
+        The node's decoder
+
+    :Return: Reconstructor and its arguments (see `TemplateNode.__reduce__`)
+    :Rtype: ``tuple``
+    """
+    return _unpickle_node, (
+        data,
+        (encoder.__class__, encoder.encoding),
+        (decoder.__class__, decoder.encoding),
+    )
+
+
+def _unpickle_node(data, encoder, decoder):
+    """
+    Rebuild a pickled template node
+
+    :Parameters:
+      `data` : ``list``
+        The node representation
+
+      `encoder` : ``tuple``
+        Encoder class and encoding
+
+      `decoder` : ``tuple``
+        Decoder class and encoding
+
+    :Return: The new node (the only node of a new tree)
+    :Rtype: `TemplateNode`
+
+    :Exceptions:
+      - `NodeTreeError` : The representation was invalid
+    """
+    root = Root()
+    try:
+        nodes = _nodetree.load(root, data)
+    except (TypeError, ValueError), e:
+        raise NodeTreeError("Invalid tree representation: %s" % (e,))
+    if not nodes:
+        raise NodeTreeError("Invalid tree representation: no node")
+    root.finalize(encoder[0](encoder[1]), decoder[0](decoder[1]))
+    return nodes[0]
+
+
+def _unpickle(data, encoder, decoder):
+    """
+    Rebuild a pickled tree
+
+    :Parameters:
+      `data` : ``list``
+        The tree representation
+
+      `encoder` : ``tuple``
+        Encoder class and encoding
+
+      `decoder` : ``tuple``
+        Decoder class and encoding
+
+    :Return: The new tree
+    :Rtype: `Root`
+    """
+    return load(data, encoder[0](encoder[1]), decoder[0](decoder[1]))
 
 
 from . import c
@@ -0,0 +1,147 @@
+# -*- coding: ascii -*-
+r"""
+:Copyright:
+
+ Copyright 2006 - 2015
+ Andr\xe9 Malo or his licensors, as applicable
+
+:License:
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+
+===============
+ Render Buffer
+===============
+
+Output buffer for rendered chunks.
+
+The renderer emits lots of small chunks (start tags, text, end tags). The
+`RenderBuffer` collects them without creating intermediate lists. It either
+keeps the whole result (see `RenderBuffer.getvalue`) or passes it to a write
+function in coalesced blocks.
+"""
+if __doc__:
+    # pylint: disable = redefined-builtin
+    __doc__ = __doc__.encode('ascii').decode('unicode_escape')
+__author__ = r"Andr\xe9 Malo".encode('ascii').decode('unicode_escape')
+__docformat__ = "restructuredtext en"
+__all__ = ['RenderBuffer', 'DEFAULT_BUFSIZE']
+
+#: Default block size for buffered writes
+#:
+#: :Type: ``int``
+DEFAULT_BUFSIZE = 8192
+
+
+class RenderBuffer(object):
+    """
+    Output buffer for rendered chunks
+
+    The buffer behaves like a (write-only) stream, so it can be passed to
+    `tdi.template.Template.render` as well.
+
+    :IVariables:
+      `_write` : ``callable``
+        Write function or ``None``
+
+      `_bufsize` : ``int``
+        Block size
+
+      `_chunks` : ``list``
+        Buffered chunks
+
+      `_size` : ``int``
+        Number of buffered bytes
+    """
+
+    def __init__(self, write=None, bufsize=None):
+        """
+        Initialization
+
+        :Parameters:
+          `write` : ``callable``
+            Write function, which takes a string. If omitted or ``None``,
+            the buffer keeps all data until it's fetched with `getvalue`.
+
+          `bufsize` : ``int``
+            Block size. The buffer is passed to `write` as soon as it
+            contains at least this number of bytes. If omitted or ``None``,
+            `DEFAULT_BUFSIZE` is applied.
+        """
+        if bufsize is None:
+            bufsize = DEFAULT_BUFSIZE
+        self._write = write
+        self._bufsize = bufsize
+        self._chunks = []
+        self._size = 0
+
+    def __len__(self):
+        """
+        Determine the number of buffered bytes
+
+        :Return: The number of bytes
+        :Rtype: ``int``
+        """
+        return self._size
+
+    def write(self, data):
+        """
+        Append a chunk
+
+        :Parameters:
+          `data` : ``str``
+            The chunk
+        """
+        self._chunks.append(data)
+        self._size += len(data)
+        if self._write is not None and self._size >= self._bufsize:
+            self.flush()
+
+    def extend(self, chunks):
+        """
+        Append all chunks of an iterable
+
+        :Parameters:
+          `chunks` : iterable
+            The chunks (like the result of `tdi.nodetree.Root.render`)
+        """
+        write = self.write
+        for chunk in chunks:
+            write(chunk)
+
+    def flush(self):
+        """ Pass the buffered data to the write function (if there is one) """
+        if self._write is not None and self._size:
+            data = ''.join(self._chunks)
+            self._chunks, self._size = [], 0
+            self._write(data)
+
+    def getvalue(self):
+        """
+        Fetch the buffered data
+
+        The data stays in the buffer.
+
+        :Return: The buffered data
+        :Rtype: ``str``
+        """
+        data = ''.join(self._chunks)
+        self._chunks = data and [data] or []
+        return data
+
+
+from . import c
+c = c.load('impl')
+if c is not None:
+    RenderBuffer = c.RenderBuffer  # noqa
+del c
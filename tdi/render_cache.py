@@ -0,0 +1,356 @@
+# -*- coding: ascii -*-
+r"""
+:Copyright:
+
+ Copyright 2006 - 2015
+ Andr\xe9 Malo or his licensors, as applicable
+
+:License:
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+
+=====================
+ Render Result Cache
+=====================
+
+Render result cache.
+
+The cache is passed to `tdi.template.Template.render` or
+`tdi.template.Template.render_string`. The final output is cached, if the
+model provides a ``render_cache_key`` method returning a hashable key (or
+``None`` for "do not cache"). The key has to describe everything the
+rendered output depends on. The template identity, its modification time,
+the (possibly prerendered) tree, the start node and the adapter are added
+automatically.
+
+The cache also stores rendered fragments (subtrees): if the model provides
+a ``cache_<name>`` method for a node, which returns a hashable key (or
+``None``), the node is taken from the cache instead of being rendered. The
+key is combined with the node's name and scope. Fragments are bound to the
+rendered tree.
+"""
+if __doc__:
+    # pylint: disable = redefined-builtin
+    __doc__ = __doc__.encode('ascii').decode('unicode_escape')
+__author__ = r"Andr\xe9 Malo".encode('ascii').decode('unicode_escape')
+__docformat__ = "restructuredtext en"
+__all__ = ['RenderCache', 'invalidate']
+
+import collections as _collections
+import time as _time
+import weakref as _weakref
+try:
+    import threading as _threading
+except ImportError:
+    import dummy_threading as _threading
+
+#: All render caches alive (for `invalidate`)
+#:
+#: :Type: ``weakref.WeakSet``
+_caches = _weakref.WeakSet()
+
+
+def invalidate(template):
+    """
+    Drop the entries of a template from all render caches
+
+    This is called by `tdi.template.AutoUpdate` when a template is reloaded.
+
+    :Parameters:
+      `template` : `tdi.template.Template`
+        The template
+    """
+    for cache in list(_caches):
+        cache.invalidate(template)
+
+
+class RenderCache(object):
+    """
+    Render result cache
+
+    The entries are evicted in LRU order, if the cache exceeds `maxbytes`.
+    Entries older than `ttl` seconds are not returned anymore. Entries of a
+    template are dropped automatically, when the template goes away.
+
+    :IVariables:
+      `maxbytes` : ``int``
+        Maximum size of all cached results in bytes (``None`` means
+        unlimited)
+
+      `ttl` : ``float``
+        Time to live of an entry in seconds (``None`` means forever)
+
+      `lock` : Lock
+        Lock for the cache access
+
+      `_timer` : ``callable``
+        Timer function
+
+      `_entries` : ``collections.OrderedDict``
+        Cache entries (``{(template id, key): (result, expires)}``) in LRU
+        order
+
+      `_templates` : ``dict``
+        Template references and their keys
+        (``{template id: (weakref, set of keys)}``)
+
+      `_size` : ``int``
+        Current size of all cached results in bytes
+
+      `_gone_refs` : ``list``
+        References of templates, which went away, and their ids
+        (``[(template id, weakref), ...]``). Their entries are dropped
+        with the next cache access.
+    """
+
+    def __init__(self, maxbytes=None, ttl=None, timer=None):
+        """
+        Initialization
+
+        :Parameters:
+          `maxbytes` : ``int``
+            Maximum size of all cached results in bytes. If omitted or
+            ``None``, the size is not limited.
+
+          `ttl` : ``float``
+            Time to live of an entry in seconds. If omitted or ``None``,
+            entries don't expire.
+
+          `timer` : ``callable``
+            Timer function. If omitted or ``None``, ``time.time`` is used.
+        """
+        self.maxbytes = maxbytes
+        self.ttl = ttl
+        self.lock = _threading.Lock()
+        self._timer = timer or _time.time
+        self._entries = _collections.OrderedDict()
+        self._templates = {}
+        self._size = 0
+        self._gone_refs = []
+        _caches.add(self)
+
+    def __len__(self):
+        """
+        Determine the number of cached results
+
+        :Return: The number of entries
+        :Rtype: ``int``
+        """
+        return len(self._entries)
+
+    @property
+    def size(self):
+        """
+        Current size of all cached results in bytes
+
+        :Type: ``int``
+        """
+        return self._size
+
+    def get(self, template, key):
+        """
+        Lookup a rendered result
+
+        :Parameters:
+          `template` : `tdi.template.Template`
+            The template
+
+          `key` : hashable
+            The cache key
+
+        :Return: The rendered result or ``None``, if it was not found
+        :Rtype: ``str``
+        """
+        ckey = id(template), key
+        self.lock.acquire()
+        try:
+            if self._gone_refs:
+                self._purge()
+            try:
+                result, expires = self._entries.pop(ckey)
+            except KeyError:
+                return None
+            if expires is not None and expires <= self._timer():
+                self._drop(ckey, result)
+                return None
+            self._entries[ckey] = result, expires
+            return result
+        finally:
+            self.lock.release()
+
+    def set(self, template, key, result):
+        """
+        Store a rendered result
+
+        Results larger than `maxbytes` are not stored at all.
+
+        :Parameters:
+          `template` : `tdi.template.Template`
+            The template
+
+          `key` : hashable
+            The cache key
+
+          `result` : ``str``
+            The rendered result
+        """
+        size, maxbytes = len(result), self.maxbytes
+        if maxbytes is not None and size > maxbytes:
+            return
+        expires = self.ttl
+        if expires is not None:
+            expires += self._timer()
+
+        tid = id(template)
+        ckey = tid, key
+        self.lock.acquire()
+        try:
+            if self._gone_refs:
+                self._purge()
+            if tid not in self._templates:
+                self._templates[tid] = (
+                    _weakref.ref(template, self._gone(tid)), set()
+                )
+            old = self._entries.pop(ckey, None)
+            if old is not None:
+                self._size -= len(old[0])
+            self._entries[ckey] = result, expires
+            self._templates[tid][1].add(key)
+            self._size += size
+
+            if maxbytes is not None:
+                while self._size > maxbytes:
+                    ckey, (result, _) = self._entries.popitem(last=False)
+                    self._drop(ckey, result)
+        finally:
+            self.lock.release()
+
+    def collect(self, template, key, chunks):
+        """
+        Pass through rendered chunks and store the result afterwards
+
+        The result is only stored if `chunks` is exhausted without error.
+
+        :Parameters:
+          `template` : `tdi.template.Template`
+            The template
+
+          `key` : hashable
+            The cache key
+
+          `chunks` : iterable
+            Rendered chunks
+
+        :Return: Iterator over the chunks
+        :Rtype: ``iterable``
+        """
+        result = []
+        push = result.append
+        for chunk in chunks:
+            push(chunk)
+            yield chunk
+        self.set(template, key, ''.join(result))
+
+    def invalidate(self, template=None):
+        """
+        Drop cache entries
+
+        :Parameters:
+          `template` : `tdi.template.Template`
+            The template to drop the entries for. If omitted or ``None``,
+            all entries are dropped.
+        """
+        self.lock.acquire()
+        try:
+            if self._gone_refs:
+                self._purge()
+            if template is None:
+                self._entries.clear()
+                self._templates.clear()
+                self._size = 0
+            else:
+                self._forget(id(template))
+        finally:
+            self.lock.release()
+
+    clear = invalidate
+
+    def _gone(self, tid):
+        """
+        Create a weakref callback, which drops the entries of a template
+
+        The callback may run during a garbage collection triggered while the
+        lock is held (by the same thread). So it only records the template
+        and the entries are dropped with the next cache access (see
+        `_purge`).
+
+        :Parameters:
+          `tid` : ``int``
+            Template id
+
+        :Return: The callback
+        :Rtype: ``callable``
+        """
+        selfref = _weakref.ref(self)
+
+        def gone(ref):
+            """ Template went away """
+            self = selfref()
+            if self is not None:
+                self._gone_refs.append((tid, ref))
+        return gone
+
+    def _purge(self):
+        """
+        Drop the entries of templates, which went away (the lock must be
+        held)
+        """
+        refs, templates = self._gone_refs, self._templates
+        while refs:
+            tid, ref = refs.pop()
+            # The id may belong to a new template already
+            if tid in templates and templates[tid][0] is ref:
+                self._forget(tid)
+
+    def _forget(self, tid):
+        """
+        Drop all entries of a template (the lock must be held)
+
+        :Parameters:
+          `tid` : ``int``
+            Template id
+        """
+        _, keys = self._templates.pop(tid, (None, ()))
+        for key in keys:
+            entry = self._entries.pop((tid, key), None)
+            if entry is not None:
+                self._size -= len(entry[0])
+
+    def _drop(self, ckey, result):
+        """
+        Account for a removed entry (the lock must be held)
+
+        :Parameters:
+          `ckey` : ``tuple``
+            Entry key (template id, key)
+
+          `result` : ``str``
+            The entry's result
+        """
+        self._size -= len(result)
+        tid, key = ckey
+        ref = self._templates.get(tid)
+        if ref is not None:
+            ref[1].discard(key)
+            if not ref[1]:
+                del self._templates[tid]
@@ -32,15 +32,255 @@ __author__ = r"Andr\xe9 Malo".encode('ascii').decode('unicode_escape')
 __docformat__ = "restructuredtext en"
 __all__ = ['Template', 'OverlayTemplate', 'AutoUpdate']
 
+import collections as _collections
 import sys as _sys
 
 from ._exceptions import (
     Error, TemplateReloadError, AutoUpdateWarning, OverlayError
 )
 from . import model_adapters as _model_adapters
+from . import render_buffer as _render_buffer
+from . import render_cache as _render_cache
 from . import _util
 
 
+def _new(cls):
+    """
+    Create an uninitialized template (or wrapper) instance for unpickling
+
+    :Parameters:
+      `cls` : ``type``
+        Template class
+
+    :Return: The new instance
+    :Rtype: any
+    """
+    return object.__new__(cls)
+
+
+def _flushing(stream):
+    """
+    Create a write function, which flushes the stream after each write
+
+    :Parameters:
+      `stream` : ``file``
+        The stream
+
+    :Return: The write function
+    :Rtype: ``callable``
+    """
+    write = stream.write
+    try:
+        flush = stream.flush
+    except AttributeError:
+        return write
+
+    def flushing(data):
+        """ Write and flush """
+        write(data)
+        flush()
+    return flushing
+
+
+class _FlushAdapter(object):
+    """
+    Model adapter wrapper, which flushes the output before certain nodes
+
+    The renderer asks the adapter for the render method of a node, before
+    it emits the node. At that point everything before the node was passed
+    to the output already.
+
+    :IVariables:
+      `_adapter` : `ModelAdapterInterface`
+        The wrapped adapter
+
+      `_names` : ``frozenset``
+        The names of the nodes to flush before
+
+      `_flush` : ``callable``
+        Flush function
+
+      `emit_escaped` : ``bool``
+        Emit escaped text?
+    """
+
+    def __init__(self, adapter, names, flush):
+        """
+        Initialization
+
+        :Parameters:
+          `adapter` : `ModelAdapterInterface`
+            The wrapped adapter
+
+          `names` : iterable
+            The names of the nodes to flush before
+
+          `flush` : ``callable``
+            Flush function
+        """
+        self._adapter = adapter
+        self._names = frozenset(names)
+        self._flush = flush
+        self.emit_escaped = adapter.emit_escaped
+
+    def modelmethod(self, prefix, name, scope, noauto):
+        """ Flush (possibly) and resolve the model method """
+        if prefix == 'render' and name in self._names:
+            self._flush()
+        return self._adapter.modelmethod(prefix, name, scope, noauto)
+
+    def new(self, model):
+        """ Create adapter for a new model """
+        return self.__class__(
+            self._adapter.new(model), self._names, self._flush
+        )
+
+
+class _ParallelAdapter(object):
+    """
+    Model adapter wrapper, which renders certain nodes in an executor
+
+    Instead of the render method of such a node, the adapter returns a
+    method, which submits the rendering of a copy of the node (including
+    the call of the original render method) to the executor and removes
+    the node from the main rendering. The futures are collected in
+    `_pending` and merged into the output by `_ordered`.
+
+    :IVariables:
+      `_adapter` : `ModelAdapterInterface`
+        The wrapped adapter
+
+      `_names` : ``frozenset``
+        The names of the nodes to render in the executor
+
+      `_executor` : ``concurrent.futures.Executor``
+        The executor
+
+      `_pending` : ``list``
+        Submitted futures (not merged into the output yet)
+
+      `_model` : any
+        The user model
+
+      `_factory` : ``callable``
+        Model adapter factory for the submitted nodes
+
+      `emit_escaped` : ``bool``
+        Emit escaped text?
+    """
+
+    def __init__(self, adapter, names, executor, pending, model, factory):
+        """
+        Initialization
+
+        :Parameters:
+          `adapter` : `ModelAdapterInterface`
+            The wrapped adapter
+
+          `names` : iterable
+            The names of the nodes to render in the executor
+
+          `executor` : ``concurrent.futures.Executor``
+            The executor
+
+          `pending` : ``list``
+            List to collect the futures in
+
+          `model` : any
+            The user model
+
+          `factory` : ``callable``
+            Model adapter factory for the submitted nodes
+        """
+        # pylint: disable = too-many-arguments
+
+        self._adapter = adapter
+        self._names = frozenset(names)
+        self._executor = executor
+        self._pending = pending
+        self._model = model
+        self._factory = factory
+        self.emit_escaped = adapter.emit_escaped
+
+    def modelmethod(self, prefix, name, scope, noauto):
+        """ Resolve the model method (or submit the node) """
+        method = self._adapter.modelmethod(prefix, name, scope, noauto)
+        if prefix != 'render' or name not in self._names:
+            return method
+        submit = self._submit
+
+        def render(node):
+            """ Submit the node """
+            submit(node, method)
+        return render
+
+    def new(self, model):
+        """ Create adapter for a new model """
+        return self.__class__(
+            self._adapter.new(model), self._names, self._executor,
+            self._pending, model, self._factory
+        )
+
+    def _submit(self, node, method):
+        """
+        Submit the rendering of a node to the executor
+
+        :Parameters:
+          `node` : `tdi.nodetree.Node`
+            The node
+
+          `method` : ``callable``
+            The node's render method or ``None``
+        """
+        clone = node.copy()
+        node.remove()
+        self._pending.append(self._executor.submit(
+            clone.render, method, model=self._model, adapter=self._factory,
+            decode=False
+        ))
+
+
+def _ordered(chunks, pending):
+    """
+    Merge rendered chunks and the results of submitted nodes
+
+    The renderer asks for the render method of a node, before it emits the
+    node. So each future in `pending` belongs right before the next chunk.
+    The chunks are passed through as soon as the futures before them are
+    done.
+
+    :Parameters:
+      `chunks` : iterable
+        Rendered chunks
+
+      `pending` : ``list``
+        Futures, filled while `chunks` is iterated
+
+    :Return: Iterator over the chunks in document order
+    :Rtype: iterable
+    """
+    items = _collections.deque()
+    for chunk in chunks:
+        if pending:
+            items.extend(pending)
+            del pending[:]
+        items.append(chunk)
+        while items:
+            item = items[0]
+            if isinstance(item, str):
+                yield items.popleft()
+            elif item.done():
+                yield items.popleft().result()
+            else:
+                break
+    items.extend(pending)
+    del pending[:]
+    for item in items:
+        if not isinstance(item, str):
+            item = item.result()
+        yield item
+
+
 class Template(object):
     """
     Template class
@@ -172,6 +412,44 @@ class Template(object):
         # pylint: disable = no-member
         return self.tree.to_string(verbose=False)
 
+    def __reduce__(self):
+        """
+        Reduce the template for pickling
+
+        The already prepared and prerendered trees are pickled as well, so
+        unpickled templates don't need to do the work again. The factory
+        is pickled by its configuration (without its memoizer).
+
+        :Return: Reconstructor, its arguments and the state
+        :Rtype: ``tuple``
+        """
+        return _new, (self.__class__,), self.__getstate__()
+
+    def __getstate__(self):
+        """
+        Determine the template state for pickling
+
+        :Return: The state (``{slot: value}``)
+        :Rtype: ``dict``
+        """
+        state = {}
+        for cls in self.__class__.__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if name != '__weakref__' and hasattr(self, name):
+                    state[name] = getattr(self, name)
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restore the template state after unpickling
+
+        :Parameters:
+          `state` : ``dict``
+            The state as returned by `__getstate__`
+        """
+        for name, value in state.iteritems():
+            setattr(self, name, value)
+
     def template(self):
         """ Return a clean template (without any wrapper) """
         return self
@@ -223,12 +501,12 @@ class Template(object):
         if factory.overlay_filters is None:
             return tree
         ffactory = factory.replace(**factory.overlay_filters)
-        return ffactory.from_string(''.join(list(tree.render(
+        return ffactory.from_events(tree.render_events(
             _model_adapters.RenderAdapter.for_prerender(None, attr=dict(
                 scope=ffactory.builder().analyze.scope,
                 tdi=ffactory.builder().analyze.attribute,
             ))
-        ))), encoding=tree.encoder.encoding).virgin_tree
+        ), encoding=tree.encoder.encoding).virgin_tree
 
     def _prerender(self, model, adapter):
         """
@@ -299,16 +577,93 @@ class Template(object):
             scope=factory.builder().analyze.scope,
             tdi=factory.builder().analyze.attribute,
         ))
-        tree = factory.from_string(
-            ''.join(list(ftree.render(adapted))),
+        tree = factory.from_events(
+            ftree.render_events(adapted),
             encoding=ftree.encoder.encoding
         ).tree
 
         otree[2] = tree, version
+        if ptree is not None:
+            _render_cache.invalidate(self)
         return tree
 
+    def _render(self, model, startnode, adapter, prerender, preadapter,
+                cache, flushnodes=None, flush=None, parallel=None,
+                executor=None):
+        """
+        Render the template, possibly using the render result cache
+
+        :Parameters:
+          `model` : any
+            The model object
+
+          `startnode` : ``str``
+            Start node
+
+          `adapter` : ``callable``
+            Usermodel adapter factory
+
+          `prerender` : any
+            Prerender-Model
+
+          `preadapter` : `ModelAdapterInterface`
+            Prerender-adapter
+
+          `cache` : `tdi.render_cache.RenderCache`
+            Render result cache or ``None``
+
+          `flushnodes` : iterable
+            Names of the nodes to call `flush` before or ``None``
+
+          `flush` : ``callable``
+            Flush function
+
+          `parallel` : iterable
+            Names of the nodes to render in `executor` or ``None``
+
+          `executor` : ``concurrent.futures.Executor``
+            Executor for the `parallel` nodes
+
+        :Return: Iterable over rendered chunks
+        :Rtype: iterable
+        """
+        # pylint: disable = too-many-arguments
+
+        if adapter is None:
+            adapter = _model_adapters.RenderAdapter
+        tree = self._prerender(prerender, preadapter)
+        key = None
+        if cache is not None:
+            keyfunc = getattr(model, 'render_cache_key', None)
+            key = keyfunc() if keyfunc is not None else None
+            if key is not None:
+                # The tree is keyed by id in order to not keep it alive.
+                # Entries of replaced prerendered trees are dropped (see
+                # `_prerender`).
+                key = (self.mtime, id(tree), startnode, adapter, key)
+                result = cache.get(self, key)
+                if result is not None:
+                    return (result,)
+
+        adapted, pending = adapter(model), None
+        if parallel and executor is not None:
+            pending = []
+            adapted = _ParallelAdapter(
+                adapted, parallel, executor, pending, model, adapter
+            )
+        if flushnodes:
+            adapted = _FlushAdapter(adapted, flushnodes, flush)
+        result = tree.render(adapted, startnode, cache)
+        if pending is not None:
+            result = _ordered(result, pending)
+        if key is not None:
+            result = cache.collect(self, key, result)
+        return result
+
     def render(self, model=None, stream=None, flush=False,
-               startnode=None, adapter=None, prerender=None, preadapter=None):
+               startnode=None, adapter=None, prerender=None, preadapter=None,
+               cache=None, bufsize=None, flushnodes=None, parallel=None,
+               executor=None):
         """
         Render the template into `stream` using `model`
 
@@ -331,9 +686,9 @@ class Template(object):
             would render the ``c`` node.) The notation does not describe a
             strict node chain, though. Between to parts of a node chain may
             be gaps in the tree. The algorithm looks out for the first
-            matching node. It does no backtracking and so does not cover all
-            branches (yet?), but that works fine for realistic cases :).
-            A non-working example would be (searching for a.b.c)::
+            matching node and backtracks if the chain cannot be completed
+            from there. So the following example works as well (searching
+            for a.b.c)::
 
               *
               +- a
@@ -355,17 +710,84 @@ class Template(object):
             Prerender-model adapter factory (takes the model and an attribute
             specification dict). If omitted or ``None``, the standard
             `model_adapters.RenderAdapter.for_prerender` is applied.
+
+          `cache` : `tdi.render_cache.RenderCache`
+            Render result cache. If omitted or ``None``, no caching happens.
+            Otherwise the result is cached if the model provides a
+            ``render_cache_key`` method, which returns a hashable key
+            describing the rendered output (or ``None`` if the output should
+            not be cached). Any other value (including false ones like ``0``
+            or ``''``) is a valid key.
+
+            Passing a cache also enables fragment caching: nodes, for which
+            the model provides a ``cache_<name>`` method, are rendered from
+            the cache as well (see `tdi.nodetree.Root.render`). Models
+            without such methods are not affected.
+
+          `bufsize` : ``int``
+            Coalesce the rendered chunks into blocks of at least this number
+            of bytes before writing them to the stream (see
+            `tdi.render_buffer.RenderBuffer`). If omitted, ``None`` or
+            ``0``, every chunk is written separately. If `flush` is true, the
+            stream is flushed after each block.
+
+          `flushnodes` : iterable
+            Names of nodes, before which the buffered output is written
+            and the stream is flushed (if it has a ``flush`` method). For
+            example, pass the name of the body node in order to push the
+            document head to the client early. The nodes are matched by name
+            only (regardless of their scope). Nodes, which are not rendered
+            separately (because their parent is done already), are not
+            considered.
+
+          `parallel` : iterable
+            Names of nodes, which are rendered concurrently in `executor`.
+            Each of these nodes is copied and rendered separately (using
+            `tdi.nodetree.Node.render`), while the main rendering goes on.
+            The results are put into the output in document order. The
+            nodes are matched by name only (regardless of their scope). The
+            model needs to be thread-safe, if the executor uses threads.
+            Freezing the template tree before (see `warm`) avoids
+            concurrent modifications of the tree.
+
+          `executor` : ``concurrent.futures.Executor``
+            Executor for the `parallel` nodes. Anything, which provides a
+            ``submit`` method returning a future (with ``done`` and
+            ``result`` methods), works. If omitted or ``None``, `parallel`
+            is ignored.
         """
+        # pylint: disable = too-many-arguments
+
         if stream is None:
             stream = _sys.stdout
-        if adapter is None:
-            adapter = _model_adapters.RenderAdapter
-        result = self._prerender(prerender, preadapter).render(
-            adapter(model), startnode
-        )
         if flush == -1:
-            stream.write(''.join(list(result)))
+            buf = _render_buffer.RenderBuffer()
+            buf.extend(self._render(
+                model, startnode, adapter, prerender, preadapter, cache,
+                parallel=parallel, executor=executor
+            ))
+            stream.write(buf.getvalue())
+        elif bufsize or flushnodes:
+            buf = _render_buffer.RenderBuffer(
+                flush and _flushing(stream) or stream.write, bufsize or 0
+            )
+            sflush = getattr(stream, 'flush', None)
+
+            def boundary():
+                """ Write the buffer and flush the stream """
+                buf.flush()
+                if sflush is not None:
+                    sflush()
+            buf.extend(self._render(
+                model, startnode, adapter, prerender, preadapter, cache,
+                flushnodes, boundary, parallel, executor
+            ))
+            buf.flush()
         else:
+            result = self._render(
+                model, startnode, adapter, prerender, preadapter, cache,
+                parallel=parallel, executor=executor
+            )
             write = stream.write
             if flush:
                 try:
@@ -381,7 +803,8 @@ class Template(object):
                 write(chunk)
 
     def render_string(self, model=None, startnode=None, adapter=None,
-                      prerender=None, preadapter=None):
+                      prerender=None, preadapter=None, cache=None,
+                      parallel=None, executor=None):
         """
         Render the template as string using `model`
 
@@ -405,14 +828,51 @@ class Template(object):
           `preadapter` : `ModelAdapterInterface`
             Prerender-adapter
 
+          `cache` : `tdi.render_cache.RenderCache`
+            Render result cache. See `render` for details.
+
+          `parallel` : iterable
+            Names of nodes to render concurrently. See `render` for details.
+
+          `executor` : ``concurrent.futures.Executor``
+            Executor for the `parallel` nodes. See `render` for details.
+
         :Return: The rendered document
         :Rtype: ``str``
         """
-        if adapter is None:
-            adapter = _model_adapters.RenderAdapter
-        return ''.join(list(self._prerender(prerender, preadapter).render(
-            adapter(model), startnode
-        )))
+        # pylint: disable = too-many-arguments
+
+        buf = _render_buffer.RenderBuffer()
+        buf.extend(self._render(
+            model, startnode, adapter, prerender, preadapter, cache,
+            parallel=parallel, executor=executor
+        ))
+        return buf.getvalue()
+
+    def warm(self, prerender=None, preadapter=None):
+        """
+        Prepare the template for rendering in advance
+
+        This applies the overlay filters, possibly prerenders the template
+        and freezes the resulting trees (see `tdi.nodetree.Root.freeze`).
+
+        :Parameters:
+          `prerender` : any
+            Prerender-Model. If omitted or ``None``, the template is not
+            prerendered.
+
+          `preadapter` : `ModelAdapterInterface`
+            Prerender-adapter. If omitted or ``None``, the default
+            prerender adapter is applied.
+
+        :Return: The tree to be rendered
+        :Rtype: `tdi.nodetree.Root`
+        """
+        tree = self._prerender(prerender, preadapter)
+        self._tree[1].freeze()
+        if tree is not self._tree[1]:
+            tree.freeze()
+        return tree
 
     def overlay(self, other):
         """
@@ -432,7 +892,7 @@ class OverlayTemplate(Template):
     """ Overlay template representation """
     __slots__ = ('_left', '_right')
 
-    def __init__(self, original, overlay, keep=False):
+    def __init__(self, original, overlay, keep=False, _tree=None):
         """
         Initialization
 
@@ -445,6 +905,10 @@ class OverlayTemplate(Template):
 
           `keep` : `tdi.template.Template`
             Keep original templates?
+
+          `_tree` : ``list``
+            Tree state of an equivalent overlay template to share instead of
+            overlaying the trees (internal use only)
         """
         tree1, tree2 = original.virgin_tree, overlay.virgin_tree
         if tree1.encoder.encoding != tree2.encoder.encoding:
@@ -458,9 +922,15 @@ class OverlayTemplate(Template):
             mtime = max(original.mtime, overlay.mtime)
         else:
             mtime = None
+        if _tree is None:
+            tree = tree1.overlay(tree2)
+        else:
+            tree = _tree[0]
         super(OverlayTemplate, self).__init__(
-            tree1.overlay(tree2), filename, mtime, original.factory
+            tree, filename, mtime, original.factory
         )
+        if _tree is not None:
+            self._tree = _tree
 
     def template(self):
         """ Return a clean template """
@@ -485,11 +955,41 @@ class OverlayTemplate(Template):
         if self._left is not None:
             original = self._left.reload(force=force)
             overlay = self._right.reload(force=force)
-            if force or \
-                    original is not self._left or overlay is not self._right:
+            if force:
                 return self.__class__(original, overlay, keep=True)
+            elif original is not self._left or overlay is not self._right:
+                return self._reoverlay(original, overlay)
         return self
 
+    def _reoverlay(self, original, overlay):
+        """
+        Overlay reloaded templates
+
+        The trees are only overlaid again, if one of them actually changed.
+        If the new tree does not differ from the current one (for example,
+        because only unused overlay sources or replaced overlay targets were
+        modified), the current tree state is shared, including the prepared
+        and prerendered trees. This way the overlay filters don't run again
+        and overlay templates stacked on top of this one find their
+        original tree unchanged, so they don't need to overlay again either.
+
+        :Parameters:
+          `original` : `tdi.template.Template`
+            Original template (possibly reloaded)
+
+          `overlay` : `tdi.template.Template`
+            Overlay template (possibly reloaded)
+
+        :Return: The new template
+        :Rtype: `OverlayTemplate`
+        """
+        if original.virgin_tree is not self._left.virgin_tree or \
+                overlay.virgin_tree is not self._right.virgin_tree:
+            result = self.__class__(original, overlay, keep=True)
+            if result.virgin_tree.dump() != self.virgin_tree.dump():
+                return result
+        return self.__class__(original, overlay, keep=True, _tree=self._tree)
+
     def update_available(self):
         """
         Check for update
@@ -522,6 +1022,34 @@ class AutoUpdate(object):
         else:
             self._cb = list(_cb)
 
+    def __reduce__(self):
+        """
+        Reduce the wrapper for pickling
+
+        :Return: Reconstructor, its arguments and the state
+        :Rtype: ``tuple``
+        """
+        return _new, (self.__class__,), self.__getstate__()
+
+    def __getstate__(self):
+        """
+        Determine the wrapper state for pickling
+
+        :Return: The state
+        :Rtype: ``dict``
+        """
+        return dict(self.__dict__)
+
+    def __setstate__(self, state):
+        """
+        Restore the wrapper state after unpickling
+
+        :Parameters:
+          `state` : ``dict``
+            The state as returned by `__getstate__`
+        """
+        self.__dict__.update(state)
+
     def __getattr__(self, name):
         """
         Pass through every request to the original template
@@ -617,6 +1145,8 @@ class AutoUpdate(object):
                 AutoUpdateWarning.emit(
                     'Template autoupdate failed: %s' % str(e)
                 )
+            else:
+                _render_cache.invalidate(template)
             for func in list(self._cb):
                 func(self)
 
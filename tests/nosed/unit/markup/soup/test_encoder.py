@@ -51,3 +51,30 @@ def test_soup_encoder_init(impl):
                   'tdi.c._tdi_impl.SoupEncoder' if impl == 'c' else
                   'tdi.markup.soup.encoder.SoupEncoder')
     assert_equals(result.encoding, 'FOO')
+
+
+@_test.multi_impl(globals(), _encoder)
+def test_soup_encoder_content():
+    """ SoupEncoder.content escapes and encodes """
+    encoder = _encoder.SoupEncoder('latin-1')
+    value = 'plain text'
+
+    assert_true(encoder.content(value) is value)
+    assert_equals(encoder.content('a < b & c > "d"'),
+                  'a &lt; b &amp; c &gt; "d"')
+    assert_equals(encoder.content(U(r'\xe9 & \u20ac')),
+                  '\xe9 &amp; &#8364;')
+
+
+@_test.multi_impl(globals(), _encoder)
+def test_soup_encoder_attribute():
+    """ SoupEncoder.attribute escapes, encodes and quotes """
+    encoder = _encoder.SoupEncoder('latin-1')
+
+    assert_equals(encoder.attribute('plain'), '"plain"')
+    assert_equals(encoder.attribute('a<"b"&'), '"a&lt;&quot;b&quot;&amp;"')
+    assert_equals(encoder.attribute(U(r'\u20ac"')), '"&#8364;&quot;"')
+
+    encoder = _encoder.SoupEncoder('utf-16-be')
+    assert_equals(encoder.attribute(U('a&')),
+                  '"' + U('a&amp;').encode('utf-16-be') + '"')
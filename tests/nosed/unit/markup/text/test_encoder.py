@@ -0,0 +1,83 @@
+# -*- coding: ascii -*-
+r"""
+:Copyright:
+
+ Copyright 2015
+ Andr\xe9 Malo or his licensors, as applicable
+
+:License:
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+
+===================================
+ Tests for tdi.markup.text.encoder
+===================================
+
+Tests for tdi.markup.text.encoder
+"""
+if __doc__:
+    # pylint: disable = redefined-builtin
+    __doc__ = __doc__.encode('ascii').decode('unicode_escape')
+__author__ = r"Andr\xe9 Malo".encode('ascii').decode('unicode_escape')
+__docformat__ = "restructuredtext en"
+
+from nose.tools import assert_equals, assert_true
+from .... import _util as _test
+
+from tdi.markup.text import encoder as _encoder
+
+U = _test.uni  # pylint: disable = invalid-name
+
+
+@_test.multi_impl(globals(), _encoder, name='impl')
+def test_text_encoder_init(impl):
+    """ TextEncoder initializes properly """
+    result = _encoder.TextEncoder('FOO')
+
+    assert_true(isinstance(result, _encoder.TextEncoder))
+    tresult = type(result)
+
+    assert_equals("%s.%s" % (tresult.__module__, tresult.__name__),
+                  'tdi.c._tdi_impl.TextEncoder' if impl == 'c' else
+                  'tdi.markup.text.encoder.TextEncoder')
+    assert_equals(result.encoding, 'FOO')
+
+
+@_test.multi_impl(globals(), _encoder)
+def test_text_encoder_content():
+    """ TextEncoder.content encodes """
+    encoder = _encoder.TextEncoder('latin-1')
+    value = 'plain [text]'
+
+    assert_true(encoder.content(value) is value)
+    assert_equals(encoder.content(U(r'\xe9 [x]')), '\xe9 [x]')
+
+
+@_test.multi_impl(globals(), _encoder)
+def test_text_encoder_attribute():
+    """ TextEncoder.attribute escapes, encodes and quotes """
+    encoder = _encoder.TextEncoder('latin-1')
+
+    assert_equals(encoder.attribute('plain'), '"plain"')
+    assert_equals(encoder.attribute('a"b"'), '"a\\"b\\""')
+    assert_equals(encoder.attribute(U(r'\xe9"')), '"\xe9\\""')
+
+
+@_test.multi_impl(globals(), _encoder)
+def test_text_encoder_escape():
+    """ TextEncoder.escape escapes opening brackets """
+    encoder = _encoder.TextEncoder('latin-1')
+    value = 'plain'
+
+    assert_true(encoder.escape(value) is value)
+    assert_equals(encoder.escape('a[b]['), 'a[]b][]')
@@ -0,0 +1,97 @@
+# -*- coding: ascii -*-
+r"""
+:Copyright:
+
+ Copyright 2016
+ Andr\xe9 Malo or his licensors, as applicable
+
+:License:
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+
+=============================
+ Tests for tdi.render_buffer
+=============================
+
+Tests for tdi.render_buffer
+"""
+if __doc__:
+    # pylint: disable = redefined-builtin
+    __doc__ = __doc__.encode('ascii').decode('unicode_escape')
+__author__ = r"Andr\xe9 Malo".encode('ascii').decode('unicode_escape')
+__docformat__ = "restructuredtext en"
+
+from nose.tools import assert_equals
+from .. import _util as _test
+
+from tdi import render_buffer as _render_buffer
+
+
+@_test.multi_impl(globals(), _render_buffer, name='impl')
+def test_init(impl):
+    """ RenderBuffer initializes properly """
+    result = _render_buffer.RenderBuffer()
+
+    tresult = type(result)
+    assert_equals("%s.%s" % (tresult.__module__, tresult.__name__),
+                  'tdi.c._tdi_impl.RenderBuffer' if impl == 'c' else
+                  'tdi.render_buffer.RenderBuffer')
+    assert_equals(len(result), 0)
+    assert_equals(result.getvalue(), '')
+
+
+@_test.multi_impl(globals(), _render_buffer)
+def test_collect():
+    """ RenderBuffer collects chunks """
+    buf = _render_buffer.RenderBuffer()
+    buf.extend(iter(['<a>', '', 'b' * 1000, '</a>']))
+    buf.write('!')
+    buf.flush()
+
+    assert_equals(len(buf), 1008)
+    result = buf.getvalue()
+    assert_equals(result, '<a>' + 'b' * 1000 + '</a>!')
+    assert_equals(buf.getvalue(), result)
+
+    buf.write('?')
+    assert_equals(result, '<a>' + 'b' * 1000 + '</a>!')
+    assert_equals(buf.getvalue(), result + '?')
+
+
+@_test.multi_impl(globals(), _render_buffer)
+def test_blocks():
+    """ RenderBuffer writes coalesced blocks """
+    written = []
+    buf = _render_buffer.RenderBuffer(written.append, 4)
+    buf.extend(['a', 'b', 'c', 'd', 'e', 'fghij', 'k'])
+
+    assert_equals(written, ['abcd', 'efghij'])
+    assert_equals(len(buf), 1)
+
+    buf.flush()
+    buf.flush()
+    assert_equals(written, ['abcd', 'efghij', 'k'])
+    assert_equals(len(buf), 0)
+
+
+@_test.multi_impl(globals(), _render_buffer)
+def test_default_bufsize():
+    """ RenderBuffer applies the default block size """
+    written = []
+    buf = _render_buffer.RenderBuffer(written.append)
+    buf.write('x' * (_render_buffer.DEFAULT_BUFSIZE - 1))
+    assert_equals(written, [])
+
+    buf.write('y')
+    assert_equals(len(written), 1)
+    assert_equals(len(written[0]), _render_buffer.DEFAULT_BUFSIZE)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+import warnings as _warnings
+_warnings.resetwarnings()
+_warnings.filterwarnings('error')
+
+import gc
+
+from tdi import html
+from tdi import model_adapters
+
+template = html.from_string("""
+<node tdi="nested">
+    <xnode tdi="a"></xnode><ynode tdi="b"></ynode>
+</node>
+""".lstrip())
+
+class Model(object):
+    def render_a(self, node):
+        node.content = u'class a'
+
+class GetattrModel(object):
+    def __getattr__(self, name):
+        if name == 'render_b':
+            return lambda node: setattr(node, 'content', u'getattr b')
+        raise AttributeError(name)
+
+class OldModel:
+    def render_b(self, node):
+        node.content = u'old b'
+
+model = Model()
+template.render(model)
+
+# instance attributes are still found
+model.render_b = lambda node: setattr(node, 'content', u'instance b')
+template.render(model)
+template.render(Model())
+
+# methods added to or removed from the class are picked up
+Model.render_b = lambda self, node: setattr(node, 'content', u'class b')
+template.render(Model())
+del Model.render_b
+template.render(Model())
+
+# customized attribute access needs invalidation
+def getattr_b(self, name):
+    if name == 'render_b':
+        return lambda node: setattr(node, 'content', u'added getattr b')
+    raise AttributeError(name)
+
+class Late(object):
+    pass
+
+template.render(Late())
+Late.__getattr__ = getattr_b
+template.render(Late())
+model_adapters.invalidate_method_cache(Late)
+template.render(Late())
+
+template.render(GetattrModel())
+template.render(OldModel())
+
+# model classes are referenced weakly
+class Temporary(object):
+    def render_a(self, node):
+        node.content = u'temporary a'
+
+def cached(name):
+    return [cls.__name__ for cls in model_adapters._method_cache.keys()
+            if cls.__name__ == name]
+
+template.render(Temporary())
+print cached('Temporary')
+del Temporary
+gc.collect()
+print cached('Temporary')
+
+# the cache is bounded, entries are evicted one by one
+models = [type('Model%d' % idx, (Model,), {})() for idx in range(1100)]
+for model in models:
+    template.render_string(model)
+print 1000 < len(model_adapters._method_cache) <= 1024
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+import warnings as _warnings
+_warnings.resetwarnings()
+_warnings.filterwarnings('error')
+
+from tdi import html
+
+template = html.from_string("""
+<node tdi="item" a="b">
+    <node tdi="-nested" c="d">
+        <node tdi="subnested" e="f">text</node>
+    </node>
+    <xnode tdi="x" g="h"></xnode>
+</node>
+""".lstrip())
+
+class Model(object):
+    def render_item(self, node):
+        node['a'] = u'changed'
+        node.nested.subnested['e'] = None
+        del node.nested['c']
+        node.x.raw['g'] = '<raw>'
+
+    def render_subnested(self, node):
+        node.content = u'changed'
+
+    def render_x(self, node):
+        node.raw.content = '<raw>'
+
+class Empty(object):
+    pass
+
+template.render(Empty())
+template.render(Model())
+template.render(Empty())
+
+# writing to the container while iterating a shared node
+template = html.from_string("""
+<ul tdi="list"><li tdi="item">x</li></ul>
+""".lstrip())
+
+class IterModel(object):
+    def render_list(self, node):
+        for subnode, item in node.item.iterate([1, 2, 3]):
+            subnode.content = item
+            node.item['class'] = 'c'
+        return True
+
+template.render(IterModel())
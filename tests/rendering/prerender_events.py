@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+import warnings as _warnings
+_warnings.resetwarnings()
+_warnings.filterwarnings('error')
+
+from tdi import html, text
+from tdi.model_adapters import RenderAdapter
+
+html_template = html.from_string("""
+<html>
+<ul tdi="list"><li tdi="item"><a tdi="link" href="#">x</a></li></ul>
+<p tdi="para">a <br tdi="br"/> b<span tdi="-flat">c</span></p>
+<tr tdi="row"><td tdi="name">x</td><td>static</td></tr>
+<div tdi="later">late <b tdi="sub">sub</b></div>
+<script tdi="script">x</script><style tdi="style">y</style>
+<textarea tdi="area">z</textarea>
+</html>
+""".lstrip())
+
+text_template = text.from_string("""
+Hello [[name]], this is a []template].
+[entry][[title]][/entry][tdi=":-entry"], [/]
+[row][[name]] costs []1].
+[/row]""".lstrip())
+
+
+class PreModel(object):
+    def render_item(self, node):
+        for snode, item in node.iterate((u'one', u'<two>')):
+            snode.link.content = item
+            snode.link['href'] = '/%s' % item
+
+    def render_para(self, node):
+        node.raw.content = '<em>raw</em> & <br tdi="br">'
+        return True
+
+    def render_row(self, node):
+        node.repeat_map([dict(name='a & b'), dict(name='c')], dict(name='name'))
+
+    def render_title(self, node):
+        node.content = u'[title]'
+
+    def render_script(self, node):
+        node.raw.content = 'if (a<b) { s = "<i tdi=\\"br\\">"; }'
+        return True
+
+    def render_style(self, node):
+        node.raw.content = 'a<b{}'
+        return True
+
+    def render_area(self, node):
+        node.raw.content = '<b tdi="br">'
+        return True
+
+
+class Model(object):
+    def render_name(self, node):
+        node.content = u'world'
+
+    def render_sub(self, node):
+        node.content = u'final'
+
+    def render_br(self, node):
+        node['class'] = 'parsed'
+
+
+def prerendered(template, factory=None):
+    tree = template.tree
+    adapted = RenderAdapter.for_prerender(PreModel(), attr=dict(
+        scope=template.factory.builder().analyze.scope,
+        tdi=template.factory.builder().analyze.attribute,
+    ))
+    events = list(tree.render_events(adapted))
+    markup = []
+    for event in events:
+        if isinstance(event, str):
+            markup.append(event)
+        elif len(event) == 2:
+            markup.append(event[1])
+        else:
+            markup.append(event[-1])
+    reparsed = template.factory.from_string(
+        ''.join(markup), encoding=tree.encoder.encoding
+    )
+    built = (factory or template.factory).from_events(
+        iter(events), encoding=tree.encoder.encoding
+    )
+    return events, reparsed, built
+
+
+for template in (html_template, text_template):
+    events, reparsed, built = prerendered(template)
+    for event in events:
+        print repr(event)
+    print "-" * 72
+    print built.tree.to_string()
+    print "-" * 72
+    result = built.render_string(Model())
+    print result
+    print "-" * 72
+    print result == reparsed.render_string(Model())
+    print "=" * 72
+
+# filtered factories serialize and parse the events
+factory = html_template.factory.replace(
+    eventfilters=[], default_eventfilters=False
+)
+events, reparsed, built = prerendered(html_template, factory=factory)
+print built.render_string(Model()) == reparsed.render_string(Model())
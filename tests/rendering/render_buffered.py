@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+import warnings as _warnings
+_warnings.resetwarnings()
+_warnings.filterwarnings('error')
+
+from tdi import html
+
+template = html.from_string("""
+<html><body>
+<ul><li tdi="item">x</li></ul>
+</body></html>
+""".lstrip())
+
+class Model(object):
+    def render_item(self, node):
+        for subnode, item in node.iterate(range(20)):
+            subnode.content = item
+
+class Stream(object):
+    def __init__(self):
+        self.writes, self.flushes = [], 0
+
+    def write(self, data):
+        self.writes.append(data)
+
+    def flush(self):
+        self.flushes += 1
+
+stream = Stream()
+template.render(Model(), stream)
+unbuffered = ''.join(stream.writes)
+print len(stream.writes) > 40
+
+stream = Stream()
+template.render(Model(), stream, bufsize=100)
+print [len(block) for block in stream.writes], stream.flushes
+print ''.join(stream.writes) == unbuffered
+
+stream = Stream()
+template.render(Model(), stream, flush=True, bufsize=100)
+print len(stream.writes), stream.flushes
+
+stream = Stream()
+template.render(Model(), stream, flush=-1)
+print len(stream.writes), stream.writes[0] == unbuffered
+print template.render_string(Model()) == unbuffered
+
+# Flush before node boundaries
+template = html.from_string("""
+<html><head><title>t</title></head>
+<body tdi="body"><p tdi="item">x</p></body></html>
+""".lstrip())
+
+class Stream(Stream):
+    def flush(self):
+        self.flushes += 1
+        self.writes.append('|')
+
+stream = Stream()
+template.render(Model(), stream, bufsize=1000, flushnodes=['body'])
+print ''.join(stream.writes)
+print stream.flushes
+
+stream = Stream()
+template.render(Model(), stream, flushnodes=['body'])
+print stream.writes[stream.writes.index('|') - 1:stream.writes.index('|') + 2]
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+import warnings as _warnings
+_warnings.resetwarnings()
+_warnings.filterwarnings('error')
+
+from tdi import html
+from tdi.render_cache import RenderCache
+
+template = html.from_string("""
+<html>
+<div tdi="nav"><a tdi="link">x</a> <span tdi="user">user</span></div>
+<p tdi="body">body</p>
+<ul><li tdi="item">i</li></ul>
+</html>
+""".lstrip())
+
+class Model(object):
+    calls = 0
+
+    def __init__(self, user, section):
+        self.user, self.section = user, section
+
+    def cache_nav(self, node):
+        return self.section
+
+    def render_nav(self, node):
+        Model.calls += 1
+        node['class'] = self.section
+
+    def render_link(self, node):
+        Model.calls += 1
+        node.content = self.section
+
+    def render_user(self, node):
+        node.content = self.user
+
+    def render_body(self, node):
+        node.content = u'%s/%s' % (self.user, self.section)
+
+    def cache_item(self, node):
+        return 'items'
+
+    def render_item(self, node):
+        Model.calls += 1
+        node.repeat(self.repeat_item, [1, 2, 3])
+
+    def repeat_item(self, node, item):
+        node.content = item
+
+cache = RenderCache()
+for user, section in [
+        (u'a', u'home'), (u'b', u'home'), (u'c', u'news'), (u'd', u'home')]:
+    print template.render_string(Model(user, section), cache=cache),
+    print Model.calls, len(cache)
+
+# cache_ methods don't need to exist
+class Other(object):
+    def render_user(self, node):
+        node.content = u'other'
+
+print template.render_string(Other(), cache=cache), len(cache)
+print template.render_string(Model(u'e', u'home')), Model.calls
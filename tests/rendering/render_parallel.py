@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+import warnings as _warnings
+_warnings.resetwarnings()
+_warnings.filterwarnings('error')
+
+import threading
+
+from tdi import html
+
+template = html.from_string("""
+<html><body>
+<div tdi="first">first <b tdi="name">x</b></div>
+<div tdi="second">second <b tdi="name">x</b></div>
+<p tdi="plain">plain</p>
+<div tdi="third"><span tdi="item">x</span></div>
+</body></html>
+""".lstrip())
+
+class Future(object):
+    def __init__(self, func, args, kwargs):
+        self._event = threading.Event()
+        self._result = self._error = None
+        thread = threading.Thread(target=self._run, args=(func, args, kwargs))
+        thread.start()
+
+    def _run(self, func, args, kwargs):
+        try:
+            self._result = func(*args, **kwargs)
+        except Exception, e:
+            self._error = e
+        self._event.set()
+
+    def done(self):
+        return self._event.is_set()
+
+    def result(self):
+        self._event.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+class Executor(object):
+    submitted = 0
+
+    def submit(self, func, *args, **kwargs):
+        self.submitted += 1
+        return Future(func, args, kwargs)
+
+class Model(object):
+    def __init__(self):
+        self.second_started = threading.Event()
+        self.overlapped = None
+
+    def render_first(self, node):
+        # waits for the second widget, which only works concurrently
+        self.overlapped = self.second_started.wait(5)
+        node.name.content = u'one'
+
+    def render_second(self, node):
+        self.second_started.set()
+        node.name.content = u'two'
+
+    def render_plain(self, node):
+        node.content = u'main'
+
+    def render_third(self, node):
+        for subnode, item in node.item.iterate([1, 2, 3]):
+            subnode.content = item
+
+
+executor = Executor()
+model = Model()
+print template.render_string(
+    model, parallel=['first', 'second', 'third'], executor=executor
+)
+print model.overlapped, executor.submitted
+
+# Without executor everything renders sequentially
+class Sequential(Model):
+    def render_first(self, node):
+        node.name.content = u'one'
+
+print template.render_string(Sequential(), parallel=['first'])
+
+# Errors propagate
+class Broken(Sequential):
+    def render_second(self, node):
+        raise ValueError("broken")
+
+try:
+    template.render_string(
+        Broken(), parallel=['second'], executor=Executor()
+    )
+except ValueError, e:
+    print "ValueError", e
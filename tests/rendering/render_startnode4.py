@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+import warnings as _warnings
+_warnings.resetwarnings()
+_warnings.filterwarnings('error')
+
+from tdi import html
+from tdi import NodeNotFoundError
+
+template = html.from_string("""
+<div tdi="a">
+    <p tdi="b"><span tdi="d">first</span></p>
+</div>
+<div tdi="a">
+    <p tdi="b"><span tdi="c">second</span></p>
+    <ul><li tdi="e"><em tdi="c">third</em></li></ul>
+</div>
+""".lstrip())
+
+class Model(object):
+    def render_c(self, node):
+        node.content = node.content + u'!'
+
+print template.render_string(Model(), startnode="a.b.d")
+print template.render_string(Model(), startnode="a.b.c")
+print template.render_string(Model(), startnode="a.c")
+print template.render_string(Model(), startnode="a.e.c")
+print template.render_string(Model(), startnode="a.b.c")
+try:
+    template.render_string(Model(), startnode="a.d.c")
+except NodeNotFoundError, e:
+    print "not found", e
+
+# ambiguous addresses in deep trees are resolved in polynomial time
+deep = html.from_string(
+    '<div tdi="a">' * 30 + '<b tdi="b">deep</b>' + '</div>' * 30
+)
+print deep.render_string(Model(), startnode=".".join(["a"] * 15 + ["b"]))
+try:
+    deep.render_string(Model(), startnode=".".join(["a"] * 15 + ["c"]))
+except NodeNotFoundError, e:
+    print "not found", str(e)[-5:]
@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+import warnings as _warnings
+_warnings.resetwarnings()
+_warnings.filterwarnings('error')
+
+from tdi import html
+
+template = html.from_string("""
+<ul tdi="list" class="list">
+    <li tdi="item" class="item"><a tdi="link" href="#">x</a></li>
+</ul>
+""".lstrip())
+
+class Model(object):
+    def render_list(self, node):
+        node.item.repeat(self.repeat_item, [1, 2, 3])
+
+    def repeat_item(self, node, item):
+        if item == 2:
+            node['class'] = 'item two'
+            node.link['href'] = '/%d' % item
+        elif item == 3:
+            del node['class']
+            node.link.raw['href'] = '"/raw"'
+        node.link.content = item
+
+class Empty(object):
+    pass
+
+template.render(Empty())
+template.render(Model())
+template.render(Empty())
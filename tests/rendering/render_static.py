@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+import warnings as _warnings
+_warnings.resetwarnings()
+_warnings.filterwarnings('error')
+
+from tdi import html
+
+template = html.from_string("""
+<node tdi="item">
+    <node tdi="nested" a="b">
+        <node tdi="-subnested">&lt;x&gt; &amp;amp; <i tdi="y">y</i></node>
+    </node><tdi tdi=":-nested">
+    </tdi>
+    <xnode tdi="a"><br tdi="b"></xnode>
+    <xnode tdi="c">c</xnode>
+</node>
+""".lstrip())
+
+class Model(object):
+    def render_item(self, node):
+        node.c.content = u'changed'
+        return True
+
+    def render_nested(self, node):
+        node.content = u"should not be here"
+
+    def render_y(self, node):
+        node.content = u"should not be here"
+
+    def render_a(self, node):
+        node.content = u"should not be here"
+
+model = Model()
+for _ in range(2):
+    template.render(model)
+print template.render_string(None, prerender=model)
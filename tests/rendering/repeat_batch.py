@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+import warnings as _warnings
+_warnings.resetwarnings()
+_warnings.filterwarnings('error')
+
+from tdi import html
+
+template = html.from_string("""
+<node tdi="item">
+    <node tdi="nested">
+        <node tdi="sub"></node>
+    </node><tdi tdi=":-nested">
+    </tdi>
+</node>
+""".lstrip())
+
+class Model(object):
+    def __init__(self, done):
+        self.done = done
+        self.calls = []
+
+    def render_item(self, node):
+        def sep(node, prefix):
+            node.hiddenelement = False
+            node['prefix'] = prefix
+        node.nested.repeat_batch(
+            self.repeat_nested, [1, 2, 3, 4, 5], "x", batch=2, separate=sep
+        )
+        return True
+
+    def repeat_nested(self, pairs, prefix):
+        self.calls.append([item for _, item in pairs])
+        for node, item in pairs:
+            node['j'] = "%s%s" % (prefix, item)
+            node['ctx'] = node.ctx[0]
+            if item == 4:
+                node.remove()
+        return self.done
+
+    def render_sub(self, node):
+        node.content = "sub"
+
+for done in (False, True):
+    model = Model(done)
+    template.render(model)
+    print model.calls
+
+class Check(object):
+    def render_item(self, node):
+        node.nested.repeat_batch(self.repeat_nested, [], "y")
+        for kwargs in ({'batch': 0}, {'foo': 1}):
+            try:
+                node.nested.repeat_batch(self.repeat_nested, [], **kwargs)
+            except (TypeError, ValueError), e:
+                print e.__class__.__name__
+
+    def repeat_nested(self, pairs, prefix):
+        print "never called"
+
+template.render(Check())
+
+template = html.from_string("""
+<ul><li tdi="item"></li></ul>
+""".lstrip())
+
+class Plain(object):
+    def render_item(self, node):
+        node.repeat_batch(self.repeat_item, [1, 2, 3], batch=2)
+
+    def repeat_item(self, pairs):
+        for node, item in pairs:
+            node.content = item
+
+template.render(Plain())
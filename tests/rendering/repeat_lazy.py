@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+import warnings as _warnings
+_warnings.resetwarnings()
+_warnings.filterwarnings('error')
+
+from tdi import html
+
+template = html.from_string("""
+<ul tdi="list">
+<li tdi="item" class="x"><b tdi="title">title</b><i tdi="-wrap"><u tdi="sub"
+>sub</u><s tdi="rows"><em tdi="cell">c</em></s></i></li>
+</ul>
+""".lstrip())
+
+class Model(object):
+    def render_list(self, node):
+        # touch subnodes before repeating
+        node.item.title['lang'] = u'en'
+        node.item.wrap.sub.content = u'default'
+        node.item.repeat(self.repeat_item, [1, 2, 3])
+        return True
+
+    def repeat_item(self, node, item):
+        if item == 2:
+            node.title.content = u'two'
+            node.wrap.sub.hiddenelement = True
+            for subnode, cell in node.wrap.rows.cell.iterate([u'a', u'b']):
+                subnode.content = cell
+        elif item == 3:
+            node.title.remove()
+            node.wrap.rows.cell.repeat(self.repeat_cell, [u'x', u'y'])
+
+    def repeat_cell(self, node, item):
+        node.content = item
+
+model = Model()
+template.render(model)
+template.render(model)
+
+class Empty(object):
+    def render_list(self, node):
+        node.item.repeat(None, [1, 2])
+        return True
+
+template.render(Empty())
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import warnings as _warnings
+_warnings.resetwarnings()
+_warnings.filterwarnings('error')
+
+from tdi import html, NodeNotFoundError
+
+template = html.from_string("""
+<table>
+<tr tdi="row"><td tdi="name">x</td><td tdi="size" class="n">0</td>
+<td>static <b tdi="deco">d</b></td></tr><tdi tdi=":-row">
+</tdi>
+</table>
+""".lstrip())
+
+rows = [
+    dict(name=u'f\xfc\xfc', size=1),
+    dict(name='<a & b>', size=2),
+    dict(name='bar', size=3),
+]
+
+class Model(object):
+    def __init__(self, separate=None, mapping=None):
+        self.separate = separate
+        if mapping is None:
+            mapping = {
+                'name': 'name', 'size': lambda row: row['size'] * 1024,
+            }
+        self.mapping = mapping
+
+    def render_row(self, node):
+        node['class'] = 'row'
+        node.deco.content = 'modified'
+        node.repeat_map(rows, self.mapping, separate=self.separate)
+
+    def render_deco(self, node):
+        print "never called"
+
+    def render_name(self, node):
+        print "never called"
+
+def sep(node):
+    node.hiddenelement = False
+    node['between'] = "%s/%s" % (node.ctx[1][0]['name'], node.ctx[1][1]['size'])
+
+template.render(Model())
+template.render(Model(separate=sep))
+template.render(Model(mapping={}))
+try:
+    template.render(Model(mapping={'name': 'name', 'bar': 'name'}))
+except NodeNotFoundError, e:
+    print
+    print "NodeNotFoundError: %s" % e
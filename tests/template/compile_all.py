@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+import warnings as _warnings
+_warnings.resetwarnings()
+_warnings.filterwarnings('error')
+
+import os
+import shutil
+import tempfile
+
+from tdi import html
+
+class Model(object):
+    def render_item(self, node):
+        for subnode, item in node.iterate([u'a', u'<b>']):
+            subnode.content = item
+
+    def render_title(self, node):
+        node[u'title'] = u'<you>'
+
+class Wrapped(object):
+    def __init__(self, template):
+        self.template = template
+
+source = """<html><body>
+<h1 tdi="title" class="x">Page %d &amp; more</h1>
+<ul><li tdi="item">x</li><li tdi=":item">, </li></ul>
+</body></html>
+"""
+
+basedir = tempfile.mkdtemp()
+try:
+    names = []
+    for idx in range(4):
+        name = 'page%d.html' % idx
+        fp = open(os.path.join(basedir, name), 'wb')
+        try:
+            fp.write(source % idx)
+        finally:
+            fp.close()
+        names.append(name)
+
+    factory = html.replace(memoizer={})
+    templates = factory.compile_all(names, basedir=basedir, workers=2)
+    print len(templates), [os.path.basename(t.filename) for t in templates]
+    print templates[1].render_string(Model())
+
+    # Results are memoized by filename, encoding and cls
+    again = factory.compile_all(lambda: names[2:], basedir=basedir)
+    print [a is b for a, b in zip(again, templates[2:])]
+    other = factory.compile_all(names[2:], basedir=basedir, encoding='utf-8')
+    print [a is b for a, b in zip(other, templates[2:])]
+    other = factory.compile_all(names[2:], basedir=basedir, cls=Wrapped)
+    print [type(a).__name__ for a in other]
+
+    # Same trees as loaded in the calling process
+    local = html.compile_all(names, basedir=basedir, workers=1)
+    print [a.tree.dump() == b.tree.dump() for a, b in zip(templates, local)]
+finally:
+    shutil.rmtree(basedir)
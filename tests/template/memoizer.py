@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+import warnings as _warnings
+_warnings.resetwarnings()
+_warnings.filterwarnings('error')
+
+import threading
+
+from tdi import html
+from tdi import factory_memoize
+
+class Timer(object):
+    now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+timer = Timer()
+
+def load(factory, source):
+    return factory.from_string(source, key=source)
+
+# LRU by count
+memo = factory_memoize.Memoizer(maxentries=2, stripes=1, timer=timer)
+factory = html.replace(memoizer=memo)
+t1 = load(factory, '<p tdi="a">1</p>')
+t2 = load(factory, '<p tdi="a">2</p>')
+print load(factory, '<p tdi="a">1</p>') is t1
+t3 = load(factory, '<p tdi="a">3</p>')
+print len(memo), load(factory, '<p tdi="a">1</p>') is t1
+print load(factory, '<p tdi="a">2</p>') is t2
+print sorted(memo.stats().items())
+
+# LRU by estimated size
+small = factory_memoize.tree_size(t1)
+print small > 0, factory_memoize.tree_size(object())
+memo = factory_memoize.Memoizer(maxbytes=small * 2, stripes=1)
+factory = html.replace(memoizer=memo)
+for idx in range(3):
+    load(factory, '<p tdi="a">%d</p>' % idx)
+print len(memo), memo.size == small * 2, memo.stats()['evictions']
+load(factory, '<div>%s</div>' % ('x' * (small * 3)))
+print len(memo), memo.stats()['misses']
+
+# The limits apply to all stripes
+memo = factory_memoize.Memoizer(maxbytes=small * 4)
+factory = html.replace(memoizer=memo)
+big = load(factory, '<div>%s</div>' % ('x' * small))
+print len(memo), memo.size > small * 4 // 16
+for idx in range(20):
+    load(factory, '<p tdi="a">%d</p>' % idx)
+print memo.size <= small * 4, len(memo) == memo.stats()['entries']
+memo = factory_memoize.Memoizer(maxentries=3)
+factory = html.replace(memoizer=memo)
+for idx in range(20):
+    load(factory, '<p tdi="a">%d</p>' % idx)
+print len(memo), memo.stats()['evictions'], all([
+    ('from_string', '<p tdi="a">%d</p>' % idx) in memo
+    for idx in range(17, 20)
+])
+
+memo = factory_memoize.Memoizer(ttl=10, timer=timer)
+factory = html.replace(memoizer=memo)
+t1 = load(factory, '<p>ttl</p>')
+timer.now += 5
+print load(factory, '<p>ttl</p>') is t1
+timer.now += 6
+print load(factory, '<p>ttl</p>') is t1
+stats = memo.stats()
+print stats['hits'], stats['misses'], stats['expirations']
+memo.clear()
+print len(memo), memo.size
+
+# Concurrent access on several stripes
+memo = factory_memoize.Memoizer(maxentries=40, stripes=4)
+factory = html.replace(memoizer=memo)
+errors = []
+
+def work(offset):
+    try:
+        for idx in range(50):
+            load(factory, '<p>%d</p>' % ((idx + offset) % 60))
+    except Exception, e:
+        errors.append(e)
+
+threads = [threading.Thread(target=work, args=(n * 7,)) for n in range(8)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+stats = memo.stats()
+print errors, len(memo) <= 40, 0 < stats['hits'] + stats['misses'] <= 400
+
+# The size is computed once per tree
+dumps = []
+
+class Tree(object):
+    def dump(self):
+        dumps.append(1)
+        return ()
+
+class Tpl(object):
+    virgin_tree = Tree()
+
+tpl = Tpl()
+print factory_memoize.tree_size(tpl) == factory_memoize.tree_size(tpl),
+print len(dumps)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+import warnings as _warnings
+_warnings.resetwarnings()
+_warnings.filterwarnings('error')
+
+from StringIO import StringIO
+
+from tdi import html
+
+files = {
+    'page': (1, """<html><body tdi:overlay="content">page</body>"""
+                """<p tdi:overlay="footer">footer</p></html>"""),
+    'box': (1, """<div tdi:overlay="content">box """
+               """<span tdi:overlay="info">info</span></div>"""
+               """<div tdi:overlay="unused">unused</div>"""),
+    'info': (1, """<b tdi:overlay="info">new info</b>"""),
+}
+
+def opener(filename, mtime, check_only=False):
+    xtime, source = files[filename]
+    if check_only:
+        return mtime != xtime, xtime
+    return StringIO(source), xtime
+
+factory = html.replace(autoupdate=True)
+template = factory.from_opener(opener, 'page').overlay(
+    factory.from_opener(opener, 'box')
+).overlay(factory.from_opener(opener, 'info'))
+
+tree = template.tree
+print template.render_string(None)
+
+# Unused overlay source changed: the tree is kept
+files['box'] = (2, files['box'][1].replace('>unused<', '>still unused<'))
+print template.tree is tree, template.mtime
+
+# Replaced overlay target changed: the tree is kept
+files['page'] = (3, files['page'][1].replace('>page<', '>new page<'))
+print template.tree is tree, template.mtime
+
+# Used overlay source changed: the tree is rebuilt
+files['box'] = (4, files['box'][1].replace('box ', 'new box '))
+print template.tree is tree, template.mtime
+print template.render_string(None)
+
+# Forced reloads always rebuild
+tree = template.tree
+print template.reload(force=True).tree is tree
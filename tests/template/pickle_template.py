@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+import warnings as _warnings
+_warnings.resetwarnings()
+_warnings.filterwarnings('error')
+
+import cPickle
+import os
+import pickle
+import tempfile
+
+from tdi import html, text, nodetree, NodeTreeError
+from tdi.factory_memoize import MemoizedFactory
+
+class Model(object):
+    def render_item(self, node):
+        for subnode, item in node.iterate([u'a', u'b']):
+            subnode.content = item
+            subnode['title'] = u'<%s>' % item
+
+page = html.from_string("""<html><body>
+<ul><li tdi="item" class="x">x</li><li tdi=":item">, </li></ul>
+<div tdi:overlay="box">box</div>
+</body></html>
+""").overlay(html.from_string("""
+<p tdi:overlay="box">overlaid &amp; <b tdi="item">x</b></p>
+"""))
+expected = page.render_string(Model())
+print expected
+
+for module in (pickle, cPickle):
+    for protocol in (0, 2):
+        copy = module.loads(module.dumps(page, protocol))
+        print type(copy).__name__, copy.render_string(Model()) == expected,
+        print str(copy) == str(page), copy.factory.replace is not None
+print
+
+# trees
+copy = pickle.loads(pickle.dumps(page.tree))
+print copy.dump() == page.tree.dump()
+print copy.encoder.__class__ is page.tree.encoder.__class__,
+print copy.encoder.encoding
+try:
+    pickle.dumps(nodetree.Root())
+except NodeTreeError:
+    print "NodeTreeError"
+
+# template nodes
+root = nodetree.Root()
+node = root.append_node(
+    'li', [('class', '"x"')], dict(attribute=('', 'item')), False
+)
+node.append_text('x')
+node.endtag = '</li>'
+sep = root.append_node('li', [], dict(attribute=(':', 'item')), False)
+sep.append_text(', ')
+sep.endtag = '</li>'
+try:
+    pickle.dumps(node)
+except NodeTreeError:
+    print "NodeTreeError"
+root.finalize(page.tree.encoder, page.tree.decoder)
+for module in (pickle, cPickle):
+    copy = module.loads(module.dumps(node, 2))
+    print type(copy).__name__, copy is not node,
+    print copy.__reduce__()[1] == node.__reduce__()[1],
+    print copy.__reduce__()[1][0]
+
+# factories
+factory = pickle.loads(pickle.dumps(MemoizedFactory(text.replace(
+    memoizer={}
+))))
+print factory.from_string("Hello [[name]]!").render_string(None)
+
+# autoupdating templates
+tfile = tempfile.NamedTemporaryFile()
+try:
+    tfile.write("""<p tdi="item">version 1</p>""")
+    tfile.flush()
+    template = html.replace(autoupdate=True).from_file(tfile.name)
+    copy = cPickle.loads(cPickle.dumps(template, 2))
+    print type(copy).__name__, copy.render_string(None)
+
+    tfile.seek(0)
+    tfile.truncate()
+    tfile.write("""<p tdi="item">version 2</p>""")
+    tfile.flush()
+    os.utime(tfile.name, (1, 1))
+    print copy.render_string(None)
+finally:
+    tfile.close()
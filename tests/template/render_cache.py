@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+import warnings as _warnings
+_warnings.resetwarnings()
+_warnings.filterwarnings('error')
+
+import gc
+import tempfile
+
+from tdi import html
+from tdi.render_cache import RenderCache
+
+html = html.replace(autoupdate=True)
+
+class Model(object):
+    def __init__(self, user, key=True):
+        self.user, self.calls, self.key = user, 0, key
+
+    def render_cache_key(self):
+        if self.key:
+            return self.user
+
+    def render_user(self, node):
+        self.calls += 1
+        node.content = self.user
+
+class Timer(object):
+    now = 0
+    def __call__(self):
+        return self.now
+
+timer = Timer()
+cache = RenderCache(maxbytes=100, ttl=10, timer=timer)
+
+tfile = tempfile.NamedTemporaryFile()
+try:
+    tfile.write("""<p tdi="user">nobody</p>""")
+    tfile.flush()
+    template = html.from_file(tfile.name)
+
+    anon = Model(u'anon')
+    print template.render_string(anon, cache=cache), anon.calls
+    print template.render_string(anon, cache=cache), anon.calls
+    template.render(anon, cache=cache)
+    print
+    print anon.calls, len(cache), cache.size
+
+    # not cached without key
+    nokey = Model(u'anon', key=False)
+    print template.render_string(nokey, cache=cache), nokey.calls
+    print template.render_string(nokey, cache=cache), nokey.calls
+
+    # startnode is part of the key
+    print template.render_string(anon, startnode='user', cache=cache),
+    print anon.calls, len(cache)
+
+    # TTL
+    timer.now = 10
+    print template.render_string(anon, cache=cache), anon.calls, len(cache)
+
+    # LRU by bytes
+    for idx in range(10):
+        template.render_string(Model(u'user%d' % idx), cache=cache)
+    print len(cache), cache.size
+    print template.render_string(anon, cache=cache), anon.calls
+
+    # reload
+    tfile.seek(0)
+    tfile.truncate()
+    tfile.write("""<div tdi="user">nobody</div>""")
+    tfile.flush()
+    template.reload(force=True)
+    print len(cache), cache.size
+    print template.render_string(anon, cache=cache), anon.calls
+    print template.render_string(anon, cache=cache), anon.calls
+
+    cache.clear()
+    print len(cache), cache.size
+
+    # Entries of templates, which went away, are dropped with the next
+    # access (even if they go away while the lock is held)
+    other = html.from_string("""<p tdi="user">x</p>""")
+    other.render_string(anon, cache=cache)
+    print len(cache)
+    cache.lock.acquire()
+    try:
+        del other
+        gc.collect()
+    finally:
+        cache.lock.release()
+    print len(cache), cache.get(template, u'anon'), len(cache)
+
+    # A new prerender version drops the entries of the template
+    class Pre(object):
+        version = 1
+
+        def prerender_version(self, version):
+            return version != self.version, self.version
+
+    pre = Pre()
+    template.render_string(anon, cache=cache)
+    print len(cache), anon.calls
+    print template.render_string(anon, prerender=pre, cache=cache),
+    print anon.calls, len(cache)
+    print template.render_string(anon, prerender=pre, cache=cache),
+    print anon.calls, len(cache)
+    pre.version = 2
+    print template.render_string(anon, prerender=pre, cache=cache),
+    print anon.calls, len(cache)
+
+    # false keys are keys as well
+    class Falsy(Model):
+        def __init__(self, key):
+            Model.__init__(self, u'falsy %r' % (key,))
+            self.fkey = key
+
+        def render_cache_key(self):
+            return self.fkey
+
+    for key in (0, '', (), 0, ''):
+        falsy = Falsy(key)
+        print template.render_string(falsy, cache=cache), falsy.calls
+finally:
+    tfile.close()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+import warnings as _warnings
+_warnings.resetwarnings()
+_warnings.filterwarnings('error')
+
+from StringIO import StringIO
+
+from tdi import html
+from tdi import factory as _factory
+
+files = {
+    'page': (1, """<html><body tdi:overlay="content">page</body></html>"""),
+    'box': (1, """<div tdi:overlay="content">box</div>"""),
+}
+checks = []
+
+def opener(filename, mtime, check_only=False):
+    xtime, source = files[filename]
+    if check_only:
+        checks.append(filename)
+        return mtime != xtime, xtime
+    return StringIO(source), xtime
+
+class Clock(object):
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+clock = Clock()
+factory = html.replace(autoupdate=True, checkinterval=10)
+print factory._loader.statcache.interval
+factory._loader.statcache = _factory.StatCache(10, timer=clock)
+
+page = factory.from_opener(opener, 'page')
+box = factory.from_opener(opener, 'box')
+template = page.overlay(box)
+print template.render_string(None)
+print checks
+
+# Within the interval each file is checked once
+for _ in range(5):
+    template.tree
+print sorted(checks)
+
+# Changes are noticed after the interval
+files['box'] = (2, """<div tdi:overlay="content">new box</div>""")
+template.tree
+print template.render_string(None)
+clock.now = 11.0
+print template.render_string(None)
+print sorted(checks)
+
+# Without interval every access checks
+del checks[:]
+page = html.replace(autoupdate=True).from_opener(opener, 'page')
+page.tree
+page.tree
+print checks
+
+# Factories created by replace share the cache (unless they get their own
+# interval)
+factory = html.replace(autoupdate=True, checkinterval=10)
+other = factory.replace(eventfilters=[], default_eventfilters=False)
+print other._loader.statcache is factory._loader.statcache
+print factory.replace(checkinterval=5)._loader.statcache.interval
+
+# The number of results is bounded, expired ones are dropped
+cache = _factory.StatCache(10, timer=clock, maxentries=2)
+files['third'] = (1, """<p>third</p>""")
+for name in ('page', 'box', 'third'):
+    cache.check(opener, name, None)
+print sorted([key[1] for key in cache._entries])
+clock.now = 30.0
+cache.check(opener, 'page', None)
+print sorted([key[1] for key in cache._entries])
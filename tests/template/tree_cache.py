@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+import warnings as _warnings
+_warnings.resetwarnings()
+_warnings.filterwarnings('error')
+
+import os
+import shutil
+import tempfile
+
+from tdi import html
+from tdi import filters
+
+class Count(filters.BaseEventFilter):
+    parsed = 0
+
+    def finalize(self):
+        Count.parsed += 1
+        return self.builder.finalize()
+
+class Model(object):
+    @property
+    def scope_page(self):
+        return self
+
+    def render_item(self, node):
+        for subnode, item in node.iterate([u'a', u'b', u'c']):
+            subnode.content = item
+
+    def render_user(self, node):
+        node['title'] = u'<you>'
+
+source = """<html><body tdi:scope="page">
+<h1 tdi="-title" class="x" id="y" lang="en" dir="ltr">T&amp;C &#169;</h1>
+<ul><li tdi="item">x</li><li tdi=":item">, </li></ul>
+<p tdi="*user" tdi:overlay="<box">Hi <b tdi="name">you</b>!</p>
+<br tdi="empty"/>
+</body></html>
+"""
+
+cachedir = tempfile.mkdtemp()
+try:
+    factory = html.replace(eventfilters=[Count], cachedir=cachedir)
+    first = factory.from_string(source)
+    print Count.parsed, len(os.listdir(cachedir))
+
+    second = factory.from_string(source)
+    print Count.parsed, len(os.listdir(cachedir))
+    print str(first.tree) == str(second.tree)
+    print first.tree.dump() == second.tree.dump()
+    print second.render_string(Model())
+
+    # Other filenames or sources are different cache entries
+    factory.from_string(source, filename='other')
+    print Count.parsed, len(os.listdir(cachedir))
+
+    # Broken cache files are ignored
+    for name in os.listdir(cachedir):
+        fp = open(os.path.join(cachedir, name), 'wb')
+        try:
+            fp.write('garbage')
+        finally:
+            fp.close()
+    third = factory.from_string(source)
+    print Count.parsed, third.tree.dump() == first.tree.dump()
+    factory.from_string(source)
+    print Count.parsed
+
+    # Unidentifiable filters disable the cache
+    shutil.rmtree(cachedir)
+    factory = html.replace(
+        eventfilters=[lambda builder: Count(builder)], cachedir=cachedir
+    )
+    factory.from_string(source)
+    factory.from_string(source)
+    print Count.parsed, os.path.exists(cachedir)
+finally:
+    shutil.rmtree(cachedir, ignore_errors=True)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+import warnings as _warnings
+_warnings.resetwarnings()
+_warnings.filterwarnings('error')
+
+import os
+import shutil
+import tempfile
+
+from tdi import html, nodetree, NodeTreeError
+
+class PreModel(object):
+    calls = 0
+
+    def prerender_version(self, oldversion):
+        return oldversion != 1, 1
+
+    def render_title(self, node):
+        PreModel.calls += 1
+        node.content = u'Warm'
+
+class Model(object):
+    def render_item(self, node):
+        for subnode, item in node.iterate([u'a', u'b']):
+            subnode.content = item
+
+tdir = tempfile.mkdtemp()
+try:
+    for name, source in [
+        ('one.html', """<h1 tdi="title">title</h1>
+<ul tdi="list"><li tdi="item">x</li></ul>"""),
+        ('two.html', """<p tdi="title">title</p><p>static <b>markup</b></p>"""),
+    ]:
+        fp = open(os.path.join(tdir, name), 'wb')
+        try:
+            fp.write(source)
+        finally:
+            fp.close()
+
+    factory = html.replace(memoizer={})
+    templates = factory.warm(
+        lambda: sorted(os.listdir(tdir)), basedir=tdir, prerender=PreModel()
+    )
+    print len(templates), PreModel.calls
+    print factory.from_file(
+        os.path.join(tdir, 'one.html'), key=os.path.join(tdir, 'one.html')
+    ) is templates[0]
+
+    for template in templates:
+        print template.render_string(Model(), prerender=PreModel())
+    print PreModel.calls
+
+    templates = factory.warm([], gcfreeze=False)
+    print templates
+finally:
+    shutil.rmtree(tdir)
+
+try:
+    nodetree.Root().freeze()
+except NodeTreeError:
+    print "NodeTreeError"
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+import warnings as _warnings
+_warnings.resetwarnings()
+_warnings.filterwarnings('error')
+
+import os
+import tempfile
+
+from tdi import html
+from tdi import factory
+from tdi import filters
+
+class Reads(object):
+    sizes = []
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    def read(self, *args):
+        Reads.sizes.append(args)
+        return self._stream.read(*args)
+
+class Filter(filters.BaseStreamFilter):
+    pass
+
+def opener(filename, mtime, check_only=False):
+    stream, mtime = factory.file_opener(filename, mtime, check_only)
+    if not check_only:
+        stream = Reads(stream)
+    return stream, mtime
+
+class Model(object):
+    def render_item(self, node):
+        for subnode, item in node.iterate([u'a', u'<b>']):
+            subnode.content = item
+
+source = """<html><body>
+<!-- comment --><h1 class="x">T&amp;C &#169;</h1>
+<ul><li tdi="item">x</li></ul>
+<script>if (a < b) { c(); }</script>
+</body></html>
+"""
+
+fd, filename = tempfile.mkstemp(suffix='.html')
+try:
+    fp = os.fdopen(fd, 'wb')
+    try:
+        fp.write(source)
+    finally:
+        fp.close()
+
+    # Without stream filters the file is read in one piece
+    whole = html.from_opener(opener, filename)
+    print Reads.sizes
+    print whole.render_string(Model())
+
+    del Reads.sizes[:]
+    chunked = html.replace(streamfilters=[Filter])
+    chunked = chunked.from_opener(opener, filename)
+    print Reads.sizes
+    print whole.tree.dump() == chunked.tree.dump()
+    print whole.render_string(Model()) == chunked.render_string(Model())
+finally:
+    os.unlink(filename)